@@ -0,0 +1,134 @@
+"""Compare the legacy and the compiled evaluation of constrain_app_enabled.
+
+Run from the repository root:
+    python appdaemon/benchmarks/constraint_benchmark.py [--seconds 2]
+
+State reads are modelled like AppDaemon serves them: a lookup in the state
+dict under a lock which returns a deep copy of the value.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+from copy import deepcopy
+from types import SimpleNamespace
+
+APPS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "configuration", "apps"
+)
+sys.path.insert(0, APPS_DIR)
+
+from appbase import (  # noqa: E402 pylint: disable=wrong-import-position
+    APP_SCHEMA,
+    AppBase,
+    validate_args,
+)
+from house_config import HOUSE, MODES  # noqa: E402 pylint: disable=wrong-import-position
+from presence import PresenceAutomation  # noqa: E402 pylint: disable=wrong-import-position
+
+
+DISABLED_STATES = {
+    "presence": "noone,vacation",
+    "modes": {"guest_mode": "on", "cleaning_mode": "on"},
+    "days": "Saturday,Sunday",
+}
+
+STATES = {
+    HOUSE["presence_state"]: PresenceAutomation.HouseState.someone.value,
+    MODES["guest_mode"]: "off",
+    MODES["cleaning_mode"]: "off",
+    "input_boolean.benchmark_app": "on",
+}
+
+
+def legacy_constrain_app_enabled(app: AppBase, value: str) -> bool:
+    """Evaluate the constraint the way it was done before compilation, on
+       the validated disabled states."""
+    if "presence" in app.disabled_states:
+        presence_disable = [
+            app.presence_app.HouseState[disabled_state].value
+            for disabled_state in app.disabled_states["presence"]
+        ]
+        if app.get_state(HOUSE["presence_state"]) in presence_disable:
+            return False
+
+    if "modes" in app.disabled_states:
+        for mode, state in app.disabled_states["modes"]:
+            if app.get_state(MODES[mode]) == state:
+                return False
+
+    if "days" in app.disabled_states:
+        disabled_days = app.disabled_states["days"]
+        if app.datetime().strftime("%A") in disabled_days:
+            return False
+
+    if app.get_state(app.enable_input_boolean) == "off":
+        return False
+
+    return True
+
+
+def build_app(
+    disabled_states: dict = DISABLED_STATES, states: dict = STATES
+) -> AppBase:
+    """Return an AppBase with the AppDaemon parts replaced by local stand-ins,
+       the disabled states are validated like the apps do."""
+    lock = threading.Lock()
+
+    def get_state(entity: str = None, **kwargs: dict) -> str:
+        with lock:
+            return deepcopy(states.get(entity))
+
+    config, error = validate_args(
+        APP_SCHEMA,
+        {"module": "benchmark", "class": "AppBase", "disabled_states": disabled_states},
+    )
+    if error:
+        raise ValueError(error)
+
+    app = AppBase.__new__(AppBase)
+    app.disabled_states = config["disabled_states"]
+    app.enable_input_boolean = "input_boolean.benchmark_app"
+    app.presence_app = SimpleNamespace(HouseState=PresenceAutomation.HouseState)
+    app.get_state = get_state
+    app.datetime = datetime.datetime.now
+    app.compile_constraints()
+    return app
+
+
+def evaluations_per_second(func, seconds: float) -> float:
+    """Return how often the given function can be called per second."""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            func()
+        calls += 1000
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = build_app()
+    assert legacy_constrain_app_enabled(app, "1") == app.constrain_app_enabled("1")
+
+    before = evaluations_per_second(
+        lambda: legacy_constrain_app_enabled(app, "1"), args.seconds
+    )
+    after = evaluations_per_second(lambda: app.constrain_app_enabled("1"), args.seconds)
+
+    print(f"legacy:   {before:>12,.0f} evaluations/s")
+    print(f"compiled: {after:>12,.0f} evaluations/s")
+    print(f"speedup:  {after / before:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
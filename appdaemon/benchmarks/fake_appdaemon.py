@@ -0,0 +1,645 @@
+"""Define an in-memory stand-in for the AppDaemon Hass and MQTT plugin APIs.
+
+The runtime keeps the state of all entities, the listeners, a scheduler on a
+VirtualClock (apps/clock.py) and the worker queue. Callbacks are dispatched like AppDaemon
+does it (filters, duration, constraints, sanitized kwargs) and executed one
+after another by drain(). Service calls are recorded and applied to the state
+like Home Assistant would, e.g. light/turn_on switches the light on.
+"""
+
+import datetime
+import itertools
+import sys
+import threading
+import time
+import traceback
+import types
+from collections import deque
+from copy import deepcopy
+from typing import Any, Callable, Union
+
+from clock import VirtualClock
+
+STATE_KWARGS = (
+    "old", "new", "attribute", "duration", "state", "entity", "old_state",
+    "new_state", "oneshot", "immediate",
+)
+TIMER_KWARGS = ("interval", "constrain_days", "constrain_input_boolean")
+
+TOGGLE_DOMAINS = ("light", "switch", "input_boolean", "fan", "media_player")
+ALARM_STATES = {
+    "alarm_arm_away": "armed_away",
+    "alarm_arm_home": "armed_home",
+    "alarm_disarm": "disarmed",
+    "alarm_trigger": "triggered",
+}
+
+
+class Runtime:  # pylint: disable=too-many-instance-attributes
+    """Define the simulated AppDaemon and Home Assistant."""
+
+    def __init__(self, start: datetime.datetime, verbose: bool = False) -> None:
+        """Initialize."""
+        self.clock = VirtualClock(start, self.run_timer)
+        self.verbose = verbose
+        self.lock = threading.RLock()
+
+        self.apps = {}
+        self.app_config = {}
+        self.constraints = {}
+        self.states = {}
+        self.state_callbacks = {}
+        self.event_callbacks = {}
+        self.queue = deque()
+        self._handles = itertools.count()
+
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        """Reset the counters, e.g. after the startup of the apps."""
+        self.callbacks = 0
+        self.rejected = 0
+        self.service_calls = 0
+        self.services = {}
+        self.mqtt_messages = 0
+        self.log_lines = 0
+        self.errors = []
+        self.latencies = []
+
+    @property
+    def now(self) -> datetime.datetime:
+        """Return the simulated time."""
+        return self.clock.now()
+
+    def handle(self) -> str:
+        """Return a new handle."""
+        return str(next(self._handles))
+
+    def log(self, name: str, level: str, message: str) -> None:
+        """Count a log line, print it in verbose mode."""
+        self.log_lines += 1
+        if self.verbose:
+            print(f"{self.now:%H:%M:%S} {level} {name}: {message}")
+
+    ##########################################################################
+    # State
+    ##########################################################################
+
+    def get_state(
+        self, entity: Union[str, None] = None, attribute: Union[str, None] = None
+    ) -> Any:
+        """Return the state like AppDaemon does."""
+        with self.lock:
+            if entity is None:
+                return deepcopy(self.states)
+            if "." not in entity:
+                return deepcopy(
+                    {
+                        entity_id: state
+                        for entity_id, state in self.states.items()
+                        if entity_id.split(".")[0] == entity
+                    }
+                )
+            state = self.states.get(entity)
+            if state is None:
+                return None
+            if attribute is None:
+                return state["state"]
+            if attribute == "all":
+                return deepcopy(state)
+            if attribute in state["attributes"]:
+                return deepcopy(state["attributes"][attribute])
+            return deepcopy(state.get(attribute))
+
+    def set_state(
+        self,
+        entity_id: str,
+        state: Any = None,
+        attributes: Union[dict, None] = None,
+    ) -> None:
+        """Set the state of an entity and notify the listeners on a change."""
+        with self.lock:
+            old = self.states.get(entity_id)
+            timestamp = self.now.isoformat()
+            new = {
+                "entity_id": entity_id,
+                "state": old["state"] if state is None and old else state,
+                "attributes": {
+                    **(old["attributes"] if old else {}),
+                    **(attributes or {}),
+                },
+                "last_changed": timestamp,
+                "last_updated": timestamp,
+            }
+            if new["state"] is not None:
+                new["state"] = str(new["state"])
+            if (
+                old is not None
+                and old["state"] == new["state"]
+                and old["attributes"] == new["attributes"]
+            ):
+                return
+            if old is not None and old["state"] == new["state"]:
+                new["last_changed"] = old["last_changed"]
+            self.states[entity_id] = new
+            callbacks = list(self.state_callbacks.items())
+
+        for handle, callback in callbacks:
+            self.process_state_change(handle, callback, entity_id, old, new)
+
+    def process_state_change(
+        self, handle: str, callback: dict, entity_id: str, old: dict, new: dict
+    ) -> None:
+        """Dispatch a state callback if the change matches its filters."""
+        entity = callback["entity"]
+        if entity is not None and entity != entity_id:
+            if "." in entity or entity != entity_id.split(".")[0]:
+                return
+
+        kwargs = callback["kwargs"]
+        attribute = kwargs.get("attribute")
+        old_value = self.attribute_value(old, attribute)
+        new_value = self.attribute_value(new, attribute)
+        matches = ("old" not in kwargs or kwargs["old"] == old_value) and (
+            "new" not in kwargs or kwargs["new"] == new_value
+        )
+
+        if "duration" in kwargs:
+            pending = callback.get("pending")
+            if pending is not None and self.clock.is_pending(pending):
+                if not matches:
+                    self.cancel_timer(callback.pop("pending"))
+            elif matches:
+                callback["pending"] = self.insert_schedule(
+                    callback["app"],
+                    self.now + datetime.timedelta(seconds=int(kwargs["duration"])),
+                    callback["function"],
+                    kwargs,
+                    state_args=(entity_id, attribute, old_value, new_value),
+                )
+            return
+
+        if not matches:
+            return
+        if kwargs.get("oneshot"):
+            self.state_callbacks.pop(handle, None)
+        self.dispatch(
+            callback["app"],
+            callback["function"],
+            (entity_id, attribute, old_value, new_value, sanitize(kwargs, callback)),
+            kwargs,
+        )
+
+    @staticmethod
+    def attribute_value(state: Union[dict, None], attribute: Union[str, None]) -> Any:
+        """Return the value of the state the listener is interested in."""
+        if state is None:
+            return None
+        if attribute is None:
+            return state["state"]
+        if attribute == "all":
+            return state
+        return state["attributes"].get(attribute, state.get(attribute))
+
+    ##########################################################################
+    # Events and services
+    ##########################################################################
+
+    def fire_event(self, event: str, data: dict) -> None:
+        """Fire an event and notify the listeners."""
+        with self.lock:
+            callbacks = list(self.event_callbacks.values())
+        for callback in callbacks:
+            if callback["event"] not in (None, event):
+                continue
+            kwargs = callback["kwargs"]
+            if any(key in data and data[key] != kwargs[key] for key in kwargs):
+                continue
+            self.dispatch(
+                callback["app"],
+                callback["function"],
+                (event, data, sanitize(kwargs, callback, ())),
+                kwargs,
+            )
+
+    def call_service(self, service: str, **data: dict) -> None:
+        """Record a service call and apply its effect on the state."""
+        self.service_calls += 1
+        self.services[service] = self.services.get(service, 0) + 1
+        domain, action = service.split("/")
+        entity_ids = data.pop("entity_id", None) or []
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+
+        for entity_id in entity_ids:
+            entity_domain = entity_id.split(".")[0]
+            if domain == "input_select" and action == "select_option":
+                self.set_state(entity_id, data["option"])
+            elif domain == "input_number" and action == "set_value":
+                self.set_state(entity_id, data["value"])
+            elif domain == "alarm_control_panel" and action in ALARM_STATES:
+                self.set_state(entity_id, ALARM_STATES[action])
+            elif entity_domain in TOGGLE_DOMAINS:
+                if action == "toggle":
+                    on = self.get_state(entity_id) != "on"
+                else:
+                    on = action == "turn_on"
+                attributes = {
+                    key: value
+                    for key, value in data.items()
+                    if key in ("brightness", "color_name")
+                }
+                self.set_state(entity_id, "on" if on else "off", attributes)
+
+    ##########################################################################
+    # Scheduler
+    ##########################################################################
+
+    def insert_schedule(
+        self,
+        app: Any,
+        when: datetime.datetime,
+        function: Callable,
+        kwargs: dict,
+        interval: Union[int, None] = None,
+        state_args: Union[tuple, None] = None,
+    ) -> str:
+        """Schedule a callback on the clock, return the handle."""
+        return self.clock.schedule(
+            when, self.fire_timer, app, function, kwargs, state_args, interval=interval
+        )
+
+    def cancel_timer(self, handle: str) -> None:
+        """Cancel a scheduled callback."""
+        self.clock.cancel(handle)
+
+    def fire_timer(
+        self,
+        app: Any,
+        function: Callable,
+        kwargs: dict,
+        state_args: Union[tuple, None],
+    ) -> None:
+        """Dispatch a scheduled callback."""
+        if state_args is not None:
+            args = state_args + (sanitize(kwargs, {"app": app}),)
+        else:
+            args = (sanitize(kwargs, {"app": app}, TIMER_KWARGS),)
+        self.dispatch(app, function, args, kwargs)
+
+    def run_timer(self, function: Callable, args: tuple) -> None:
+        """Run a due timer of the clock and the callbacks it queued.
+
+        Timers scheduled by the apps on the clock directly run as callback of
+        the app, e.g. the timers of AppBase with the virtual clock.
+        """
+        if function == self.fire_timer:
+            function(*args)
+        else:
+            self.queue.append((function.__self__, function, args))
+        self.drain()
+
+    def advance(self, until: datetime.datetime) -> None:
+        """Run all timers due until the given time and move the clock."""
+        self.clock.advance(until)
+
+    ##########################################################################
+    # Worker
+    ##########################################################################
+
+    def dispatch(self, app: Any, function: Callable, args: tuple, kwargs: dict) -> None:
+        """Check the constraints and queue the callback."""
+        constraints = self.constraints.get(app.name, ())
+        unconstrained = True
+        for key in list(kwargs):
+            if key in constraints and not getattr(app, key)(kwargs[key]):
+                unconstrained = False
+        if unconstrained:
+            self.queue.append((app, function, args))
+        else:
+            self.rejected += 1
+
+    def stop_app(self, name: str) -> None:
+        """Terminate an app and remove its listeners and timers like AppDaemon."""
+        app = self.apps.pop(name)
+        if hasattr(app, "terminate"):
+            app.terminate()
+        with self.lock:
+            for callbacks in (self.state_callbacks, self.event_callbacks):
+                for handle, callback in list(callbacks.items()):
+                    if callback["app"] is app:
+                        del callbacks[handle]
+
+    def drain(self) -> None:
+        """Run the queued callbacks and send the merged service calls."""
+        while self.queue:
+            while self.queue:
+                app, function, args = self.queue.popleft()
+                started = time.perf_counter()
+                try:
+                    function(*args)
+                except Exception:  # pylint: disable=broad-except
+                    self.errors.append(f"{app.name}: {traceback.format_exc()}")
+                self.latencies.append(time.perf_counter() - started)
+                self.callbacks += 1
+
+            for app in list(self.apps.values()):
+                dispatcher = getattr(app, "dispatcher", None)
+                if dispatcher is not None:
+                    dispatcher.flush()
+
+
+def sanitize(kwargs: dict, callback: dict, keys: tuple = STATE_KWARGS) -> dict:
+    """Return the kwargs without filters and constraints like AppDaemon does."""
+    constraints = callback["app"].list_constraints()
+    return {
+        key: value
+        for key, value in kwargs.items()
+        if key not in keys and key not in constraints
+    }
+
+
+class _PluginBase:
+    """Define the app API shared by the Hass and the MQTT plugin."""
+
+    def __init__(
+        self, runtime: Runtime, name: str, args: dict, app_config: dict
+    ) -> None:
+        """Initialize."""
+        self.runtime = runtime
+        self.name = name
+        self.args = args
+        self.app_config = app_config
+        self.config = {}
+        self.global_vars = {}
+        self.namespace = "default"
+
+    # Logging and apps
+
+    def log(self, msg: str, level: str = "INFO") -> None:
+        """Log a message."""
+        self.runtime.log(self.name, level, msg)
+
+    def error(self, msg: str, level: str = "WARNING") -> None:
+        """Log an error."""
+        self.runtime.log(self.name, level, msg)
+
+    def set_namespace(self, namespace: str) -> None:
+        """Set the default namespace."""
+        self.namespace = namespace
+
+    def get_app(self, name: str) -> Any:
+        """Return the app with the given name."""
+        return self.runtime.apps.get(name)
+
+    def register_constraint(self, name: str) -> None:
+        """Register a constraint method."""
+        with self.runtime.lock:
+            self.runtime.constraints.setdefault(self.name, set()).add(name)
+
+    def deregister_constraint(self, name: str) -> None:
+        """Remove a constraint method."""
+        self.runtime.constraints.get(self.name, set()).discard(name)
+
+    def list_constraints(self) -> list:
+        """Return the registered constraint methods."""
+        return list(self.runtime.constraints.get(self.name, ()))
+
+    # Time
+
+    def get_now(self) -> datetime.datetime:
+        """Return the simulated time."""
+        return self.runtime.now
+
+    def get_now_ts(self) -> float:
+        """Return the simulated time as timestamp."""
+        return self.runtime.now.timestamp()
+
+    @staticmethod
+    def parse_time(time_str: str, name: str = None) -> datetime.time:
+        """Parse a time string."""
+        return datetime.datetime.strptime(time_str, "%H:%M:%S").time()
+
+    def now_is_between(self, start_time_str: str, end_time_str: str, name=None) -> bool:
+        """Return true if the simulated time is between the given times."""
+        start = self.parse_time(start_time_str)
+        end = self.parse_time(end_time_str)
+        now = self.time()
+        if start <= end:
+            return start <= now <= end
+        return now >= start or now <= end
+
+    # Scheduler
+
+    def run_in(self, callback: Callable, seconds: int, **kwargs) -> str:
+        """Run the callback after the given seconds."""
+        return self.runtime.insert_schedule(
+            self,
+            self.runtime.now + datetime.timedelta(seconds=int(seconds)),
+            callback,
+            kwargs,
+        )
+
+    def run_once(self, callback: Callable, start: datetime.time, **kwargs) -> str:
+        """Run the callback once at the given time."""
+        event = datetime.datetime.combine(self.date(), start)
+        if event < self.runtime.now:
+            event += datetime.timedelta(days=1)
+        return self.runtime.insert_schedule(self, event, callback, kwargs)
+
+    def run_at(self, callback: Callable, start: datetime.datetime, **kwargs) -> str:
+        """Run the callback at the given date and time, not in the past."""
+        if start < self.runtime.now:
+            raise ValueError("start cannot be in the past")
+        return self.runtime.insert_schedule(self, start, callback, kwargs)
+
+    def run_daily(self, callback: Callable, start: datetime.time, **kwargs) -> str:
+        """Run the callback daily, through run_every like AppDaemon."""
+        event = datetime.datetime.combine(self.date(), start)
+        if event < self.runtime.now:
+            event += datetime.timedelta(days=1)
+        return self.run_every(callback, event, 24 * 60 * 60, **kwargs)
+
+    def run_every(
+        self, callback: Callable, start: datetime.datetime, interval: int, **kwargs
+    ) -> str:
+        """Run the callback in intervals, a start in the past starts now."""
+        return self.runtime.insert_schedule(
+            self, start, callback, kwargs, interval=interval
+        )
+
+    def cancel_timer(self, handle: str) -> None:
+        """Cancel a scheduled callback."""
+        self.runtime.cancel_timer(handle)
+
+    # Defined last, the names shadow the datetime module in the class body
+
+    def datetime(self) -> datetime.datetime:
+        """Return the simulated date and time."""
+        return self.runtime.now
+
+    def time(self) -> "datetime.time":
+        """Return the simulated time of day."""
+        return self.runtime.now.time()
+
+    def date(self) -> "datetime.date":
+        """Return the simulated date."""
+        return self.runtime.now.date()
+
+
+class Hass(_PluginBase):
+    """Define the stand-in for appdaemon.plugins.hass.hassapi.Hass."""
+
+    def __init__(
+        self, runtime: Runtime, name: str, args: dict, app_config: dict
+    ) -> None:
+        """Initialize."""
+        super().__init__(runtime, name, args, app_config)
+        self.namespace = "hass"
+
+    def get_state(self, entity: str = None, **kwargs) -> Any:
+        """Return the state of an entity."""
+        return self.runtime.get_state(entity, kwargs.get("attribute"))
+
+    def set_state(self, entity_id: str, **kwargs) -> None:
+        """Set the state of an entity."""
+        self.runtime.set_state(
+            entity_id, kwargs.get("state"), kwargs.get("attributes")
+        )
+
+    def entity_exists(self, entity_id: str, **kwargs) -> bool:
+        """Return true if the entity exists."""
+        return entity_id in self.runtime.states
+
+    def listen_state(self, cb: Callable, entity: str = None, **kwargs) -> str:
+        """Listen to state changes."""
+        kwargs.pop("namespace", None)
+        with self.runtime.lock:
+            handle = self.runtime.handle()
+            callback = {"app": self, "function": cb, "entity": entity, "kwargs": kwargs}
+            self.runtime.state_callbacks[handle] = callback
+        if kwargs.get("immediate") and entity in self.runtime.states:
+            state = self.runtime.states[entity]
+            self.runtime.process_state_change(handle, callback, entity, None, state)
+        return handle
+
+    def cancel_listen_state(self, handle: str) -> None:
+        """Cancel a state listener."""
+        self.runtime.state_callbacks.pop(handle, None)
+
+    def listen_event(self, cb: Callable, event: str = None, **kwargs) -> str:
+        """Listen to events."""
+        kwargs.pop("namespace", None)
+        with self.runtime.lock:
+            handle = self.runtime.handle()
+            self.runtime.event_callbacks[handle] = {
+                "app": self,
+                "function": cb,
+                "event": event,
+                "kwargs": kwargs,
+            }
+        return handle
+
+    def cancel_listen_event(self, handle: str) -> None:
+        """Cancel an event listener."""
+        self.runtime.event_callbacks.pop(handle, None)
+
+    def listen_log(self, cb: Callable, level: str = "INFO", **kwargs) -> str:
+        """Listen to the log, log lines are not forwarded in the simulation."""
+        return self.runtime.handle()
+
+    def fire_event(self, event: str, **kwargs) -> None:
+        """Fire an event."""
+        self.runtime.fire_event(event, kwargs)
+
+    def call_service(self, service: str, **kwargs) -> None:
+        """Call a service."""
+        kwargs.pop("namespace", None)
+        self.runtime.call_service(service, **kwargs)
+
+    def turn_on(self, entity_id: str, **kwargs) -> None:
+        """Turn an entity on."""
+        self.call_service("homeassistant/turn_on", entity_id=entity_id, **kwargs)
+
+    def turn_off(self, entity_id: str, **kwargs) -> None:
+        """Turn an entity off."""
+        self.call_service("homeassistant/turn_off", entity_id=entity_id, **kwargs)
+
+    def toggle(self, entity_id: str, **kwargs) -> None:
+        """Toggle an entity."""
+        self.call_service("homeassistant/toggle", entity_id=entity_id, **kwargs)
+
+    def select_option(self, entity_id: str, option: str, **kwargs) -> None:
+        """Select an option of an input select."""
+        self.call_service(
+            "input_select/select_option", entity_id=entity_id, option=option, **kwargs
+        )
+
+    def set_value(self, entity_id: str, value: Any, **kwargs) -> None:
+        """Set the value of an input number."""
+        self.call_service(
+            "input_number/set_value", entity_id=entity_id, value=value, **kwargs
+        )
+
+    def notify(self, message: str, **kwargs) -> None:
+        """Send a notification."""
+        service = f"notify/{kwargs.pop('name', 'notify')}"
+        self.call_service(service, message=message, **kwargs)
+
+
+class Mqtt(_PluginBase):
+    """Define the stand-in for appdaemon.plugins.mqtt.mqttapi.Mqtt."""
+
+    def mqtt_publish(self, topic: str, payload: Any = None, **kwargs) -> None:
+        """Count a published message."""
+        self.runtime.mqtt_messages += 1
+
+
+class ADBase:
+    """Define the stand-in for the AppDaemon 4 base object adbase.ADBase, its
+       APIs are the stand-ins above."""
+
+    def __init__(
+        self, runtime: Runtime, name: str, args: dict, app_config: dict
+    ) -> None:
+        """Initialize."""
+        self.name = name
+        self.args = args
+        self.app_config = app_config
+        self._hass = Hass(runtime, name, args, app_config)
+        self._mqtt = Mqtt(runtime, name, args, app_config)
+
+    def get_ad_api(self) -> Hass:
+        """Return the AppDaemon API."""
+        return self._hass
+
+    def get_plugin_api(self, plugin: str) -> Union[Hass, Mqtt]:
+        """Return the API of the plugin, HASS or MQTT."""
+        return self._mqtt if plugin == "MQTT" else self._hass
+
+    def register_constraint(self, name: str) -> None:
+        """Register a constraint method."""
+        self._hass.register_constraint(name)
+
+
+def install() -> None:
+    """Register the stand-ins as the AppDaemon plugin modules."""
+    modules = {
+        "appdaemon": None,
+        "appdaemon.plugins": None,
+        "appdaemon.plugins.hass": None,
+        "appdaemon.plugins.hass.hassapi": {"Hass": Hass},
+        "appdaemon.plugins.mqtt": None,
+        "appdaemon.plugins.mqtt.mqttapi": {"Mqtt": Mqtt},
+        "adbase": {"ADBase": ADBase},
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__path__ = []
+        for attribute, value in (attributes or {}).items():
+            setattr(module, attribute, value)
+        sys.modules[name] = module
+    for name in modules:
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, sys.modules[name])
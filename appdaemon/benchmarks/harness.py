@@ -0,0 +1,367 @@
+"""Run the apps against the in-memory AppDaemon and report their performance.
+
+Run from the repository root:
+    python appdaemon/benchmarks/harness.py [--scenario motion] [--seed 1] [--reload]
+
+Each scenario starts all apps of the modules occupancy, presence,
+notification, security and switches (plus the apps they depend on) on a
+simulated clock, replays a scripted stream of state changes and deconz
+events and reports callbacks/s, service calls and the callback latency.
+
+The apps run on a VirtualClock (apps/clock.py) shared with the in-memory
+AppDaemon, the time between two steps is skipped by running the timers due
+in between, so the week scenario runs a full week in seconds.
+"""
+
+import argparse
+import datetime
+import importlib
+import os
+import random
+import sys
+import time
+from copy import deepcopy
+from typing import Any, Dict, Iterable, Union
+
+import yaml
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APPS_DIR = os.path.join(BENCHMARKS_DIR, "..", "configuration", "apps")
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(1, APPS_DIR)
+
+import fake_appdaemon  # noqa: E402 pylint: disable=wrong-import-position
+
+fake_appdaemon.install()
+
+# pylint: disable=wrong-import-position
+import app_graph  # noqa: E402
+import clock  # noqa: E402
+import hot_reload  # noqa: E402
+import lanes  # noqa: E402
+import scenarios  # noqa: E402
+import service_caller  # noqa: E402
+import state_mirror  # noqa: E402
+import state_store  # noqa: E402
+import tracing  # noqa: E402
+from house_config import HOUSE, MODES, PERSONS  # noqa: E402
+from state_mirror import entity_ids_in  # noqa: E402
+
+MODULES = ("occupancy", "presence", "notification", "security", "switches")
+
+# Seconds to wait for the apps to run their configuration
+STARTUP_TIMEOUT = 10
+
+DEFAULT_STATES = {
+    "binary_sensor": "off",
+    "device_tracker": "not_home",
+    "input_boolean": "off",
+    "light": "off",
+    "media_player": "off",
+    "sensor": "0",
+    "switch": "off",
+}
+
+
+class SecretLoader(yaml.SafeLoader):  # pylint: disable=too-many-ancestors
+    """Define a yaml loader which replaces secrets with a placeholder."""
+
+
+SecretLoader.add_constructor("!secret", lambda loader, node: "secret")
+
+
+def load_app_config(modules: Iterable[str] = MODULES) -> Dict[str, dict]:
+    """Return the configuration of the apps of the given modules and of the
+       apps they depend on."""
+    configs = {}
+    for filename in sorted(os.listdir(APPS_DIR)):
+        if filename.endswith(".yaml"):
+            with open(os.path.join(APPS_DIR, filename)) as config_file:
+                configs.update(yaml.load(config_file, Loader=SecretLoader) or {})
+
+    configs = {
+        name: config
+        for name, config in configs.items()
+        if isinstance(config, dict) and "module" in config
+    }
+    selected = {name for name, config in configs.items() if config["module"] in modules}
+    pending = list(selected)
+    while pending:
+        for dependency in app_graph.app_dependencies(pending.pop(), configs):
+            if dependency in configs and dependency not in selected:
+                selected.add(dependency)
+                pending.append(dependency)
+    return {name: configs[name] for name in sorted(selected)}
+
+
+def initial_states(app_config: Dict[str, dict]) -> Dict[str, str]:
+    """Return a plausible state for every entity used by the apps."""
+    states = {}
+    for config in (*app_config.values(), HOUSE, MODES, *PERSONS.values()):
+        for entity_id in entity_ids_in(config):
+            domain = entity_id.split(".")[0]
+            states[entity_id] = DEFAULT_STATES.get(domain, "unknown")
+
+    for name, config in app_config.items():
+        enable = config.get("properties", {}).get("enable", name)
+        states[f"input_boolean.{enable}"] = "on"
+
+    for attributes in PERSONS.values():
+        states[attributes["keys"]] = "home"
+        states[attributes["presence_state"]] = "zu Hause"
+    states[HOUSE["presence_state"]] = "Alle sind zu Hause"
+    states[HOUSE["alarm_state"]] = "Ungesichert"
+    states[HOUSE["alarm_panel"]] = "disarmed"
+    for entity_id in states:
+        if entity_id.startswith("sensor.lux"):
+            states[entity_id] = "20"
+    return states
+
+
+class Harness:
+    """Define the apps running against the in-memory AppDaemon."""
+
+    def __init__(
+        self,
+        start: datetime.datetime,
+        modules: Iterable[str] = MODULES,
+        verbose: bool = False,
+        app_config: Union[Dict[str, dict], None] = None,
+        states: Union[Dict[str, str], None] = None,
+    ) -> None:
+        """Initialize, the apps of the given modules or of the given
+           configuration start with the plausible states and the given ones."""
+        self.start = start
+        self.runtime = fake_appdaemon.Runtime(start, verbose)
+        clock.set_clock(self.runtime.clock)
+        # The low lane and the queued service calls run on the workers of the
+        # in-memory AppDaemon, so the results don't depend on thread timing
+        lanes.set_background(False)
+        service_caller.CALLER.background = False
+        # The observers of the mirror of the last run are gone
+        state_mirror.OBSERVERS.clear()
+        # The traces of motions start over with each run
+        tracing.TRACER = tracing.Tracer()
+        # The saved state of the apps is kept in memory unless an app has a
+        # state file, no state is parked by the apps of the last run
+        state_store.STORES.clear()
+        state_store.STORES[state_store.DEFAULT_PATH] = state_store.StateStore(None)
+        hot_reload.clear()
+        self.app_config = (
+            load_app_config(modules) if app_config is None else app_config
+        )
+        for entity_id, state in {
+            **initial_states(self.app_config),
+            **(states or {}),
+        }.items():
+            self.runtime.set_state(entity_id, state)
+
+        started = time.perf_counter()
+        self.start_apps()
+        self.startup_seconds = time.perf_counter() - started
+        self.runtime.reset_counters()
+        self.listeners = len(self.runtime.state_callbacks)
+
+    def reload_app(self, name: str, config: dict) -> float:
+        """Reload an app with a new configuration like AppDaemon, return the
+           milliseconds until it is started again."""
+        started = time.perf_counter()
+        self.runtime.stop_app(name)
+        self.app_config[name] = config
+        module = importlib.import_module(config["module"])
+        app = getattr(module, config["class"])(
+            self.runtime, name, config, self.app_config
+        )
+        self.runtime.apps[name] = app
+        app.initialize()
+        deadline = time.perf_counter() + STARTUP_TIMEOUT
+        while not app_graph.is_started(self.runtime.apps[name]):
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"App not started: {name}")
+            time.sleep(0.001)
+        self.runtime.drain()
+        return (time.perf_counter() - started) * 1000
+
+    def stop_apps(self) -> None:
+        """Terminate all apps like AppDaemon when it stops."""
+        for name in list(self.runtime.apps):
+            self.runtime.stop_app(name)
+
+    def start_apps(self) -> None:
+        """Create and initialize the apps in the order of their priority."""
+        for name, config in self.app_config.items():
+            module = importlib.import_module(config["module"])
+            app_class = getattr(module, config["class"])
+            self.runtime.apps[name] = app_class(
+                self.runtime, name, config, self.app_config
+            )
+
+        for name in sorted(
+            self.app_config, key=lambda app: self.app_config[app].get("priority", 50)
+        ):
+            self.runtime.apps[name].initialize()
+
+        deadline = time.perf_counter() + STARTUP_TIMEOUT
+        while not all(
+            app_graph.is_started(app) for app in self.runtime.apps.values()
+        ):
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"Apps not started: {app_graph.waiting()}")
+            time.sleep(0.001)
+        self.runtime.drain()
+
+    def run(
+        self, steps: Iterable[tuple], duration: int, speed: float = 0
+    ) -> Dict[str, Any]:
+        """Replay the steps and return the measured numbers.
+
+        With a speed the steps are paced in wall time, e.g. speed 10 replays
+        one hour in six minutes, otherwise they run as fast as possible.
+        """
+        runtime = self.runtime
+        timers = runtime.clock.timers_run
+        started = time.perf_counter()
+        lag = 0.0
+        for offset, kind, *payload in sorted(steps, key=lambda step: step[0]):
+            if speed:
+                delay = started + offset / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    lag = max(lag, -delay)
+            runtime.advance(self.start + datetime.timedelta(seconds=offset))
+            if kind == scenarios.STATE:
+                runtime.set_state(*payload)
+            else:
+                runtime.fire_event(*payload)
+            runtime.drain()
+        runtime.advance(self.start + datetime.timedelta(seconds=duration))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(runtime.latencies)
+        return {
+            "apps": len(runtime.apps),
+            "listeners": self.listeners,
+            "startup_ms": self.startup_seconds * 1000,
+            "wall_s": wall,
+            "max_lag_s": lag,
+            "callbacks": runtime.callbacks,
+            "callbacks_per_s": runtime.callbacks / wall if wall else 0,
+            "timers": runtime.clock.timers_run - timers,
+            "rejected": runtime.rejected,
+            "service_calls": runtime.service_calls,
+            "mqtt_messages": runtime.mqtt_messages,
+            "log_lines": runtime.log_lines,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "errors": runtime.errors,
+            "services": runtime.services,
+            "latency": tracing.TRACER.report(),
+        }
+
+
+def percentile(values: list, percent: float) -> float:
+    """Return the percentile of the sorted values."""
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def run_scenario(
+    scenario: scenarios.Scenario, seed: int, verbose: bool = False
+) -> Dict[str, Any]:
+    """Start the apps and run a scenario."""
+    harness = Harness(scenario.start, scenario.modules or MODULES, verbose)
+    steps = scenario.steps(harness.app_config, random.Random(seed), scenario.duration)
+    return harness.run(steps, scenario.duration)
+
+
+def measure_reloads(start: datetime.datetime) -> Dict[str, float]:
+    """Return the mean milliseconds to reload the occupancy engine after
+       changing the delay of a room (hot reload) and after changing the
+       disabled states (full restart)."""
+    harness = Harness(start)
+    rooms = [
+        (name, room)
+        for name, config in harness.app_config.items()
+        if config["class"] == "OccupancyEngine"
+        for room in config["rooms"]
+    ]
+    results = {}
+    for kind in ("full", "hot"):
+        durations = []
+        for name, room in rooms:
+            config = deepcopy(harness.app_config[name])
+            if kind == "hot":
+                properties = config["rooms"][room].setdefault("properties", {})
+                properties["delay"] = properties.get("delay", 5) + 1
+            else:
+                config["disabled_states"]["days"] = f"Sunday{len(durations)}"
+            durations.append(harness.reload_app(name, config))
+        results[kind] = sum(durations) / len(durations) if durations else 0.0
+    return results
+
+
+def print_header() -> None:
+    """Print the header of the result table."""
+    print(
+        f"{'scenario':<10} {'apps':>5} {'listen':>6} {'start ms':>9} {'wall s':>7} "
+        f"{'callbacks':>10} {'cb/s':>9} {'timers':>7} {'rejected':>9} "
+        f"{'services':>9} {'mqtt':>5} {'p50 ms':>7} {'p99 ms':>7} {'errors':>7}"
+    )
+
+
+def print_result(name: str, result: Dict[str, Any], verbose: bool = False) -> None:
+    """Print the result of a scenario as row of the result table."""
+    print(
+        f"{name:<10} {result['apps']:>5} {result['listeners']:>6} "
+        f"{result['startup_ms']:>9.1f} "
+        f"{result['wall_s']:>7.2f} {result['callbacks']:>10,} "
+        f"{result['callbacks_per_s']:>9,.0f} {result['timers']:>7,} "
+        f"{result['rejected']:>9,} {result['service_calls']:>9,} "
+        f"{result['mqtt_messages']:>5,} "
+        f"{result['p50_ms']:>7.3f} {result['p99_ms']:>7.3f} "
+        f"{len(result['errors']):>7}"
+    )
+    if verbose:
+        for service, count in sorted(result["services"].items()):
+            print(f"    {service}: {count}")
+        latency = result["latency"]
+        print(
+            f"    motion to light: {latency['traces']} traces, "
+            f"{latency['unconfirmed']} unconfirmed, "
+            f"{latency['reads']:.1f} state reads, slowest {latency['slowest']}"
+        )
+        for stage, (count, p50, p95) in latency["stages"].items():
+            print(f"    {stage:<9} {count:>6,} p50 {p50:>7.3f} ms  p95 {p95:>7.3f} ms")
+        for error in result["errors"][:3]:
+            print(error)
+
+
+def main() -> None:
+    """Run the scenarios and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(scenarios.SCENARIOS)
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument(
+        "--reload", action="store_true", help="measure reloads of the occupancy engine"
+    )
+    args = parser.parse_args()
+
+    if args.reload:
+        reloads = measure_reloads(scenarios.SCENARIOS["motion"].start)
+        print(
+            f"reload ms: hot {reloads['hot']:.2f}, full {reloads['full']:.2f}"
+        )
+
+    print_header()
+    for name in args.scenario or scenarios.SCENARIOS:
+        result = run_scenario(scenarios.SCENARIOS[name], args.seed, args.verbose)
+        print_result(name, result, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
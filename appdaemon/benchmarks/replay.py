@@ -0,0 +1,75 @@
+"""Replay a recorded event log against the apps.
+
+Run from the repository root:
+    python appdaemon/benchmarks/replay.py events_20260105_170000.adel [--speed 100]
+
+The log is written by the event_recorder app. The apps are started on the
+in-memory AppDaemon of the harness at the time the recording started, the
+state changes and events are fed back at the given speed (1 to 1000 times
+real time, 0 for as fast as possible) and the numbers of the harness are
+reported, plus how far the replay fell behind the requested speed.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+# pylint: disable=wrong-import-position
+import harness  # noqa: E402
+import scenarios  # noqa: E402
+from event_log import STATE_CHANGED, read_records, read_start  # noqa: E402
+
+MAX_SPEED = 1000
+
+
+def load_steps(path: str) -> tuple:
+    """Return the start time and the harness steps of a log."""
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+
+    steps = []
+    for record in read_records(data):
+        offset = record.offset / 1000
+        if record.kind == STATE_CHANGED:
+            steps.append(
+                (offset, scenarios.STATE, record.name, record.state, record.data)
+            )
+        else:
+            steps.append((offset, scenarios.EVENT, record.kind, record.data))
+    return datetime.datetime.fromtimestamp(read_start(data)), steps
+
+
+def main() -> None:
+    """Replay the log and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument(
+        "--module", action="append", help="modules to start, default harness modules"
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if not 0 <= args.speed <= MAX_SPEED:
+        parser.error(f"--speed must be between 0 and {MAX_SPEED}")
+
+    start, steps = load_steps(args.log)
+    duration = int(steps[-1][0]) + 1 if steps else 0
+    print(
+        f"{len(steps):,} entries from {start:%d.%m.%Y %H:%M:%S}, "
+        f"{duration / 3600:.1f}h at speed {args.speed or 'max'}"
+    )
+
+    apps = harness.Harness(start, args.module or harness.MODULES, args.verbose)
+    result = apps.run(steps, duration, args.speed)
+    harness.print_header()
+    harness.print_result("replay", result, args.verbose)
+    if args.speed:
+        print(f"max lag behind speed: {result['max_lag_s']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Define the scripted streams of state changes and events for the harness.
+
+A step is a tuple of the offset in seconds from the start of the scenario,
+the kind of the step and its payload:
+    (offset, STATE, entity_id, state)
+    (offset, EVENT, event, data)
+"""
+
+import datetime
+import random
+from collections import namedtuple
+from typing import Dict, List
+
+from house_config import HOUSE, PERSONS
+
+STATE = "state"
+EVENT = "event"
+
+BUTTON_CODES = (1002, 1003, 2002, 2003, 3002, 3003, 4002, 4003)
+
+ARMED_MOTION = "Scharf mit Bewegung"
+
+# Modules of the apps to start, None for the modules of the harness
+Scenario = namedtuple(
+    "Scenario", ["start", "duration", "steps", "modules"], defaults=(None,)
+)
+
+WEEK_MODULES = (
+    "occupancy", "presence", "notification", "security", "switches",
+    "vacuum", "reminder",
+)
+
+
+def apps_of(app_config: Dict[str, dict], app_class: str) -> List[dict]:
+    """Return the configuration of all apps of the given class."""
+    return [config for config in app_config.values() if config["class"] == app_class]
+
+
+def motion_rooms(app_config: Dict[str, dict]) -> List[dict]:
+    """Return the rooms of the occupancy engines."""
+    return [
+        room
+        for config in apps_of(app_config, "OccupancyEngine")
+        for room in config["rooms"].values()
+    ]
+
+
+def motion_sensors(app_config: Dict[str, dict]) -> List[str]:
+    """Return the motion sensors used by the motion lights and the security."""
+    sensors = {
+        sensor.strip()
+        for room in motion_rooms(app_config)
+        for sensor in room["motion_sensors"].split(",")
+    }
+    for config in apps_of(app_config, "SecurityAutomation"):
+        sensors.update(config["entities"]["motion_sensors"])
+    return sorted(sensors)
+
+
+def motion(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return motion in every room every few minutes and changing lux."""
+    steps = []
+    for sensor in motion_sensors(app_config):
+        offset = rng.uniform(0, 60)
+        while offset < duration:
+            steps.append((offset, STATE, sensor, "on"))
+            steps.append((offset + rng.uniform(10, 60), STATE, sensor, "off"))
+            offset += rng.uniform(60, 600)
+
+    for room in motion_rooms(app_config):
+        lux_sensor = room.get("lux_sensor")
+        if lux_sensor:
+            for offset in range(0, duration, 600):
+                steps.append((offset, STATE, lux_sensor, str(rng.randint(0, 300))))
+    return steps
+
+
+def presence(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return the persons leaving and arriving with the keys every few hours."""
+    steps = []
+    for attributes in PERSONS.values():
+        offset = rng.uniform(0, 1800)
+        home = True
+        while offset < duration:
+            home = not home
+            state = "home" if home else "not_home"
+            steps.append((offset, STATE, attributes["keys"], state))
+            offset += rng.uniform(600, 3 * 3600)
+    return steps
+
+
+def dimmer(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return button presses on all Hue dimmer switches every few seconds."""
+    switches = [
+        config["entities"]["switch"]
+        for config in apps_of(app_config, "HueDimmerSwitch")
+    ]
+    steps = []
+    offset = 0.0
+    while switches and offset < duration:
+        data = {"id": rng.choice(switches), "event": rng.choice(BUTTON_CODES)}
+        steps.append((offset, EVENT, "deconz_event", data))
+        offset += rng.uniform(0.5, 10)
+    return steps
+
+
+def security(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return an armed house with doors opening, motion and false alarms."""
+    doors = []
+    for config in apps_of(app_config, "SecurityAutomation"):
+        doors.extend(config["entities"]["door_sensors"])
+    sensors = doors + motion_sensors(app_config)
+
+    steps = []
+    offset = 0.0
+    while sensors and offset < duration:
+        steps.append((offset, STATE, HOUSE["alarm_state"], ARMED_MOTION))
+        sensor = rng.choice(sensors)
+        steps.append((offset + 60, STATE, sensor, "on"))
+        steps.append((offset + 90, STATE, sensor, "off"))
+        steps.append(
+            (
+                offset + 120,
+                EVENT,
+                "html5_notification.clicked",
+                {"action": "wrong_alarm"},
+            )
+        )
+        offset += rng.uniform(300, 900)
+    return steps
+
+
+def routine(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return the persons leaving for work on weekdays and a weekend away.
+
+    Everyone leaves on Friday evening and comes back on Sunday evening, more
+    than 24 hours later, so the persons become extended away.
+    """
+    steps = []
+    day = 24 * 3600
+    for attributes in PERSONS.values():
+        for offset in range(0, duration, day):
+            weekday = (MONDAY + datetime.timedelta(seconds=offset)).weekday()
+            leave = offset + rng.uniform(6.5, 8.5) * 3600
+            if weekday < 4:
+                steps.append((leave, STATE, attributes["keys"], "not_home"))
+                back = offset + rng.uniform(16.5, 19) * 3600
+                steps.append((back, STATE, attributes["keys"], "home"))
+            elif weekday == 4:
+                steps.append((leave, STATE, attributes["keys"], "not_home"))
+                back = offset + rng.uniform(16.5, 17.5) * 3600
+                steps.append((back, STATE, attributes["keys"], "home"))
+                away = offset + rng.uniform(18, 18.5) * 3600
+                steps.append((away, STATE, attributes["keys"], "not_home"))
+            elif weekday == 6:
+                back = offset + rng.uniform(19.5, 20.5) * 3600
+                steps.append((back, STATE, attributes["keys"], "home"))
+    return steps
+
+
+def week(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return a week of motion, button presses and the routine of the persons."""
+    return (
+        motion(app_config, rng, duration)
+        + routine(app_config, rng, duration)
+        + dimmer(app_config, rng, duration)[:: 60]
+    )
+
+
+def mixed(app_config: Dict[str, dict], rng: random.Random, duration: int) -> list:
+    """Return all scenarios at the same time."""
+    return (
+        motion(app_config, rng, duration)
+        + presence(app_config, rng, duration)
+        + dimmer(app_config, rng, duration)
+        + security(app_config, rng, duration)
+    )
+
+
+# Monday, so no app is disabled by its disabled days
+MONDAY = datetime.datetime(2026, 1, 5)
+
+SCENARIOS = {
+    "motion": Scenario(MONDAY.replace(hour=17), 4 * 3600, motion),
+    "presence": Scenario(MONDAY.replace(hour=6), 24 * 3600, presence),
+    "dimmer": Scenario(MONDAY.replace(hour=19), 3600, dimmer),
+    "security": Scenario(MONDAY.replace(hour=8), 8 * 3600, security),
+    "mixed": Scenario(MONDAY.replace(hour=16), 6 * 3600, mixed),
+    "week": Scenario(MONDAY, 7 * 24 * 3600, week, WEEK_MODULES),
+}
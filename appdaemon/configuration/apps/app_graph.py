@@ -0,0 +1,216 @@
+"""Define the dependency graph used to start apps in topological order."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+import voluptuous_helper as vol_help
+
+CONF_DEPENDENCIES = "dependencies"
+CONF_MANAGER = "manager"
+CONF_MODULE = "module"
+CONF_PROPERTIES = "properties"
+CONF_MQTT_API = "mqtt_api"
+
+MQTT_BASE = "mqtt_base_object"
+STATE_MIRROR = "state_mirror"
+
+# Number of apps which can run their configuration at the same time
+STARTUP_WORKERS = 4
+
+# Seconds between the checks of the waiting apps, apps which aren't started
+# by AppBase, e.g. the MQTT base, can become ready at any time
+RECHECK_INTERVAL = 1
+
+# Seconds after which an app still waiting logs the apps it waits for
+WAIT_WARNING = 30
+
+_LOCK = threading.Lock()
+_WAITING = {}
+_WARNED = set()
+_RECHECK = [None]
+# Increased whenever an app stops, tells the proxies to look up their app again
+_GENERATION = [0]
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=STARTUP_WORKERS, thread_name_prefix="app_startup"
+)
+
+
+def app_dependencies(name: str, app_config: dict) -> Set[str]:
+    """Return the names of the apps the given app depends on."""
+    config = app_config.get(name, {})
+    dependencies = set(vol_help.ensure_list(config.get(CONF_DEPENDENCIES)))
+    if config.get(CONF_MANAGER):
+        dependencies.add(config[CONF_MANAGER])
+    if config.get(CONF_PROPERTIES, {}).get(CONF_MQTT_API) == "enabled":
+        dependencies.add(MQTT_BASE)
+    if STATE_MIRROR in app_config and name != STATE_MIRROR:
+        dependencies.add(STATE_MIRROR)
+    return dependencies
+
+
+class AppGraph:
+    """Define the dependency graph of all configured apps."""
+
+    def __init__(self, app_config: dict) -> None:
+        """Initialize."""
+        self.dependencies = {
+            name: app_dependencies(name, app_config)
+            for name, config in app_config.items()
+            if isinstance(config, dict) and CONF_MODULE in config
+        }
+        self.levels, self.cyclic = self._sort()
+
+    def missing(self, name: str) -> Set[str]:
+        """Return the dependencies of the app which are not configured."""
+        return self.dependencies.get(name, set()) - self.dependencies.keys()
+
+    def _sort(self) -> Tuple[List[Set[str]], Set[str]]:
+        """Return the apps grouped by level in topological order and the
+           apps which are part of or depend on a cycle."""
+        pending = {
+            name: dependencies & self.dependencies.keys()
+            for name, dependencies in self.dependencies.items()
+        }
+        levels = []
+        started = set()
+        while pending:
+            level = {name for name, deps in pending.items() if deps <= started}
+            if not level:
+                break
+            levels.append(level)
+            started |= level
+            for name in level:
+                pending.pop(name)
+        return levels, set(pending)
+
+
+def resolve(app: Any) -> Any:
+    """Return the app behind a proxy, None if it isn't running."""
+    if isinstance(app, LazyApp):
+        try:
+            return app._resolve()  # pylint: disable=protected-access
+        except AttributeError:
+            return None
+    return app
+
+
+def is_started(app: Any) -> bool:
+    """Return true if the given app finished its startup."""
+    return app is not None and getattr(app, "startup_complete", True)
+
+
+def start_when_ready(
+    name: str,
+    dependencies: Set[str],
+    get_app: Callable,
+    start: Callable,
+    log: Union[Callable, None] = None,
+) -> None:
+    """Run the start method of the app once all its dependencies are started,
+       log the missing ones if it still waits after WAIT_WARNING seconds."""
+    with _LOCK:
+        _WAITING[name] = (set(dependencies), get_app, start, log, time.monotonic())
+        _WARNED.discard(name)
+    _start_ready_apps()
+
+
+def notify_ready(name: str) -> None:
+    """Start the apps which were waiting for the given app."""
+    _start_ready_apps()
+
+
+def stopped(name: str) -> None:
+    """Forget the app, it is not waiting anymore and proxies must resolve again."""
+    with _LOCK:
+        _WAITING.pop(name, None)
+        _WARNED.discard(name)
+        _GENERATION[0] += 1
+
+
+def waiting() -> Dict[str, Set[str]]:
+    """Return the waiting apps and the dependencies they are waiting for."""
+    with _LOCK:
+        return {
+            name: {dep for dep in deps if not is_started(get_app(dep))}
+            for name, (deps, get_app, *_) in _WAITING.items()
+        }
+
+
+def _start_ready_apps() -> None:
+    """Submit the start of all apps whose dependencies are started and check
+       the others again in RECHECK_INTERVAL."""
+    with _LOCK:
+        ready = [
+            name
+            for name, (deps, get_app, *_) in _WAITING.items()
+            if all(is_started(get_app(dep)) for dep in deps)
+        ]
+        starts = [_WAITING.pop(name)[2] for name in ready]
+        if _WAITING and _RECHECK[0] is None:
+            _RECHECK[0] = threading.Timer(RECHECK_INTERVAL, _recheck)
+            _RECHECK[0].daemon = True
+            _RECHECK[0].start()
+
+    for start in starts:
+        _EXECUTOR.submit(start)
+
+
+def _recheck() -> None:
+    """Start the apps which became ready, log the ones waiting too long."""
+    with _LOCK:
+        _RECHECK[0] = None
+    _start_ready_apps()
+
+    now = time.monotonic()
+    with _LOCK:
+        blocked = {
+            name: (log, now - since)
+            for name, (_, _, _, log, since) in _WAITING.items()
+            if now - since > WAIT_WARNING and name not in _WARNED
+        }
+        _WARNED.update(blocked)
+    if not blocked:
+        return
+    missing = waiting()
+    for name, (log, seconds) in blocked.items():
+        if log is not None and missing.get(name):
+            log(
+                f"Wartet seit {seconds:.0f} s auf {', '.join(sorted(missing[name]))}",
+                level="WARNING",
+            )
+
+
+class LazyApp:
+    """Define a proxy which resolves an app on first use."""
+
+    __slots__ = ("_name", "_get_app", "_app", "_generation")
+
+    def __init__(self, name: str, get_app: Callable) -> None:
+        """Initialize."""
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_get_app", get_app)
+        object.__setattr__(self, "_app", None)
+        object.__setattr__(self, "_generation", None)
+
+    def _resolve(self) -> Any:
+        """Return the app, look it up if it wasn't resolved yet or was reloaded."""
+        app = self._app
+        if app is None or self._generation != _GENERATION[0]:
+            generation = _GENERATION[0]
+            app = self._get_app(self._name)
+            if app is None:
+                raise AttributeError(f"App {self._name} ist nicht gestartet")
+            object.__setattr__(self, "_app", app)
+            object.__setattr__(self, "_generation", generation)
+        return app
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._resolve(), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(self._resolve(), attribute, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyApp {self._name}>"
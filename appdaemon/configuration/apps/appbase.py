@@ -1,11 +1,26 @@
 """Define base automation object and constraints."""
 import datetime
+import hashlib
+import json
+import time
+import traceback
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Union
 
 import voluptuous as vol
 from appdaemon.plugins.hass.hassapi import Hass
 from appdaemon.plugins.mqtt.mqttapi import Mqtt
 
+import app_graph
+import clock
+import house_registry
+import instrumentation
+import log_format
+import service_caller
+import timer_wheel
+from app_graph import AppGraph, LazyApp
 from house_config import HOUSE, MODES
+from service_dispatcher import ServiceCallDispatcher
 import voluptuous_helper as vol_help
 
 
@@ -15,6 +30,8 @@ CONF_DEPENDENCIES = "dependencies"
 CONF_MANAGER = "manager"
 
 CONF_MQTT_API = 'mqtt_api'
+CONF_LOG_LEVEL = "log_level"
+STATE_MIRROR = "state_mirror"
 CONF_DISABLED_STATES = "disabled_states"
 CONF_PRESENCE = "presence"
 CONF_DAYS = "days"
@@ -23,29 +40,117 @@ CONF_CLEANING_MODE = "cleaning_mode"
 CONF_GUEST_MODE = "guest_mode"
 CONF_SLEEP_MODE = "sleep_mode"
 
+CONSTRAIN_APP_ENABLED = "constrain_app_enabled"
+CONSTRAIN_CALLBACK = "constrain_callback"
+CONSTRAIN_DAYS = "constrain_days"
+CONSTRAIN_START_TIME = "constrain_start_time"
+CONSTRAIN_END_TIME = "constrain_end_time"
+
+# Constraints AppDaemon checks itself instead of calling a method of the app
+TIME_CONSTRAINTS = (CONSTRAIN_DAYS, CONSTRAIN_START_TIME, CONSTRAIN_END_TIME)
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+OFF = "off"
+WEEKDAY = "weekday"
+
+# Keyword arguments of listeners and timers which are not passed to callbacks
+SCHEDULER_KWARGS = (
+    "attribute", "namespace", "duration", "old", "new", "immediate", "oneshot",
+    "interval",
+)
+
+# Domains whose turn_on/turn_off without data only switch the state
+SWITCHED_DOMAINS = ("light", "switch", "input_boolean", "fan")
+SWITCHED_STATES = {"turn_on": "on", "turn_off": "off"}
+
+# Kinds of listeners and timers registered in AppDaemon
+STATE = "state"
+EVENT = "event"
+TIMER = "timer"
+DELAY = "delay"
+EVERY = "every"
+DAILY = "daily"
+
+# AppDaemon refuses a start in the past, closer deadlines are scheduled by delay
+MIN_LEAD = datetime.timedelta(seconds=1)
+
+# Startup longer than this (in seconds) will be logged as warning
+SLOW_STARTUP_THRESHOLD = 0.1
+
+
+class DisabledStates(vol_help.FrozenConfig):
+    """Define the states in which an app is disabled."""
+
+    __slots__ = (CONF_PRESENCE, CONF_DAYS, CONF_MODES)
+
+
 APP_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_MODULE): str,
         vol.Required(CONF_CLASS): str,
         vol.Optional(CONF_DEPENDENCIES): vol_help.ensure_list,
         vol.Optional(CONF_MANAGER): str,
-        vol.Optional(CONF_DISABLED_STATES): vol.Schema(
-            {
-                vol.Optional(CONF_PRESENCE): str,
-                vol.Optional(CONF_DAYS): str,
-                vol.Optional(CONF_MODES): vol.Schema(
-                    {
-                        vol.Optional(CONF_CLEANING_MODE): str,
-                        vol.Optional(CONF_GUEST_MODE): str,
-                        vol.Optional(CONF_SLEEP_MODE): str,
-                    }
-                ),
-            }
+        vol.Optional(CONF_DISABLED_STATES): vol.All(
+            vol.Schema(
+                {
+                    vol.Optional(CONF_PRESENCE): vol_help.comma_set,
+                    vol.Optional(CONF_DAYS): vol_help.comma_set,
+                    vol.Optional(CONF_MODES): vol.All(
+                        vol.Schema(
+                            {
+                                vol.Optional(CONF_CLEANING_MODE): str,
+                                vol.Optional(CONF_GUEST_MODE): str,
+                                vol.Optional(CONF_SLEEP_MODE): str,
+                            }
+                        ),
+                        vol_help.frozen_items,
+                    ),
+                }
+            ),
+            vol_help.frozen(DisabledStates),
         ),
     },
     extra=vol.ALLOW_EXTRA,
 )
 
+# Validation results keyed by schema identity and hash of the app arguments,
+# lives as long as the module so unchanged apps skip validation on reloads.
+# The oldest results are dropped above MAX_VALIDATION_CACHE entries.
+VALIDATION_CACHE = {}
+MAX_VALIDATION_CACHE = 256
+
+# Time spent in each startup phase of each app, keyed by app name
+STARTUP_TIMINGS = {}
+
+
+def args_hash(args: dict) -> str:
+    """Return a stable hash of the given app arguments."""
+    return hashlib.sha1(
+        json.dumps(args, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def validate_args(schema: vol.Schema, args: dict) -> tuple:
+    """Validate the arguments against the schema.
+
+    Return the validated arguments, with the values parsed by the validators,
+    and the error if invalid. The arguments are shared by all apps with the
+    same configuration, so they are frozen.
+    """
+    key = (id(schema), args_hash(args))
+    cached = VALIDATION_CACHE.get(key)
+    if cached is None or cached[0] is not schema:
+        try:
+            config = vol_help.freeze(schema(args))
+            error = None
+        except vol.Invalid as err:
+            config = None
+            error = str(err)
+        cached = VALIDATION_CACHE[key] = (schema, config, error)
+        while len(VALIDATION_CACHE) > MAX_VALIDATION_CACHE:
+            VALIDATION_CACHE.pop(next(iter(VALIDATION_CACHE)))
+    return cached[1], cached[2]
+
 
 ##############################################################################
 # App Base configuration
@@ -58,6 +163,9 @@ APP_SCHEMA = vol.Schema(
 #   - notifications: dict for configuration for notifications, target etc.
 #   - properties: dict for different properties to be used by the app
 #      - mqtt_api: enables or disables the MQTT API, enabled or disabled, defaults to disabled
+#      - log_level: lowest level logged by the app, defaults to INFO
+# Validates the configuration with the APP_SCHEMA, the validated and frozen
+# configuration is cached for reloads
 # Registers a constraint for disabled states:
 #   - The following argument must be added to each listener for the disabled
 #     states to trigger:
@@ -81,6 +189,17 @@ APP_SCHEMA = vol.Schema(
 #     from the app 'presence_app.py' with self.presence_app.'method/variable'
 # Creates a reference to the manager app if defined
 # the app can then be used like self.manager.'method/variable'
+# Starts the app once the apps it depends on are started, see app_graph.py
+# Reads states from the state mirror app if configured, see state_mirror.py
+# Drops writes of a state the entity already has
+# Records the latency of each callback, see instrumentation.py
+# Queues service calls, see queue_turn_on and call_service_async
+# Runs on the clock of clock.py, a VirtualClock for simulations
+# Optional mixins, e.g. class MyApp(LaneMixin, AppBase):
+#   - LaneMixin: run low priority callbacks off the workers, see lanes.py
+#   - PersistenceMixin: keep state over restarts, see state_store.py
+#   - HotReloadMixin: keep state over reloads, see hot_reload.py
+#   - TracingMixin: trace motion to light, see tracing.py
 ##############################################################################
 
 
@@ -89,81 +208,590 @@ class AppBase(Hass):
 
     APP_SCHEMA = APP_SCHEMA
 
+    startup_complete = False
+    terminated = False
+
+    log_level = log_format.LEVELS["INFO"]
+
     def initialize(self) -> None:
         """Initialize."""
+        self.startup_timings = {}
+        started = time.perf_counter()
+        self.clock = clock.get_clock()
 
         # Check if the app configuration is correct:
-        try:
-            self.APP_SCHEMA(self.args)
-        except vol.Invalid as err:
-            self.error(f"Ungültiges Format: {err}", level="ERROR")
+        config, error = validate_args(self.APP_SCHEMA, self.args)
+        if error:
+            self.error(f"Ungültiges Format: {error}", level="ERROR")
             return
+        started = self.record_startup("validation", started)
 
         # Sets the default namespace, can be changed on app level to mqtt
         self.set_namespace("hass")
 
+        # Creates a reference to the state mirror to serve state reads locally,
+        # it resolves the running mirror again after the mirror was reloaded
+        self.state_mirror = (
+            LazyApp(STATE_MIRROR, self.get_app)
+            if STATE_MIRROR in self.app_config
+            else None
+        )
+
+        # Creates a reference to the indexed model of the house
+        self.registry = house_registry.get_registry(self.app_config)
+
         # Define holding place for various configurations
-        self.disabled_states = self.args.get("disabled_states", {})
-        self.entities = self.args.get("entities", {})
         self.handles = {}
-        self.notifications = self.args.get("notifications", {})
-        self.properties = self.args.get("properties", {})
+        self.timer_wheel = timer_wheel.TimerWheel(self)
+        self.deadline_timers = {}
+        self.apply_config(config)
+
+        # Create a dispatcher which merges service calls for multiple entities,
+        # it counts each merged call for the callback which queued it
+        self.dispatcher = ServiceCallDispatcher(super().call_service, self.error)
 
         # Creates a reference to the MQTT Base Object to use the MQTT Api, if mqtt_api: true
         if self.properties.get(CONF_MQTT_API, "disabled") == "enabled":
-            self.mqtt = self.get_app('mqtt_base_object')
+            self.mqtt = LazyApp('mqtt_base_object', self.get_app)
 
-        # Register the constraint for the app to be enabled
-        self.register_constraint("constrain_app_enabled")
-
-        # Create a reference to every dependency in the configuration
+        # Create a reference to every dependency in the configuration, the
+        # reference resolves the app on first use
         for app in self.args.get("dependencies", {}):
             if not getattr(self, app, None):
-                setattr(self, app, self.get_app(app))
+                setattr(self, app, LazyApp(app, self.get_app))
 
         # Create a reference to the manager app
         if self.args.get(CONF_MANAGER):
-            self.manager = getattr(self, self.args[CONF_MANAGER])
-
-        # Run the app configuration if specified
-        if hasattr(self, "configure"):
-            self.configure()
+            manager = self.args[CONF_MANAGER]
+            self.manager = getattr(self, manager, None) or LazyApp(
+                manager, self.get_app
+            )
 
         # Define the input boolean to enable/disable app
         if "enable" in self.properties:
             self.enable_input_boolean = f"input_boolean.{self.properties['enable']}"
         else:
             self.enable_input_boolean = f"input_boolean.{self.name}"
+        self.record_startup("dependencies", started)
 
-    def constrain_app_enabled(self, value: str) -> bool:
-        """Define enable constraint for automation object."""
+        # Start the app as soon as all apps it depends on are started
+        graph = AppGraph(self.app_config)
+        missing = graph.missing(self.name)
+        for app in missing:
+            self.error(f"Abhängigkeit {app} ist nicht konfiguriert", level="ERROR")
+
+        if self.name in graph.cyclic:
+            self.error(
+                "Zyklische Abhängigkeit, starte ohne zu warten", level="WARNING"
+            )
+            self.start()
+        else:
+            app_graph.start_when_ready(
+                self.name,
+                graph.dependencies.get(self.name, set()) - missing,
+                self.get_app,
+                self.start,
+                self.error,
+            )
+
+    def apply_config(self, config: dict) -> None:
+        """Set the validated configuration of the app."""
+        self.disabled_states = config.get(CONF_DISABLED_STATES, DisabledStates())
+        self.entities = config.get("entities", {})
+        self.notifications = config.get("notifications", {})
+        self.properties = config.get("properties", {})
+        self.log_level = log_format.level_number(
+            self.properties.get(CONF_LOG_LEVEL, "INFO")
+        )
+
+    def start(self) -> None:
+        """Start the app once all apps it depends on are started."""
+        started = time.perf_counter()
+        try:
+            # Compile and register the constraint for the app to be enabled
+            self.compile_constraints()
+            self.register_constraint(CONSTRAIN_APP_ENABLED)
+            self.register_constraint(CONSTRAIN_CALLBACK)
+            self.listen_constraint_inputs()
+            started = self.record_startup("constraints", started)
+
+            # Run the app configuration if specified
+            if hasattr(self, "configure"):
+                self.configure()
+            self.record_startup("configure", started)
+            self.after_configure()
+        except Exception:  # pylint: disable=broad-except
+            self.error(f"Fehler beim Start: {traceback.format_exc()}", level="ERROR")
+
+        self.report_startup()
+        self.startup_complete = True
+        app_graph.notify_ready(self.name)
+
+    def after_configure(self) -> None:
+        """Continue the start after configure(), used by the mixins."""
+
+    def record_startup(self, phase: str, started: float) -> float:
+        """Record the time spent in a startup phase, return the current time."""
+        now = time.perf_counter()
+        self.startup_timings[phase] = now - started
+        return now
+
+    def report_startup(self) -> None:
+        """Log the time spent in the startup phases of the app."""
+        STARTUP_TIMINGS[self.name] = self.startup_timings
+        total = sum(self.startup_timings.values())
+        phases = ", ".join(
+            f"{phase} {duration * 1000:.1f}ms"
+            for phase, duration in self.startup_timings.items()
+        )
+        message = f"Start in {total * 1000:.1f}ms ({phases})"
+        if total > SLOW_STARTUP_THRESHOLD:
+            self.log(f"Langsamer {message}", level="WARNING")
+        else:
+            self.log(message, level="DEBUG")
+
+    def log(self, msg: Union[str, Callable], *args, level: str = "INFO") -> None:
+        """Log a message formatted with the arguments if its level is enabled
+           for the app."""
+        if log_format.level_number(level) < self.log_level:
+            return
+        super().log(log_format.format_message(msg, args), level=level)
+
+    def get_state(self, entity: str = None, **kwargs: dict) -> Any:
+        """Return the state of an entity, served by the state mirror if possible,
+           an entity unknown to Home Assistant is read once per UNKNOWN_TTL
+           of the mirror."""
+        mirror = self.mirror()
+        if (
+            mirror is not None
+            and entity is not None
+            and kwargs.get("namespace", self.namespace) == "hass"
+            and set(kwargs) <= {"attribute", "namespace"}
+        ):
+            if mirror.is_tracked(entity) or mirror.track(entity):
+                return mirror.read(entity, kwargs.get("attribute"))
+            if mirror.is_unknown(entity):
+                return None
+        return super().get_state(entity, **kwargs)
+
+    def call_service(self, service: str, **kwargs: dict) -> Any:
+        """Call a service, counted for the running callback."""
+        instrumentation.service_called()
+        return super().call_service(service, **kwargs)
+
+    def mirror(self) -> Any:
+        """Return the running state mirror, None while there is none."""
+        return app_graph.resolve(getattr(self, "state_mirror", None))
+
+    def write_needed(
+        self, entity_id: str, state: Any, attributes: Union[dict, None] = None
+    ) -> bool:
+        """Return false if the entity has or is about to get the state."""
+        mirror = self.mirror()
+        if mirror is None or not (
+            mirror.is_tracked(entity_id) or mirror.track(entity_id)
+        ):
+            return True
+        return mirror.expect(entity_id, state, attributes)
+
+    def switch_needed(self, entity_id: str, service: str, data: dict) -> bool:
+        """Return false if turning an entity on or off without data is
+           redundant."""
+        return (
+            bool(data)
+            or service not in SWITCHED_STATES
+            or entity_id.split(".")[0] not in SWITCHED_DOMAINS
+            or self.write_needed(entity_id, SWITCHED_STATES[service])
+        )
+
+    def select_option(self, entity_id: str, option: str, **kwargs: dict) -> None:
+        """Select an option of an input select unless it is selected."""
+        if kwargs or self.write_needed(entity_id, option):
+            super().select_option(entity_id, option, **kwargs)
+
+    def set_state(self, entity_id: str, **kwargs: dict) -> Any:
+        """Set the state of an entity unless it has the state and attributes."""
+        if (
+            set(kwargs) - {"state", "attributes"}
+            or "state" not in kwargs
+            or self.write_needed(entity_id, kwargs["state"], kwargs.get("attributes"))
+        ):
+            mirror = self.mirror()
+            if mirror is not None:
+                mirror.forget_unknown(entity_id)
+            return super().set_state(entity_id, **kwargs)
+        return None
+
+    def turn_on(self, entity_id: str, **kwargs: dict) -> None:
+        """Turn an entity on unless it is on."""
+        if self.switch_needed(entity_id, "turn_on", kwargs):
+            super().turn_on(entity_id, **kwargs)
+
+    def turn_off(self, entity_id: str, **kwargs: dict) -> None:
+        """Turn an entity off unless it is off."""
+        if self.switch_needed(entity_id, "turn_off", kwargs):
+            super().turn_off(entity_id, **kwargs)
+
+    def call_service_async(
+        self,
+        service: str,
+        timeout: Union[float, None] = None,
+        retries: int = service_caller.RETRIES,
+        on_done: Union[Callable, None] = None,
+        **kwargs: dict,
+    ) -> Future:
+        """Queue a service call, return the future of its result."""
+        instrumentation.service_called()
+        return service_caller.CALLER.submit(
+            super().call_service,
+            service,
+            kwargs,
+            timeout=timeout,
+            retries=retries,
+            on_done=on_done,
+            on_error=self.error,
+        )
+
+    def listen_state(self, callback: Callable, entity: str = None, **kwargs) -> str:
+        """Listen to state changes with an instrumented callback."""
+        callback = self.instrument(callback, kwargs)
+        if self.clock.virtual and "duration" in kwargs:
+            return self.listen_state_duration(callback, entity, kwargs)
+        return self.register_upstream(STATE, callback, entity, kwargs)
+
+    def listen_state_duration(
+        self, callback: Callable, entity: Union[str, None], kwargs: dict
+    ) -> str:
+        """Listen to a state lasting for a duration on the virtual clock.
+
+        Like AppDaemon a change matching old and new starts a timer and a
+        change which doesn't match cancels it, the constraints are checked
+        when the timer runs.
+        """
+        filters = {key: kwargs[key] for key in ("old", "new") if key in kwargs}
+        duration = datetime.timedelta(seconds=int(kwargs["duration"]))
+        timer = {}
+
+        def state_changed(
+            entity: Union[str, dict], attribute: str, old: str, new: str, _: dict
+        ) -> None:
+            """Start or cancel the timer of the duration."""
+            values = {"old": old, "new": new}
+            handle = timer.get("handle")
+            if all(values[key] == value for key, value in filters.items()):
+                if handle is None or not self.clock.is_pending(handle):
+                    timer["handle"] = self.clock.schedule(
+                        self.datetime() + duration,
+                        self.dispatch_callback,
+                        callback,
+                        kwargs,
+                        (entity, attribute, old, new),
+                    )
+            elif handle is not None:
+                self.clock.cancel(timer.pop("handle"))
+
+        listener = {
+            key: kwargs[key] for key in ("attribute", "namespace") if key in kwargs
+        }
+        return self.register_upstream(STATE, state_changed, entity, listener)
+
+    def listen_event(self, callback: Callable, event: str = None, **kwargs) -> str:
+        """Listen to events with an instrumented callback."""
+        callback = self.instrument(callback, kwargs)
+        return self.register_upstream(EVENT, callback, event, kwargs)
+
+    def run_in(self, callback: Callable, seconds: float, **kwargs) -> str:
+        """Run an instrumented callback after the given seconds."""
+        deadline = self.datetime() + datetime.timedelta(seconds=seconds)
+        return self.schedule_once(callback, deadline, kwargs, seconds)
+
+    def run_once(self, callback: Callable, start: datetime.time, **kwargs) -> str:
+        """Run an instrumented callback once at the given time."""
+        return self.schedule_once(callback, self.next_time_of_day(start), kwargs)
+
+    def run_at(self, callback: Callable, start: datetime.datetime, **kwargs) -> str:
+        """Run an instrumented callback at the given date and time."""
+        return self.schedule_once(callback, start, kwargs)
+
+    def schedule_once(
+        self,
+        callback: Callable,
+        deadline: datetime.datetime,
+        kwargs: dict,
+        seconds: Union[float, None] = None,
+    ) -> str:
+        """Run an instrumented callback once at the deadline, AppDaemon runs it
+           after the given seconds or those left until a close deadline."""
+        callback = self.instrument(callback, kwargs)
+        if self.clock.virtual:
+            handle = self.clock.schedule(
+                deadline, self.dispatch_callback, callback, kwargs
+            )
+        else:
+            lead = deadline - self.datetime()
+            if seconds is None and lead < MIN_LEAD:
+                seconds = max(lead.total_seconds(), 0)
+            if seconds is None:
+                handle = self.register_upstream(TIMER, callback, deadline, kwargs)
+            else:
+                handle = self.register_upstream(DELAY, callback, seconds, kwargs)
+        return handle
+
+    def run_daily(self, callback: Callable, start: datetime.time, **kwargs) -> str:
+        """Run a callback daily, through run_every like AppDaemon."""
+        if self.clock.virtual:
+            return self.run_every(
+                callback, self.next_time_of_day(start), 24 * 60 * 60, **kwargs
+            )
+        return self.register_upstream(DAILY, callback, start, kwargs)
+
+    def run_every(
+        self, callback: Callable, start: datetime.datetime, interval: int, **kwargs
+    ) -> str:
+        """Run an instrumented callback in intervals, used by run_daily as well."""
+        callback = self.instrument(callback, kwargs)
+        if self.clock.virtual:
+            handle = self.clock.schedule(
+                start, self.dispatch_callback, callback, kwargs, interval=interval
+            )
+        else:
+            handle = self.register_upstream(EVERY, callback, (start, interval), kwargs)
+        return handle
+
+    def deadline_timer(self, callback: Callable) -> timer_wheel.DeadlineTimer:
+        """Return a timer for the callback whose deadline can be moved
+           cheaply, one for each callback."""
+        timer = timer_wheel.DeadlineTimer(self.timer_wheel, callback)
+        self.deadline_timers[getattr(callback, "__name__", repr(callback))] = timer
+        return timer
+
+    def cancel_timer(self, handle: str) -> None:
+        """Cancel a timer."""
+        if self.clock.virtual:
+            self.clock.cancel(handle)
+        else:
+            super().cancel_timer(handle)
+
+    def register_upstream(
+        self, kind: str, callback: Callable, target: Any, kwargs: dict
+    ) -> str:
+        """Register a listener or timer in AppDaemon, the target is the entity,
+           the event, the deadline, the delay, the start and interval or the
+           time of day."""
+        if kind == STATE:
+            handle = super().listen_state(callback, target, **kwargs)
+        elif kind == EVENT:
+            handle = super().listen_event(callback, target, **kwargs)
+        elif kind == TIMER:
+            handle = super().run_at(callback, target, **kwargs)
+        elif kind == DELAY:
+            handle = super().run_in(callback, target, **kwargs)
+        elif kind == EVERY:
+            handle = super().run_every(callback, *target, **kwargs)
+        else:
+            handle = super().run_daily(callback, target, **kwargs)
+        return handle
+
+    def dispatch_callback(
+        self, callback: Callable, kwargs: dict, args: tuple = ()
+    ) -> None:
+        """Run a callback of the virtual clock if its constraints allow it.
+
+        Like AppDaemon all constraints are checked and removed from the
+        keyword arguments passed to the callback.
+        """
+        if self.terminated:
+            return
+        constraints = self.list_constraints()
+        unconstrained = True
+        for key, value in kwargs.items():
+            if key in constraints and not getattr(self, key)(value):
+                unconstrained = False
+        if unconstrained:
+            callback(
+                *args,
+                {
+                    key: value
+                    for key, value in kwargs.items()
+                    if key not in constraints and key not in SCHEDULER_KWARGS
+                },
+            )
+
+    def next_time_of_day(self, start: datetime.time) -> datetime.datetime:
+        """Return the next occurrence of the time of day on the clock."""
+        event = datetime.datetime.combine(self.date(), start)
+        if event < self.datetime():
+            event += datetime.timedelta(days=1)
+        return event
+
+    def now_is_between(self, start_time: str, end_time: str, name: str = None) -> bool:
+        """Return true if the time of the clock is between the given times."""
+        if not self.clock.virtual:
+            return super().now_is_between(start_time, end_time, name)
+        start = self.parse_time(start_time, name)
+        end = self.parse_time(end_time, name)
+        now = self.time()
+        if start <= end:
+            return start <= now <= end
+        return now >= start or now <= end
+
+    def instrument(self, callback: Callable, kwargs: dict) -> Callable:
+        """Return the callback wrapped with timing, the constraints of the
+           callback move into the callback constraint."""
+        if not callable(callback):
+            return callback
+        stats = instrumentation.callback_stats(
+            self.name, getattr(callback, "__name__", repr(callback))
+        )
+        registered = self.list_constraints()
+        constraints = {
+            key: kwargs.pop(key)
+            for key in list(kwargs)
+            if key in (CONSTRAIN_APP_ENABLED, *TIME_CONSTRAINTS)
+            or (key in registered and key != CONSTRAIN_CALLBACK)
+        }
+        kwargs[CONSTRAIN_CALLBACK] = (stats, constraints)
+        return instrumentation.instrument(stats, callback)
+
+    def terminate(self) -> None:
+        """Terminate."""
+        self.terminated = True
+        app_graph.stopped(self.name)
+        if hasattr(self, "dispatcher"):
+            self.dispatcher.flush()
+
+    def queue_turn_on(
+        self, entity_id: Union[str, Iterable[str]], **kwargs: dict
+    ) -> None:
+        """Turn on the given entities through the service call dispatcher."""
+        self.queue_service("turn_on", entity_id, **kwargs)
+
+    def queue_turn_off(
+        self, entity_id: Union[str, Iterable[str]], **kwargs: dict
+    ) -> None:
+        """Turn off the given entities through the service call dispatcher."""
+        self.queue_service("turn_off", entity_id, **kwargs)
+
+    def queue_service(
+        self, service: str, entity_id: Union[str, Iterable[str]], **kwargs: dict
+    ) -> None:
+        """Queue a call of the domain service for each of the given entities
+           which isn't in the state already."""
+        entity_ids = [entity_id] if isinstance(entity_id, str) else entity_id
+        for entity in entity_ids:
+            if not self.switch_needed(entity, service, kwargs):
+                continue
+            domain = entity.split(".")[0]
+            if domain == "scene":
+                self.dispatcher.submit("scene/turn_on", entity, **kwargs)
+            else:
+                self.dispatcher.submit(f"{domain}/{service}", entity, **kwargs)
+
+    def compile_constraints(self) -> None:
+        """Compile the disabled states into a plan of inputs and disabled values."""
+        plan = []
 
         # Disable callback if house state is in the disabled presence config
-        if "presence" in self.disabled_states:
-            presence_disable = [
-                self.presence_app.HouseState[disabled_state].value
-                for disabled_state in self.disabled_states["presence"].split(",")
-            ]
-            if self.get_state(HOUSE["presence_state"]) in presence_disable:
-                return False
+        if self.disabled_states.presence:
+            plan.append(
+                (
+                    HOUSE["presence_state"],
+                    frozenset(
+                        self.presence_app.HouseState[state].value
+                        for state in self.disabled_states.presence
+                    ),
+                )
+            )
 
         # Disable callback if mode state is equal to state the disable modes config
-        if "modes" in self.disabled_states:
-            for mode, state in self.disabled_states["modes"].items():
-                if self.get_state(MODES[mode]) == state:
-                    return False
+        for mode, state in self.disabled_states.modes or ():
+            plan.append((MODES[mode], frozenset((state,))))
 
         # Disable callback if today is in the disable days config
-        if "days" in self.disabled_states:
-            disabled_days = self.disabled_states["days"].split(",")
-            if datetime.datetime.today().strftime("%A") in disabled_days:
+        if self.disabled_states.days:
+            plan.append((WEEKDAY, self.disabled_states.days))
+
+        # Disable callback if the input boolean of the app is off
+        plan.append((self.enable_input_boolean, frozenset((OFF,))))
+
+        self.constraint_plan = tuple(plan)
+        self.constraint_inputs = {
+            entity: self.get_state(entity)
+            for entity, _ in self.constraint_plan
+            if entity != WEEKDAY
+        }
+        self.constraint_inputs[WEEKDAY] = self.datetime().strftime("%A")
+
+    def listen_constraint_inputs(self) -> None:
+        """Keep the cached inputs of the constraint plan up to date."""
+        for entity in self.constraint_inputs:
+            if entity != WEEKDAY and self.entity_exists(entity):
+                self.listen_state(self.constraint_input_changed, entity)
+
+        if self.disabled_states.days:
+            self.run_daily(self.weekday_changed, datetime.time(0, 0, 0))
+
+    def constraint_input_changed(
+        self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
+    ) -> None:
+        """Update the cached state of an input of the constraint plan."""
+        self.constraint_inputs[entity] = new
+
+    def weekday_changed(self, kwargs: dict) -> None:
+        """Update the cached weekday of the constraint plan."""
+        self.constraint_inputs[WEEKDAY] = self.datetime().strftime("%A")
+
+    def constrain_app_enabled(self, value: str) -> bool:
+        """Define enable constraint for automation object."""
+        inputs = self.constraint_inputs
+        for entity, disabled_values in self.constraint_plan:
+            if inputs.get(entity) in disabled_values:
                 return False
+        return True
 
-        if self.get_state(self.enable_input_boolean) == "off":
+    def constrain_callback(self, value: tuple) -> bool:
+        """Check all constraints of the callback, record the dispatch once all
+           of them passed."""
+        stats, constraints = value
+        if not self.constraints_pass(constraints):
+            stats.rejected()
             return False
+        stats.dispatched()
+        return True
 
+    def constraints_pass(self, constraints: dict) -> bool:
+        """Return true if the constraints allow the callback to run, the time
+           constraints are checked like AppDaemon does."""
+        for key, value in constraints.items():
+            if key == CONSTRAIN_DAYS:
+                days = {day.strip().lower() for day in str(value).split(",")}
+                if WEEKDAYS[self.datetime().weekday()] not in days:
+                    return False
+            elif key not in TIME_CONSTRAINTS and not getattr(self, key)(value):
+                return False
+        if CONSTRAIN_START_TIME in constraints or CONSTRAIN_END_TIME in constraints:
+            return self.now_is_between(
+                constraints.get(CONSTRAIN_START_TIME, "00:00:00"),
+                constraints.get(CONSTRAIN_END_TIME, "23:59:59"),
+            )
         return True
 
+    # Defined last, the names shadow the datetime module in the class body
+
+    def datetime(self) -> "datetime.datetime":
+        """Return the date and time of the clock."""
+        if self.clock.virtual:
+            return self.clock.now()
+        return super().datetime()
+
+    def time(self) -> "datetime.time":
+        """Return the time of day of the clock."""
+        return self.datetime().time()
+
+    def date(self) -> "datetime.date":
+        """Return the date of the clock."""
+        return self.datetime().date()
+
 
 class MqttBase(Mqtt):
     """Define an MQTT class to use the MQTT API within apps."""
@@ -171,3 +799,4 @@ class MqttBase(Mqtt):
     def initialize(self):
         """Initialize."""
         self.set_namespace('mqtt')
+        app_graph.notify_ready(self.name)
@@ -16,6 +16,8 @@ from constants import (
     HOME,
     SINGLE,
 )
+from house_registry import display_name
+from lanes import LOW, LaneMixin
 
 
 ##############################################################################
@@ -109,12 +111,14 @@ class ClimateAutomation(AppBase):
     @staticmethod
     def room_name(room: str) -> str:
         """Return the friendly room name."""
-        return room.replace("_", " ").capitalize()
+        return display_name(room)
 
 
-class NotifyOnHighHumidity(AppBase):
+class NotifyOnHighHumidity(LaneMixin, AppBase):
     """Define a feature to notify on high humidity."""
 
+    LANE = LOW
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_PROPERTIES: vol.Schema(
@@ -128,7 +132,7 @@ class NotifyOnHighHumidity(AppBase):
         """Configure."""
         self.run_every(
             self.send_notification,
-            datetime.datetime.now(),
+            self.datetime() + datetime.timedelta(seconds=1),
             self.properties[CONF_CHECK_INTERVAL] * 60,
             constrain_app_enabled=1,
         )
@@ -184,7 +188,7 @@ class NotifyOnWindowOpen(AppBase):
             level=EMERGENCY,
             title="Fenster offen!",
             message=f"Das Fenster im "
-            f"{entity.split('.')[1].split('_')[-1].capitalize()} "
+            f"{display_name(self.registry.room_of(entity))} "
             f"ist länger als {self.window_open_threshold} "
             f"Minuten offen.",
             targets=self.notifications["targets"],
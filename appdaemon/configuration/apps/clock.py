@@ -0,0 +1,134 @@
+"""Define the clocks the apps read the time from and schedule callbacks on.
+
+The WallClock is the one of AppDaemon, the VirtualClock jumps from one deadline
+to the next, e.g. to run a week of automations in seconds.
+"""
+
+import datetime
+import heapq
+import itertools
+import threading
+from typing import Callable, Union
+
+
+class WallClock:
+    """Define the real time, the callbacks are scheduled by AppDaemon."""
+
+    virtual = False
+
+    @staticmethod
+    def now() -> datetime.datetime:
+        """Return the current date and time."""
+        return datetime.datetime.now()
+
+
+class VirtualClock:
+    """Define a simulated time which advances to the next deadline instantly."""
+
+    virtual = True
+
+    def __init__(
+        self, start: datetime.datetime, runner: Union[Callable, None] = None
+    ) -> None:
+        """Initialize, the optional runner is called with the function and the
+           arguments of each due timer instead of calling the function."""
+        self._now = start
+        self._runner = runner
+        self._lock = threading.RLock()
+        self._schedule = []
+        self._timers = {}
+        self._handles = itertools.count()
+        self.timers_run = 0
+
+    def now(self) -> datetime.datetime:
+        """Return the simulated date and time."""
+        return self._now
+
+    def schedule(
+        self,
+        when: datetime.datetime,
+        function: Callable,
+        *args,
+        interval: Union[int, None] = None,
+    ) -> str:
+        """Run the function at the given time, repeated if an interval is given.
+
+        A time in the past runs the function on the next advance, timers due
+        at the same time run in the order they were scheduled. Return the
+        handle of the timer.
+        """
+        with self._lock:
+            number = next(self._handles)
+            handle = f"clock_{number}"
+            self._timers[handle] = (function, args, interval)
+            heapq.heappush(self._schedule, (max(when, self._now), number, handle))
+            return handle
+
+    def cancel(self, handle: str) -> None:
+        """Cancel a timer."""
+        with self._lock:
+            self._timers.pop(handle, None)
+
+    def is_pending(self, handle: str) -> bool:
+        """Return true if the timer has not run yet or is repeated."""
+        return handle in self._timers
+
+    def next_deadline(self) -> Union[datetime.datetime, None]:
+        """Return the time of the next timer, None if there is none."""
+        with self._lock:
+            while self._schedule and self._schedule[0][2] not in self._timers:
+                heapq.heappop(self._schedule)
+            return self._schedule[0][0] if self._schedule else None
+
+    def advance(self, until: datetime.datetime) -> int:
+        """Run the timers due until the given time in order and move the clock.
+
+        The clock jumps to the time of each timer before running it, so the
+        timers see the time they were scheduled for. Return the number of
+        timers run.
+        """
+        count = 0
+        while True:
+            with self._lock:
+                deadline = self.next_deadline()
+                if deadline is None or deadline > until:
+                    break
+                _, _, handle = heapq.heappop(self._schedule)
+                function, args, interval = self._timers[handle]
+                self._now = max(self._now, deadline)
+                if interval:
+                    heapq.heappush(
+                        self._schedule,
+                        (
+                            deadline + datetime.timedelta(seconds=interval),
+                            next(self._handles),
+                            handle,
+                        ),
+                    )
+                else:
+                    del self._timers[handle]
+
+            if self._runner is None:
+                function(*args)
+            else:
+                self._runner(function, args)
+            count += 1
+
+        self._now = max(self._now, until)
+        self.timers_run += count
+        return count
+
+
+# The clock of all apps, replaced by a VirtualClock for simulations
+CLOCK = WallClock()
+
+
+def get_clock() -> Union[WallClock, VirtualClock]:
+    """Return the clock of the apps."""
+    return CLOCK
+
+
+def set_clock(clock: Union[WallClock, VirtualClock]) -> None:
+    """Replace the clock of the apps, must be called before they initialize."""
+    global CLOCK  # pylint: disable=global-statement
+    CLOCK = clock
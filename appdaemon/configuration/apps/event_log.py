@@ -0,0 +1,196 @@
+"""Define a compact append-only binary log of state changes and events.
+
+Layout of a log file:
+    header: MAGIC, version (1 byte), start timestamp (double)
+    records: kind (1 byte) followed by varints and length-prefixed bytes
+
+    INTERN: string                  assigns the next id to the string
+    STATE:  offset, entity, state, attributes
+    EVENT:  offset, event, data
+
+Offsets are milliseconds since the start timestamp. Entity ids, states and
+event names are interned and written as id. Attributes are written as JSON
+only if they differ from the last attributes of the entity, an empty value
+means unchanged. Event data is always written as JSON.
+"""
+
+import json
+import struct
+import threading
+from collections import namedtuple
+from typing import Any, BinaryIO, Iterator, Union
+
+MAGIC = b"ADEL"
+VERSION = 1
+HEADER = struct.Struct("<4sBd")
+
+INTERN = 0
+STATE = 1
+EVENT = 2
+
+STATE_CHANGED = "state_changed"
+
+Record = namedtuple("Record", ["offset", "kind", "name", "state", "data"])
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Append an unsigned integer with 7 bits per byte."""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple:
+    """Return the unsigned integer at the position and the next position."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def write_bytes(buffer: bytearray, value: bytes) -> None:
+    """Append length-prefixed bytes."""
+    write_varint(buffer, len(value))
+    buffer.extend(value)
+
+
+def read_bytes(data: bytes, position: int) -> tuple:
+    """Return the length-prefixed bytes at the position and the next position."""
+    length, position = read_varint(data, position)
+    if position + length > len(data):
+        raise IndexError("Eintrag abgeschnitten")
+    return data[position:position + length], position + length
+
+
+def encode_json(value: Any) -> bytes:
+    """Return the compact JSON encoding of a value."""
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class EventLogWriter:
+    """Define a writer appending state changes and events to a log file."""
+
+    def __init__(self, file: BinaryIO, start: float) -> None:
+        """Initialize, write the header to the empty file."""
+        self._file = file
+        self._start = start
+        self._lock = threading.Lock()
+        self._buffer = bytearray(HEADER.pack(MAGIC, VERSION, start))
+        self._strings = {}
+        self._attributes = {}
+        self.records = 0
+
+    def _intern(self, value: str) -> int:
+        """Return the id of the string, write it to the log on first use."""
+        if value not in self._strings:
+            self._strings[value] = len(self._strings)
+            self._buffer.append(INTERN)
+            write_bytes(self._buffer, value.encode("utf-8"))
+        return self._strings[value]
+
+    def _offset(self, timestamp: float) -> int:
+        """Return the milliseconds since the start of the log."""
+        return max(int((timestamp - self._start) * 1000), 0)
+
+    def state_changed(
+        self, timestamp: float, entity_id: str, new: Union[dict, None]
+    ) -> None:
+        """Append a state change."""
+        new = new or {}
+        state = "" if new.get("state") is None else str(new["state"])
+        attributes = new.get("attributes", {})
+        with self._lock:
+            entity = self._intern(entity_id)
+            state_id = self._intern(state)
+            self._buffer.append(STATE)
+            write_varint(self._buffer, self._offset(timestamp))
+            write_varint(self._buffer, entity)
+            write_varint(self._buffer, state_id)
+            if self._attributes.get(entity_id) == attributes:
+                write_bytes(self._buffer, b"")
+            else:
+                self._attributes[entity_id] = attributes
+                write_bytes(self._buffer, encode_json(attributes))
+            self.records += 1
+
+    def event(self, timestamp: float, event: str, data: dict) -> None:
+        """Append an event."""
+        with self._lock:
+            event_id = self._intern(event)
+            self._buffer.append(EVENT)
+            write_varint(self._buffer, self._offset(timestamp))
+            write_varint(self._buffer, event_id)
+            write_bytes(self._buffer, encode_json(data))
+            self.records += 1
+
+    def flush(self) -> None:
+        """Write the buffered records to the file."""
+        with self._lock:
+            buffer, self._buffer = self._buffer, bytearray()
+        if buffer:
+            self._file.write(buffer)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        self.flush()
+        self._file.close()
+
+
+def read_start(data: bytes) -> float:
+    """Return the start timestamp of a log."""
+    magic, version, start = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Kein Event-Log oder unbekannte Version")
+    return start
+
+
+def read_records(data: bytes) -> Iterator[Record]:
+    """Yield the state changes and events of a log in the recorded order.
+
+    The attributes of a state change are the full attributes of the entity,
+    a truncated last record is skipped.
+    """
+    read_start(data)
+    position = HEADER.size
+    strings = []
+    attributes = {}
+    try:
+        while position < len(data):
+            kind = data[position]
+            position += 1
+            if kind == INTERN:
+                value, position = read_bytes(data, position)
+                strings.append(value.decode("utf-8"))
+            elif kind == STATE:
+                offset, position = read_varint(data, position)
+                entity, position = read_varint(data, position)
+                state, position = read_varint(data, position)
+                encoded, position = read_bytes(data, position)
+                entity_id = strings[entity]
+                if encoded:
+                    attributes[entity_id] = json.loads(encoded.decode("utf-8"))
+                yield Record(
+                    offset,
+                    STATE_CHANGED,
+                    entity_id,
+                    strings[state],
+                    attributes.get(entity_id, {}),
+                )
+            elif kind == EVENT:
+                offset, position = read_varint(data, position)
+                event, position = read_varint(data, position)
+                encoded, position = read_bytes(data, position)
+                yield Record(
+                    offset, strings[event], None, None, json.loads(encoded.decode())
+                )
+            else:
+                raise ValueError(f"Unbekannter Eintrag {kind} an Position {position}")
+    except IndexError:
+        return
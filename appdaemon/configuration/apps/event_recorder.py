@@ -0,0 +1,100 @@
+"""Define an automation to record state changes and events for a replay."""
+
+import datetime
+import os
+import time
+from typing import Union
+
+import voluptuous as vol
+
+import voluptuous_helper as vol_help
+from appbase import AppBase, APP_SCHEMA
+from constants import CONF_PROPERTIES
+from event_log import EventLogWriter
+
+
+##############################################################################
+# App to record the state changes and events the apps are subscribed to
+#
+# Each start of the app creates a new log file, see event_log.py for the
+# format and benchmarks/replay.py to replay it. Recording is paused while the
+# input boolean of the app is off.
+#
+# args:
+# properties:
+#   path: directory for the log files, default /conf/event_logs
+#   events: event types to record, default deconz_event, knx_event and
+#           html5_notification.clicked
+#   flush_interval: seconds between writes to the file, default 10
+##############################################################################
+
+
+CONF_PATH = "path"
+CONF_EVENTS = "events"
+CONF_FLUSH_INTERVAL = "flush_interval"
+
+DEFAULT_EVENTS = ["deconz_event", "knx_event", "html5_notification.clicked"]
+
+
+class EventRecorder(AppBase):
+    """Define a feature to record state changes and events to a log file."""
+
+    APP_SCHEMA = APP_SCHEMA.extend(
+        {
+            CONF_PROPERTIES: vol.Schema(
+                {
+                    vol.Optional(CONF_PATH): str,
+                    vol.Optional(CONF_EVENTS): vol_help.ensure_list,
+                    vol.Optional(CONF_FLUSH_INTERVAL): int,
+                },
+                extra=vol.ALLOW_EXTRA,
+            )
+        }
+    )
+
+    def configure(self) -> None:
+        """Configure."""
+        path = self.properties.get(CONF_PATH, "/conf/event_logs")
+        os.makedirs(path, exist_ok=True)
+        started = time.time()
+        filename = os.path.join(
+            path, time.strftime("events_%Y%m%d_%H%M%S.adel", time.localtime(started))
+        )
+        self.writer = EventLogWriter(open(filename, "ab"), started)
+
+        if self.state_mirror is None:
+            self.error("State Mirror nicht konfiguriert", level="ERROR")
+        else:
+            self.state_mirror.add_observer(self.state_changed)
+
+        for event in self.properties.get(CONF_EVENTS, DEFAULT_EVENTS):
+            self.listen_event(self.event_fired, event, constrain_app_enabled=1)
+
+        interval = self.properties.get(CONF_FLUSH_INTERVAL, 10)
+        self.run_every(
+            self.flush, self.datetime() + datetime.timedelta(seconds=interval), interval
+        )
+        self.log(f"Zeichne Ereignisse in {filename} auf", level="DEBUG")
+
+    def state_changed(
+        self, entity: str, old: Union[dict, None], new: Union[dict, None]
+    ) -> None:
+        """Record a state change of a mirrored entity."""
+        if self.constrain_app_enabled(1):
+            self.writer.state_changed(time.time(), entity, new)
+
+    def event_fired(self, event_name: str, data: dict, kwargs: dict) -> None:
+        """Record an event."""
+        self.writer.event(time.time(), event_name, data)
+
+    def flush(self, kwargs: dict) -> None:
+        """Write the recorded entries to the file."""
+        self.writer.flush()
+
+    def terminate(self) -> None:
+        """Terminate."""
+        if self.state_mirror is not None:
+            self.state_mirror.remove_observer(self.state_changed)
+        if hasattr(self, "writer"):
+            self.writer.close()
+        super().terminate()
@@ -153,7 +153,7 @@ class SceneLights(AppBase):
 
     def configure(self) -> None:
         """Configure."""
-        self.lights = self.entities[CONF_LIGHTS].split(",")
+        self.lights = self.entities[CONF_LIGHTS]
         self.scene_color_map = self.properties[CONF_SCENE_COLOR]
         self.scene_brightness_map = self.properties[CONF_SCENE_BRIGHTNESS]
         self.transition_on = self.properties.get(CONF_TRANSITION_ON, 2)
@@ -171,16 +171,14 @@ class SceneLights(AppBase):
     ) -> None:
         """Change the light when the acitivity changed."""
         if self.scene_name(new) == POWER_OFF:
-            for light in self.lights:
-                self.turn_off(light, transition=self.transition_off)
+            self.queue_turn_off(self.lights, transition=self.transition_off)
         else:
-            for light in self.lights:
-                self.turn_on(
-                    light,
-                    brightness=self.brightness(new),
-                    color_name=self.light_color(new),
-                    transition=self.transition_on,
-                )
+            self.queue_turn_on(
+                self.lights,
+                brightness=self.brightness(new),
+                color_name=self.light_color(new),
+                transition=self.transition_on,
+            )
 
     def brightness(self, scene: str) -> float:
         """Get the specified brightness for the given scene."""
@@ -198,20 +196,20 @@ class SceneLights(AppBase):
 
     def brighten_lights(self):
         """Brighten lights."""
-        for light in self.lights:
-            self.turn_on(light, brightness=200, color_name="white", transition=2)
+        self.queue_turn_on(
+            self.lights, brightness=200, color_name="white", transition=2
+        )
 
     def dim_lights(self):
         """Dim lights."""
         current_activity = self.remote_app.current_activity_name
 
-        for light in self.lights:
-            self.turn_on(
-                light,
-                brightness=self.brightness(current_activity),
-                color_name=self.light_color(current_activity),
-                transition=2,
-            )
+        self.queue_turn_on(
+            self.lights,
+            brightness=self.brightness(current_activity),
+            color_name=self.light_color(current_activity),
+            transition=2,
+        )
 
 
 class PhoneCall(AppBase):
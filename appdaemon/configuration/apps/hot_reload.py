@@ -0,0 +1,101 @@
+"""Define the hand-over of the saved state of an app to its reloaded instance.
+
+The new instance continues with the state parked by the terminated one if only
+HOT_RELOAD_KEYS changed, any other change starts it from scratch.
+"""
+
+import threading
+import time
+from typing import Any, Iterable, Set, Union
+
+from state_store import PersistenceMixin
+
+# Seconds a parked state waits to be taken by the new instance of the app
+PARK_TIMEOUT = 30
+
+_LOCK = threading.Lock()
+_PARKED = {}
+
+
+def changed_keys(old: Any, new: Any, prefix: str = "") -> Set[str]:
+    """Return the dotted keys whose values differ, e.g. 'properties.delay'."""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return set() if old == new else {prefix}
+
+    changed = set()
+    for key in old.keys() | new.keys():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if key not in old or key not in new:
+            changed.add(path)
+        else:
+            changed |= changed_keys(old[key], new[key], path)
+    return changed
+
+
+def is_hot(changed: Set[str], hot_keys: Iterable[str]) -> bool:
+    """Return true if every changed key is or is part of a hot reload key."""
+    hot_keys = tuple(hot_keys)
+    return bool(changed) and all(
+        any(key == hot or key.startswith(f"{hot}.") for hot in hot_keys)
+        for key in changed
+    )
+
+
+def park(name: str, args: dict, state: dict) -> None:
+    """Park the saved state of a terminated app with its configuration."""
+    with _LOCK:
+        _PARKED[name] = (args, state, time.monotonic())
+
+
+def take(
+    name: str, args: dict, hot_keys: Iterable[str], app_config: dict
+) -> Union[dict, None]:
+    """Return the state parked by the previous instance of the app, an empty
+       one if other than hot reload keys changed, None if there is none."""
+    expire(app_config)
+    with _LOCK:
+        parked = _PARKED.pop(name, None)
+    if parked is None:
+        return None
+    changed = changed_keys(parked[0], args)
+    if changed and not is_hot(changed, hot_keys):
+        return {}
+    return parked[1]
+
+
+def clear() -> None:
+    """Drop all parked states, e.g. when AppDaemon starts."""
+    with _LOCK:
+        _PARKED.clear()
+
+
+def expire(app_config: dict) -> None:
+    """Drop the states of removed apps and those parked too long."""
+    deadline = time.monotonic() - PARK_TIMEOUT
+    with _LOCK:
+        for name, (_, _, parked) in list(_PARKED.items()):
+            if name not in app_config or parked < deadline:
+                del _PARKED[name]
+
+
+class HotReloadMixin(PersistenceMixin):
+    """Define a mixin continuing with the state of the previous instance of the
+       app if only HOT_RELOAD_KEYS changed."""
+
+    # Keys of the configuration whose change keeps the state of the app
+    HOT_RELOAD_KEYS = ("properties.log_level",)
+
+    def initialize(self) -> None:
+        """Initialize."""
+        self.parked_state = take(
+            self.name, self.args, self.HOT_RELOAD_KEYS, self.app_config
+        )
+        super().initialize()
+
+    def restore_state(self, parked: Union[dict, None] = None) -> None:
+        """Restore the parked state, the saved one if none was parked."""
+        super().restore_state(self.parked_state if parked is None else parked)
+
+    def saved_on_terminate(self, saved: dict) -> None:
+        """Park the saved state for the new instance."""
+        park(self.name, self.args, saved)
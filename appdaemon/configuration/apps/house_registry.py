@@ -0,0 +1,209 @@
+"""Define a registry of the persons, rooms, modes and sensors of the house.
+
+The room of a sensor is derived from its object id, e.g.
+binary_sensor.bewegung_bad_klein is in the room 'bad_klein'.
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, Union
+
+import voluptuous_helper as vol_help
+from house_config import HOUSE, MODES, PERSONS
+from state_mirror import entity_ids_in
+
+NOTIFIER = "notifier"
+
+# Object id prefixes of sensors which are named after their room
+MOTION_PREFIX = "bewegung"
+LUX_PREFIX = "lux"
+WINDOW_PREFIXES = ("fenster", "tuer")
+
+MOTION_LIGHT_CLASS = "MotionLightAutomation"
+OCCUPANCY_CLASS = "OccupancyEngine"
+ROOMS = "rooms"
+
+
+def room_of_entity_id(entity_id: str) -> str:
+    """Return the room in the object id of an entity, e.g. 'bad_klein'."""
+    return entity_id.split(".", 1)[-1].split("_", 1)[-1]
+
+
+def room_name(room: str) -> str:
+    """Return the name of a room as used by the input selects, e.g. 'Bad_klein'."""
+    return room.capitalize()
+
+
+def display_name(room: str) -> str:
+    """Return the name of a room for messages, e.g. 'Bad klein'."""
+    return room.replace("_", " ").capitalize()
+
+
+class Room(vol_help.FrozenConfig):
+    """Define a room with its sensors and lights."""
+
+    __slots__ = ("room", "name", "motion_sensors", "lux_sensors", "windows", "lights")
+
+
+class HouseRegistry:
+    """Define the house with reverse indexes built once."""
+
+    __slots__ = (
+        "persons",
+        "house",
+        "modes",
+        "rooms",
+        "_person_of_entity",
+        "_notifier_of_person",
+        "_person_of_notifier",
+        "_notify_services",
+        "_mode_of_entity",
+        "_room_of_entity",
+        "_room_names",
+    )
+
+    def __init__(
+        self,
+        persons: Dict[str, dict],
+        house: Dict[str, str],
+        modes: Dict[str, str],
+        app_config: Union[Dict[str, dict], None] = None,
+    ) -> None:
+        """Initialize, build the indexes."""
+        self.persons = tuple(persons)
+        self.house = house
+        self.modes = modes
+
+        self._person_of_entity = {}
+        self._notifier_of_person = {}
+        self._person_of_notifier = {}
+        for person, attributes in persons.items():
+            for entity_id in entity_ids_in(attributes):
+                self._person_of_entity[entity_id] = person
+            if NOTIFIER in attributes:
+                self._notifier_of_person[person] = attributes[NOTIFIER]
+                self._person_of_notifier[attributes[NOTIFIER]] = person
+
+        self._notify_services = {
+            notifier: notifier.replace(".", "/", 1)
+            for notifier in (*self._person_of_notifier, house.get(NOTIFIER))
+            if notifier
+        }
+        self._mode_of_entity = {entity_id: mode for mode, entity_id in modes.items()}
+
+        self._room_of_entity = {}
+        self.rooms = self._build_rooms((app_config or {}).values())
+        self._room_names = {room: config.name for room, config in self.rooms.items()}
+
+    def _build_rooms(self, app_configs: Iterable[dict]) -> Dict[str, Room]:
+        """Return the rooms of the sensors and motion lights in the apps."""
+        rooms = {}
+
+        def add(room: str, kind: str, entity_id: str) -> None:
+            """Add an entity to a room."""
+            rooms.setdefault(room, {}).setdefault(kind, set()).add(entity_id)
+            self._room_of_entity.setdefault(entity_id, room)
+
+        for config in app_configs:
+            if not isinstance(config, dict):
+                continue
+            entities = config.get("entities", {})
+            rows = {}
+            if config.get("class") == OCCUPANCY_CLASS:
+                rows = config.get(ROOMS, {})
+            for entity_id in entity_ids_in((entities, rows)):
+                prefix = entity_id.split(".", 1)[-1].split("_", 1)[0]
+                if prefix == MOTION_PREFIX:
+                    add(room_of_entity_id(entity_id), "motion_sensors", entity_id)
+                elif prefix == LUX_PREFIX:
+                    add(room_of_entity_id(entity_id), "lux_sensors", entity_id)
+                elif prefix in WINDOW_PREFIXES:
+                    add(room_of_entity_id(entity_id), "windows", entity_id)
+
+            if config.get("class") == MOTION_LIGHT_CLASS and isinstance(
+                entities.get("motion_sensor"), str
+            ):
+                room = room_of_entity_id(entities["motion_sensor"])
+                for entity_id in entity_ids_in(entities.get("lights", {})):
+                    add(room, "lights", entity_id)
+
+            for row in rows.values():
+                room = room_of_entity_id(vol_help.comma_list(row["motion_sensors"])[0])
+                for entity_id in entity_ids_in(row.get("lights", {})):
+                    add(room, "lights", entity_id)
+
+        return {
+            room: Room(
+                room=room,
+                name=room_name(room),
+                **{kind: tuple(sorted(values)) for kind, values in kinds.items()},
+            )
+            for room, kinds in rooms.items()
+        }
+
+    def person_of(self, entity_id: str) -> Union[str, None]:
+        """Return the person an entity belongs to, e.g. the keys or the phone."""
+        return self._person_of_entity.get(entity_id)
+
+    def notifier_of(self, person: str) -> Union[str, None]:
+        """Return the notifier of a person, None if the person has none."""
+        return self._notifier_of_person.get(person)
+
+    def person_of_notifier(self, notifier: str) -> Union[str, None]:
+        """Return the person of a notifier, None for the notifier of the house."""
+        return self._person_of_notifier.get(notifier)
+
+    def name_of_notifier(self, notifier: str) -> str:
+        """Return the person of a notifier, for the notifier of the house the
+           first word of its object id."""
+        person = self._person_of_notifier.get(notifier)
+        if person is None:
+            return notifier.split(".")[-1].split("_")[0].capitalize()
+        return person
+
+    def notify_service(self, notifier: str) -> str:
+        """Return the service of a notifier, e.g. 'notify/dimitri_handy'."""
+        service = self._notify_services.get(notifier)
+        if service is None:
+            service = self._notify_services[notifier] = notifier.replace(".", "/", 1)
+        return service
+
+    def mode_of(self, entity_id: str) -> Union[str, None]:
+        """Return the mode of an input boolean, e.g. 'guest_mode'."""
+        return self._mode_of_entity.get(entity_id)
+
+    def room_of(self, entity_id: str) -> str:
+        """Return the room of an entity, derived from the entity id if the
+           entity is not in the configuration."""
+        room = self._room_of_entity.get(entity_id)
+        if room is None:
+            room = self._room_of_entity[entity_id] = room_of_entity_id(entity_id)
+        return room
+
+    def room_name_of(self, entity_id: str) -> str:
+        """Return the name of the room of an entity, e.g. 'Bad_klein'."""
+        room = self.room_of(entity_id)
+        name = self._room_names.get(room)
+        if name is None:
+            name = self._room_names[room] = room_name(room)
+        return name
+
+    def room(self, room: str) -> Union[Room, None]:
+        """Return a room with its sensors and lights."""
+        return self.rooms.get(room)
+
+
+_REGISTRY = {}
+
+
+def get_registry(app_config: Union[Dict[str, dict], None] = None) -> HouseRegistry:
+    """Return the registry, built once for each content of the app
+       configuration."""
+    key = hashlib.sha1(
+        json.dumps(app_config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    registry = _REGISTRY.get(key)
+    if registry is None:
+        _REGISTRY.clear()
+        registry = _REGISTRY[key] = HouseRegistry(PERSONS, HOUSE, MODES, app_config)
+    return registry
@@ -8,6 +8,7 @@ import voluptuous_helper as vol_help
 from appbase import APP_SCHEMA, AppBase
 from constants import CONF_INTERVAL, CONF_NOTIFICATIONS, CONF_PROPERTIES, CONF_TARGETS
 from house_config import PERSONS
+from state_store import PersistenceMixin
 
 
 COMPLETED = "completed"
@@ -17,9 +18,12 @@ CONF_TITLE = "title"
 CONF_MESSAGE = "message"
 
 
-class HouseHoldTasks(AppBase):
+class HouseHoldTasks(PersistenceMixin, AppBase):
     """Define a feature for managing household tasks."""
 
+    # The repeating reminder can still be cancelled after a restart
+    PERSISTED_STATE = ("handles",)
+
     def configure(self) -> None:
         """Configure."""
         self.task_entity_id = self.entities["task_sensor"]
@@ -43,7 +47,7 @@ class HouseHoldTasks(AppBase):
         """Check if task has been done in threshold."""
         task_last_done = self.get_task_date()
 
-        if task_last_done + timedelta(days=self.expiry_days) < datetime.today():
+        if task_last_done + timedelta(days=self.expiry_days) < self.datetime():
             self.send_reminder()
 
     def send_reminder(self) -> None:
@@ -60,7 +64,7 @@ class HouseHoldTasks(AppBase):
 
     def mark_task_completed(self, event_name: str, data: dict, kwargs: dict) -> None:
         """Mark the task as completed by updating the timestamp of the sensor over MQTT."""
-        timestamp = datetime.timestamp(datetime.now())
+        timestamp = self.datetime().timestamp()
         payload = {
             "timestamp": int(timestamp),
             "visibility_timeout": "none",
@@ -0,0 +1,197 @@
+"""Define latency histograms and statistics for app callbacks."""
+
+import functools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Tuple, Union
+
+# Each power of two is split into 2^SUB_BUCKET_BITS linear buckets, the
+# recorded values are accurate to 1/16 (6.25%)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values are recorded in microseconds, values above 2^32us (~71min) are clamped
+MAX_VALUE_BITS = 32
+BUCKETS = SUB_BUCKETS * (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1)
+MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+# Number of dispatched but not yet started calls kept per callback
+MAX_DISPATCHED = 64
+
+_LOCK = threading.Lock()
+_CONTEXT = threading.local()
+
+# Statistics of each callback keyed by app name and callback name
+CALLBACK_STATS = {}
+
+
+def bucket_index(value: int) -> int:
+    """Return the bucket of a value in microseconds."""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return SUB_BUCKETS * (shift + 1) + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_value(index: int) -> int:
+    """Return the value in the middle of a bucket in microseconds."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    lower = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return lower + (1 << shift) // 2
+
+
+class Histogram:
+    """Define a fixed-size log-linear histogram of durations.
+
+    Memory and recording time don't depend on the number of recorded values,
+    percentiles are accurate to the width of a bucket.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record a duration in seconds."""
+        value = min(max(int(seconds * 1000000), 0), MAX_VALUE)
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "Histogram") -> None:
+        """Add the recorded values of another histogram."""
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> float:
+        """Return the duration in seconds below which the given percent fall."""
+        if not self.count:
+            return 0.0
+        rank = max(percentile / 100 * self.count, 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_value(index) / 1000000, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        """Return the mean duration in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+
+class CallbackStats:
+    """Define the statistics of one callback of an app."""
+
+    def __init__(self, app: str, callback: str) -> None:
+        """Initialize."""
+        self.app = app
+        self.callback = callback
+        self.queue_wait = Histogram()
+        self.execution = Histogram()
+        self.rejections = 0
+        self.service_calls = 0
+        self._lock = threading.Lock()
+        self._dispatched = deque(maxlen=MAX_DISPATCHED)
+
+    def dispatched(self) -> None:
+        """Remember the time the callback was handed to the worker queue."""
+        self._dispatched.append(time.perf_counter())
+
+    def rejected(self) -> None:
+        """Count a call which was rejected by a constraint."""
+        with self._lock:
+            self.rejections += 1
+
+    def service_called(self) -> None:
+        """Count a service call made by the callback."""
+        with self._lock:
+            self.service_calls += 1
+
+    def started(self, now: float) -> Union[float, None]:
+        """Return the time the call waited in the worker queue."""
+        try:
+            return now - self._dispatched.popleft()
+        except IndexError:
+            return None
+
+    def finished(self, queue_wait: Union[float, None], execution: float) -> None:
+        """Record the timings of a finished call."""
+        with self._lock:
+            if queue_wait is not None:
+                self.queue_wait.record(queue_wait)
+            self.execution.record(execution)
+
+
+def callback_stats(app: str, callback: str) -> CallbackStats:
+    """Return the statistics of a callback, create them on first use."""
+    key = (app, callback)
+    with _LOCK:
+        if key not in CALLBACK_STATS:
+            CALLBACK_STATS[key] = CallbackStats(app, callback)
+        return CALLBACK_STATS[key]
+
+
+def app_stats() -> Dict[str, Tuple[Histogram, Histogram, int, int]]:
+    """Return the merged queue wait, execution, rejections and service calls
+       per app."""
+    with _LOCK:
+        stats = list(CALLBACK_STATS.values())
+
+    apps = {}
+    for entry in stats:
+        queue_wait, execution, rejections, service_calls = apps.get(
+            entry.app, (Histogram(), Histogram(), 0, 0)
+        )
+        with entry._lock:  # pylint: disable=protected-access
+            queue_wait.merge(entry.queue_wait)
+            execution.merge(entry.execution)
+            apps[entry.app] = (
+                queue_wait,
+                execution,
+                rejections + entry.rejections,
+                service_calls + entry.service_calls,
+            )
+    return apps
+
+
+def service_called() -> None:
+    """Count a service call for the callback running in the current thread."""
+    stats = getattr(_CONTEXT, "stats", None)
+    if stats is not None:
+        stats.service_called()
+
+
+def running_callback() -> Tuple[Union[CallbackStats, None], Union[float, None]]:
+    """Return the statistics and the start of the callback running in the
+       current thread."""
+    return getattr(_CONTEXT, "stats", None), getattr(_CONTEXT, "started", None)
+
+
+def instrument(stats: CallbackStats, callback: Callable) -> Callable:
+    """Wrap a callback to record its queue wait and execution time."""
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        queue_wait = stats.started(started)
+        previous = running_callback()
+        _CONTEXT.stats, _CONTEXT.started = stats, started
+        try:
+            return callback(*args, **kwargs)
+        finally:
+            _CONTEXT.stats, _CONTEXT.started = previous
+            stats.finished(queue_wait, time.perf_counter() - started)
+
+    return wrapper
@@ -0,0 +1,128 @@
+"""Define priority lanes for the callbacks of the apps.
+
+High and normal callbacks run on the AppDaemon worker, low callbacks on
+LOW_WORKERS threads of their own, or on the worker once MAX_BACKLOG are waiting.
+"""
+
+import functools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+HIGH = "high"
+NORMAL = "normal"
+LOW = "low"
+
+PRIORITIES = (HIGH, NORMAL, LOW)
+
+# Keyword argument of a listener or timer with a lane of its own
+CONF_LANE = "lane"
+
+# Callbacks of the AppBase which keep the constraint inputs up to date, they
+# stay on the AppDaemon worker
+UNROUTED = ("constraint_input_changed", "weekday_changed")
+
+# Threads running the callbacks of the low lane
+LOW_WORKERS = 2
+
+# Callbacks of a lane waiting at most for a thread of the lane
+MAX_BACKLOG = 500
+
+
+class Lane:
+    """Define a lane running its callbacks on a bounded pool of threads."""
+
+    def __init__(self, name: str, workers: int, max_backlog: int = MAX_BACKLOG):
+        """Initialize."""
+        self.name = name
+        self.workers = workers
+        self.max_backlog = max_backlog
+        self.background = True
+        self.submitted = 0
+        self.overflowed = 0
+        self.failed = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(
+        self, callback: Callable, args: tuple, kwargs: dict, on_error: Callable
+    ) -> None:
+        """Run the callback on a thread of the lane, on the calling thread if
+           the lane runs in the foreground or its backlog is full."""
+        with self._lock:
+            inline = not self.background or self._waiting >= self.max_backlog
+            if not inline:
+                self._waiting += 1
+                self.submitted += 1
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix=f"lane_{self.name}"
+                    )
+            elif self.background:
+                self.overflowed += 1
+        if inline:
+            callback(*args, **kwargs)
+        else:
+            self._executor.submit(self._run, callback, args, kwargs, on_error)
+
+    def _run(
+        self, callback: Callable, args: tuple, kwargs: dict, on_error: Callable
+    ) -> None:
+        """Run a callback of the backlog, report its errors like AppDaemon."""
+        with self._lock:
+            self._waiting -= 1
+        try:
+            callback(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            self.failed += 1
+            on_error(traceback.format_exc())
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of callbacks waiting for a thread of the lane."""
+        return self._waiting
+
+
+# The lanes with threads of their own, the others run on the AppDaemon worker
+LANES = {LOW: Lane(LOW, LOW_WORKERS)}
+
+
+def set_background(background: bool) -> None:
+    """Run the callbacks of all lanes on their threads or on the caller."""
+    for lane in LANES.values():
+        lane.background = background
+
+
+def route(callback: Callable, lane: str, on_error: Callable) -> Callable:
+    """Return the callback running in the given lane."""
+    pool = LANES.get(lane)
+    if pool is None:
+        return callback
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        pool.submit(callback, args, kwargs, on_error)
+
+    return wrapper
+
+
+class LaneMixin:
+    """Define a mixin running the callbacks of an app in its lane."""
+
+    # Lane of the callbacks of the app, a callback can have its own with lane=
+    LANE = NORMAL
+
+    def instrument(self, callback: Callable, kwargs: dict) -> Callable:
+        """Return the instrumented callback running in its lane."""
+        unrouted = getattr(callback, "__name__", None) in UNROUTED
+        lane = kwargs.pop(CONF_LANE, NORMAL if unrouted else self.LANE)
+        callback = super().instrument(callback, kwargs)
+        if not callable(callback):
+            return callback
+        return route(callback, lane, self.callback_failed)
+
+    def callback_failed(self, trace: str) -> None:
+        """Log the error of a callback which ran in a lane of its own."""
+        self.error(f"Fehler im Callback: {trace}", level="ERROR")
@@ -0,0 +1,29 @@
+"""Define the log levels and the lazy formatting of the log messages.
+
+The apps pass the message and its arguments, the message is only formatted
+if its level is enabled for the app.
+"""
+
+from typing import Callable, Union
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+
+def level_number(level: str) -> int:
+    """Return the number of a log level, unknown levels are INFO."""
+    return LEVELS.get(level.upper(), LEVELS["INFO"])
+
+
+def format_message(msg: Union[str, Callable], args: tuple) -> str:
+    """Return the message formatted with its arguments (%-style).
+
+    A callable message is called to produce the text.
+    """
+    if callable(msg):
+        return str(msg())
+    if args:
+        try:
+            return msg % args
+        except (TypeError, ValueError):
+            return f"{msg} {args}"
+    return msg
@@ -1,5 +1,6 @@
 """Define automations for media players."""
 
+from concurrent.futures import Future
 from typing import Union
 
 from appbase import AppBase
@@ -42,7 +43,7 @@ class MediaPlayerAutomation(AppBase):
     def play_media(
         self, media_player: str, playlist: str, source: str, **kwargs: Union[None, dict]
     ) -> None:
-        """Play media."""
+        """Play media, each step starts once the previous one is done."""
         media_item = self.MediaItem(
             media_player,
             playlist,
@@ -51,28 +52,64 @@ class MediaPlayerAutomation(AppBase):
             shuffle=kwargs.get(SHUFFLE),
         )
 
-        self.set_source(media_item.media_player, media_item.source)
-        self.set_volume(media_item.media_player, media_item.volume)
-        self.start_playlist(media_item.media_player, media_item.playlist)
+        entity_id = media_item.media_player
+        steps = [
+            (
+                "media_player/select_source",
+                {"entity_id": entity_id, "source": media_item.source},
+            ),
+            (
+                "media_player/volume_set",
+                {"entity_id": entity_id, "volume_level": media_item.volume / 100},
+            ),
+            (
+                "media_player/play_media",
+                {
+                    "entity_id": entity_id,
+                    "media_content_type": "playlist",
+                    "media_content_id": media_item.playlist,
+                },
+            ),
+        ]
         if media_item.shuffle:
-            self.shuffle(media_item.media_player)
-            self.next_track(media_item.media_player)
-
-    def set_source(self, media_player: str, source: str) -> None:
+            steps.append(
+                (
+                    "media_player/shuffle_set",
+                    {"entity_id": entity_id, "shuffle": "true"},
+                )
+            )
+            steps.append(("media_player/media_next_track", {"entity_id": entity_id}))
+        self.call_in_order(steps)
+
+    def call_in_order(self, steps: list) -> None:
+        """Call the services one after the other without waiting, a failed
+           call is logged and stops the sequence."""
+        if not steps:
+            return
+        (service, data), remaining = steps[0], steps[1:]
+
+        def call_next(done: Future) -> None:
+            """Call the next service if this one succeeded."""
+            if done.exception() is None:
+                self.call_in_order(remaining)
+
+        self.call_service_async(service, on_done=call_next, **data)
+
+    def set_source(self, media_player: str, source: str) -> Future:
         """Set the media player source."""
-        self.call_service(
+        return self.call_service_async(
             "media_player/select_source", entity_id=media_player, source=source
         )
 
-    def set_volume(self, media_player: str, volume: float) -> None:
+    def set_volume(self, media_player: str, volume: float) -> Future:
         """Set volume of the media player."""
-        self.call_service(
+        return self.call_service_async(
             "media_player/volume_set", entity_id=media_player, volume_level=volume / 100
         )
 
-    def start_playlist(self, media_player: str, playlist: str) -> None:
+    def start_playlist(self, media_player: str, playlist: str) -> Future:
         """Start the playlist."""
-        self.call_service(
+        return self.call_service_async(
             "media_player/play_media",
             entity_id=media_player,
             media_content_type="playlist",
@@ -80,29 +117,38 @@ class MediaPlayerAutomation(AppBase):
         )
 
     def stop(self, media_player: str, **kwargs: Union[None, dict]) -> None:
-        """Stop the media player."""
-        self.call_service("media_player/media_pause", entity_id=media_player)
+        """Stop the media player, the source is turned off once it paused."""
+        steps = [("media_player/media_pause", {"entity_id": media_player})]
         if SOURCE_ENTITY in kwargs:
-            self.turn_off(kwargs["source_entity"])
+            steps.append(
+                ("homeassistant/turn_off", {"entity_id": kwargs[SOURCE_ENTITY]})
+            )
+        self.call_in_order(steps)
 
-    def shuffle(self, media_player: str) -> None:
+    def shuffle(self, media_player: str) -> Future:
         """Enables shuffle."""
-        self.call_service(
+        return self.call_service_async(
             "media_player/shuffle_set", entity_id=media_player, shuffle="true"
         )
 
-    def next_track(self, media_player: str) -> None:
+    def next_track(self, media_player: str) -> Future:
         """Play next track."""
-        self.call_service("media_player/media_next_track", entity_id=media_player)
+        return self.call_service_async(
+            "media_player/media_next_track", entity_id=media_player
+        )
 
-    def previous_track(self, media_player: str) -> None:
+    def previous_track(self, media_player: str) -> Future:
         """Play previous track."""
-        self.call_service("media_player/media_previous_track", entity_id=media_player)
+        return self.call_service_async(
+            "media_player/media_previous_track", entity_id=media_player
+        )
 
-    def volume_up(self, media_player: str) -> None:
+    def volume_up(self, media_player: str) -> Future:
         """Increase volume."""
-        self.call_service("media_player/volume_up", entity_id=media_player)
+        return self.call_service_async("media_player/volume_up", entity_id=media_player)
 
-    def volume_down(self, media_player: str) -> None:
+    def volume_down(self, media_player: str) -> Future:
         """Decrease volume."""
-        self.call_service("media_player/volume_down", entity_id=media_player)
+        return self.call_service_async(
+            "media_player/volume_down", entity_id=media_player
+        )
@@ -1,5 +1,6 @@
 """Define automations for motion based lights."""
 
+import datetime
 from typing import Union
 
 import voluptuous as vol
@@ -16,6 +17,8 @@ from constants import (
     ON,
     HOME,
 )
+from hot_reload import HotReloadMixin
+from tracing import TracingMixin
 
 
 ##############################################################################
@@ -24,6 +27,9 @@ from constants import (
 # the motion sensor has no effect, light turns only on if lux is above
 # threshold
 #
+# The rooms of the house are served by the OccupancyEngine of occupancy.py,
+# which runs the same logic for all rooms in one app.
+#
 # args:
 #
 # entities:
@@ -49,12 +55,18 @@ from constants import (
 #     morning: orange
 #     day: white
 #     night: orange
-
+#
+# The states of the day are compiled into a timeline of segments, each with
+# its lights, brightness and color. The current segment is kept in
+# self.segment and replaced by a timer at each boundary of the timeline, a
+# motion reads the segment instead of evaluating the time of the day.
+#
+# The light timer is a deadline timer of the AppBase, a motion while the
+# light is on only moves its deadline, the scheduler is touched about once
+# per occupancy of the room.
 ##############################################################################
 
 
-LIGHT_TIMER = "light_timer"
-
 CONF_MOTION_SENSOR = "motion_sensor"
 CONF_LUX_SENSOR = "lux_sensor"
 CONF_DAY_STATE_TIME = "day_state_time"
@@ -69,7 +81,91 @@ NIGHT = "night"
 DAY_STATES = [MORNING, DAY, NIGHT]
 
 
-class MotionLightAutomation(AppBase):  # pylint: disable=too-many-instance-attributes
+class DayStates(vol_help.FrozenConfig):
+    """Define a configuration value for each state of the day."""
+
+    __slots__ = (MORNING, DAY, NIGHT)
+
+
+LIGHTS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(MORNING): vol_help.entity_id_list,
+            vol.Required(DAY): vol_help.entity_id_list,
+            vol.Required(NIGHT): vol_help.entity_id_list,
+        }
+    ),
+    vol_help.frozen(DayStates),
+)
+DAY_STATE_TIME_SCHEMA = vol.All(
+    vol.Schema(
+        {vol.Required(MORNING): str, vol.Required(DAY): str, vol.Required(NIGHT): str}
+    ),
+    vol_help.frozen(DayStates),
+)
+BRIGHTNESS_LEVEL_SCHEMA = vol.All(
+    vol.Schema({vol.Optional(vol.In(DAY_STATES)): int}), vol_help.frozen(DayStates)
+)
+LIGHT_COLOR_SCHEMA = vol.All(
+    vol.Schema({vol.Optional(vol.In(DAY_STATES)): str}), vol_help.frozen(DayStates)
+)
+
+
+class Segment(vol_help.FrozenConfig):
+    """Define the lights and their settings during a state of the day."""
+
+    __slots__ = ("day_state", "lights", "brightness", "color")
+
+
+def day_state_at(now: datetime.time, times: DayStates) -> str:
+    """Return the state of the day at the given time, a state starts at its
+       time and lasts until the time of the next state."""
+
+    def between(start: datetime.time, end: datetime.time) -> bool:
+        """Return true if the time is at or after start and before end."""
+        if start <= end:
+            return start <= now < end
+        return now >= start or now < end
+
+    if between(times.morning, times.day):
+        return MORNING
+    if between(times.day, times.night):
+        return DAY
+    return NIGHT
+
+
+def next_boundary(now: datetime.datetime, times: DayStates) -> datetime.datetime:
+    """Return the next time after now at which a state of the day starts."""
+    boundaries = []
+    for day_state in DAY_STATES:
+        boundary = datetime.datetime.combine(now.date(), times[day_state])
+        if boundary <= now:
+            boundary += datetime.timedelta(days=1)
+        boundaries.append(boundary)
+    return min(boundaries)
+
+
+def build_segments(
+    lights_map: DayStates, brightness_levels: DayStates, colors: DayStates
+) -> DayStates:
+    """Return the segment of each state of the day, brightness in % and the
+       color default to 75% and white."""
+    return DayStates(
+        **{
+            day_state: Segment(
+                day_state=day_state,
+                lights=lights_map[day_state],
+                brightness=255 / 100 * brightness_levels.get(day_state, 75),
+                color=colors.get(day_state, "white"),
+            )
+            for day_state in DAY_STATES
+        }
+    )
+
+
+class MotionLightAutomation(  # pylint: disable=too-many-instance-attributes
+    TracingMixin, HotReloadMixin, AppBase
+):
     """Define a base feature for motion based lights."""
 
     APP_SCHEMA = APP_SCHEMA.extend(
@@ -78,13 +174,10 @@ class MotionLightAutomation(AppBase):  # pylint: disable=too-many-instance-attri
                 {
                     vol.Required(CONF_MOTION_SENSOR): vol_help.entity_id,
                     vol.Optional(CONF_LUX_SENSOR): vol_help.entity_id,
-                    vol.Required(CONF_LIGHTS): vol.Schema(
-                        {
-                            vol.Required(MORNING): vol_help.entity_id_list,
-                            vol.Required(DAY): vol_help.entity_id_list,
-                            vol.Required(NIGHT): vol_help.entity_id_list,
-                        }
-                    ),
+                    vol.Optional(
+                        CONF_NO_ACTION_ENTITIES, default=()
+                    ): vol_help.entity_id_list,
+                    vol.Required(CONF_LIGHTS): LIGHTS_SCHEMA,
                 },
                 extra=vol.ALLOW_EXTRA,
             ),
@@ -92,53 +185,80 @@ class MotionLightAutomation(AppBase):  # pylint: disable=too-many-instance-attri
                 {
                     vol.Optional(CONF_LUX_THRESHOLD): int,
                     vol.Optional(CONF_DELAY): int,
-                    vol.Required(CONF_DAY_STATE_TIME): vol.Schema(
-                        {
-                            vol.Required(MORNING): str,
-                            vol.Required(DAY): str,
-                            vol.Required(NIGHT): str,
-                        }
-                    ),
-                    vol.Optional(CONF_BRIGHTNESS_LEVEL): vol.Schema(
-                        {vol.Optional(vol.In(DAY_STATES)): int}
-                    ),
-                    vol.Optional(CONF_LIGHT_COLOR): vol.Schema(
-                        {vol.Optional(vol.In(DAY_STATES)): str}
-                    ),
+                    vol.Required(CONF_DAY_STATE_TIME): DAY_STATE_TIME_SCHEMA,
+                    vol.Optional(
+                        CONF_BRIGHTNESS_LEVEL, default={}
+                    ): BRIGHTNESS_LEVEL_SCHEMA,
+                    vol.Optional(CONF_LIGHT_COLOR, default={}): LIGHT_COLOR_SCHEMA,
                 },
                 extra=vol.ALLOW_EXTRA,
             ),
         }
     )
 
+    HOT_RELOAD_KEYS = HotReloadMixin.HOT_RELOAD_KEYS + tuple(
+        f"{CONF_PROPERTIES}.{key}"
+        for key in (
+            CONF_LUX_THRESHOLD,
+            CONF_DELAY,
+            CONF_DAY_STATE_TIME,
+            CONF_BRIGHTNESS_LEVEL,
+            CONF_LIGHT_COLOR,
+        )
+    )
+
+    # A light turned on before a restart is still turned off by its timer
+    PERSISTED_TIMERS = ("turn_light_off",)
+
     def configure(self) -> None:
         """Configure."""
         self.motion_sensor = self.entities[CONF_MOTION_SENSOR]
-        self.delay = self.properties.get(CONF_DELAY, 5) * 60
-        self.no_action_entities = self.entities.get(CONF_NO_ACTION_ENTITIES, "")
-
-        self.day_state_map = self.properties[CONF_DAY_STATE_TIME]
-        self.brightness_map = self.properties.get(CONF_BRIGHTNESS_LEVEL, {})
-        self.color_map = self.properties.get(CONF_LIGHT_COLOR, {})
+        self.no_action_entities = self.entities[CONF_NO_ACTION_ENTITIES]
         self.lights_map = self.entities[CONF_LIGHTS]
+        self.light_timer = self.deadline_timer(self.turn_light_off)
+        self.day_state_timer = self.deadline_timer(self.update_day_state)
+        self.configure_properties()
 
-        # creates a list of a split of each element in self.lights_map
-        self.all_lights = set()
-        for lights in self.lights_map.values():
-            for light in lights.split(","):
-                self.all_lights.add(light)
+        # all lights of all states of the day
+        self.all_lights = tuple(
+            sorted({light for lights in self.lights_map.values() for light in lights})
+        )
 
-        self.room_name = self.motion_sensor.split(".")[1].split("_", 1)[-1].capitalize()
+        self.room_name = self.registry.room_name_of(self.motion_sensor)
 
         self.listen_state(
             self.motion, self.motion_sensor, new=ON, constrain_app_enabled=1
         )
 
+    def configure_properties(self) -> None:
+        """Set the values derived from the properties."""
+        self.delay = self.properties.get(CONF_DELAY, 5) * 60
+        self.day_state_map = self.properties[CONF_DAY_STATE_TIME]
+        self.segments = build_segments(
+            self.lights_map,
+            self.properties[CONF_BRIGHTNESS_LEVEL],
+            self.properties[CONF_LIGHT_COLOR],
+        )
+        self.update_day_state()
+
+    def update_day_state(self, kwargs: Union[dict, None] = None) -> None:
+        """Set the segment of the current state of the day and flip it at the
+           next boundary of the timeline."""
+        times = DayStates(
+            **{
+                day_state: self.parse_time(self.day_state_map[day_state])
+                for day_state in DAY_STATES
+            }
+        )
+        now = self.datetime()
+        self.segment = self.segments[day_state_at(now.time(), times)]
+        self.day_state_timer.run_at(next_boundary(now, times))
+
     def motion(
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
     ) -> None:
         """Take action on motion."""
-        self.log(f"Bewegung im {self.room_name} erkannt.")
+        self.log("Bewegung im %s erkannt.", self.room_name)
         if not self.no_action_entities_on:
             if self.lights_on:
                 self.log("Licht ist bereits an, Timer neustarten.")
@@ -151,44 +271,36 @@ class MotionLightAutomation(AppBase):  # pylint: disable=too-many-instance-attri
 
     def turn_light_on(self) -> None:
         """Turn lights on based on state of day."""
-        for entity in self.lights:
-            self.turn_on(
-                entity, brightness=self.brightness, color_name=self.light_color
-            )
-
-        self.log(
-            f"Das Licht im {self.room_name} " f"wurde durch Bewegung eingeschaltet."
+        segment = self.segment
+        self.queue_turn_on(
+            segment.lights, brightness=segment.brightness, color_name=segment.color
         )
 
+        self.log("Das Licht im %s wurde durch Bewegung eingeschaltet.", self.room_name)
+
     def turn_light_off(self, *args: list) -> None:
         """Turn lights off if none of the no action entities is on."""
         if not self.no_action_entities_on:
-            for entity in self.lights_on:
-                self.turn_off(entity)
+            self.queue_turn_off(self.lights_on)
             self.log(
-                f"Das Licht im {self.room_name} "
-                f"wurde durch den Timer ausgeschaltet."
+                "Das Licht im %s wurde durch den Timer ausgeschaltet.", self.room_name
             )
 
     def turn_off_delayed(self) -> None:
-        """Set timer to turn light off after specified delay."""
-        if LIGHT_TIMER in self.handles:
-            self.cancel_timer(self.handles[LIGHT_TIMER])
-            self.handles.pop(LIGHT_TIMER)
-        self.handles[LIGHT_TIMER] = self.run_in(self.turn_light_off, self.delay)
+        """Move the deadline to turn the light off to the delay from now."""
+        self.light_timer.run_in(self.delay)
         self.log(
-            f"Ein Timer von {round(self.delay / 60)} Minuten "
-            f"wurde im {self.room_name} eingeschaltet."
+            "Ein Timer von %d Minuten wurde im %s eingeschaltet.",
+            round(self.delay / 60),
+            self.room_name,
         )
 
     @property
-    def no_action_entities_on(self) -> list:
-        """Return list of no action entities that are on"""
-        return [
-            entity
-            for entity in self.no_action_entities.split(",")
-            if self.get_state(entity) in ON_STATES
-        ]
+    def no_action_entities_on(self) -> bool:
+        """Return true if one of the no action entities is on."""
+        return any(
+            self.get_state(entity) in ON_STATES for entity in self.no_action_entities
+        )
 
     @property
     def lights_on(self) -> list:
@@ -206,25 +318,20 @@ class MotionLightAutomation(AppBase):  # pylint: disable=too-many-instance-attri
 
     @property
     def day_state(self) -> str:
-        """Return the state of the day based on the current time."""
-        if self.now_is_between(self.day_state_map[MORNING], self.day_state_map[DAY]):
-            return MORNING
-        if self.now_is_between(self.day_state_map[DAY], self.day_state_map[NIGHT]):
-            return DAY
-        return NIGHT
+        """Return the current state of the day."""
+        return self.segment.day_state
 
     @property
-    def lights(self) -> list:
-        """Return list of lights to turn on based on state of day."""
-        return [entity for entity in self.lights_map[self.day_state].split(",")]
+    def lights(self) -> tuple:
+        """Return the lights to turn on based on state of day."""
+        return self.segment.lights
 
     @property
     def brightness(self) -> float:
         """Return brightness to set light to based on state of day."""
-        brightness_level = self.brightness_map.get(self.day_state, 75)
-        return 255 / 100 * int(brightness_level)
+        return self.segment.brightness
 
     @property
     def light_color(self) -> str:
         """Return light color to set light to based on state of day."""
-        return self.color_map.get(self.day_state, "white")
+        return self.segment.color
@@ -1,12 +1,16 @@
 """Define automations for notifications."""
 
-from datetime import datetime
+import datetime
 from enum import Enum
 from typing import Callable, Union
 
+import state_store
+import voluptuous_helper as vol_help
+from app_graph import LazyApp
 from appbase import AppBase
 from constants import OFF, PERSON
 from house_config import HOUSE, PERSONS, MODES
+from lanes import LOW, LaneMixin
 
 
 ##############################################################################
@@ -43,9 +47,39 @@ PRESENCE_STATE = "presence_state"
 SLEEP_MODE = "sleep_mode"
 
 
-class NotificationAutomation(AppBase):
+@state_store.storable
+class NotificationCancel:
+    """Define a callable to cancel a notification, saved with the handles of
+       the app which sent the notification."""
+
+    def __init__(self, notification_app: AppBase, handle: str, title: str) -> None:
+        """Initialize."""
+        self.notification_app = notification_app
+        self.handle = handle
+        self.title = title
+
+    def __call__(self, delete: bool = True) -> None:
+        """Cancel the notification."""
+        self.notification_app.cancel_timer(self.handle)
+        self.notification_app.remove_item_from_briefing(self.title)
+
+    def to_store(self) -> dict:
+        """Return the notification timer to save."""
+        return {"handle": self.handle, "title": self.title}
+
+    @classmethod
+    def from_store(cls, value: dict, owner: AppBase) -> "NotificationCancel":
+        """Return the saved cancel of the notification app of the owner."""
+        return cls(owner.notification_app, value["handle"], value["title"])
+
+
+class NotificationAutomation(LaneMixin, state_store.PersistenceMixin, AppBase):
     """Define a base feature for notifications."""
 
+    # Pending notifications are sent after a restart
+    PERSISTED_STATE = ("briefing_list",)
+    PERSISTED_TIMERS = ("send",)
+
     class NotificationType(Enum):
         """Define an enum for notification types."""
 
@@ -59,6 +93,7 @@ class NotificationAutomation(AppBase):
         home = "home"
 
     # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    @state_store.storable
     class Notification:
         """Define a notification object."""
 
@@ -67,12 +102,29 @@ class NotificationAutomation(AppBase):
             self.level = level
             self.title = title
             self.message = message
-            self.targets = targets
+            self.targets = vol_help.comma_list(targets)
             self.cancel = None
 
             self.interval = kwargs.get(INTERVAL)
             self.data = kwargs.get(DATA)
 
+        def to_store(self) -> dict:
+            """Return the notification to save."""
+            return {
+                "kind": self.kind,
+                "level": self.level,
+                TITLE: self.title,
+                MESSAGE: self.message,
+                "targets": self.targets,
+                INTERVAL: self.interval,
+                DATA: self.data,
+            }
+
+        @classmethod
+        def from_store(cls, value: dict, owner: AppBase):
+            """Return the saved notification."""
+            return cls(**value)
+
     def configure(self):
         """Configure."""
         self.briefing_list = {}
@@ -83,9 +135,12 @@ class NotificationAutomation(AppBase):
                 attribute[PRESENCE_STATE],
                 new=self.presence_app.PresenceState.just_arrived.value,
                 person=person,
+                lane=LOW,
             )
 
-        self.listen_state(self.sleep_mode_deactivated, MODES[SLEEP_MODE], new=OFF)
+        self.listen_state(
+            self.sleep_mode_deactivated, MODES[SLEEP_MODE], new=OFF, lane=LOW
+        )
 
     def someone_arrived(
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
@@ -103,7 +158,7 @@ class NotificationAutomation(AppBase):
 
     def add_item_to_briefing(self, notification: Notification) -> None:
         """Add given notification to the briefing list."""
-        for target in notification.targets.split(","):
+        for target in notification.targets:
             if target in PERSONS.keys():
                 self.briefing_list[target] = {
                     notification.title: {
@@ -127,15 +182,18 @@ class NotificationAutomation(AppBase):
     def send_briefing(self, person: str) -> None:
         """Send each notification on the briefing list for given person."""
         if person in self.briefing_list.keys():
+            notifier = self.registry.notifier_of(person)
+            if notifier is None:
+                return
             for attribute in self.briefing_list[person].values():
                 self.call_service(
-                    f"notify/" f"{PERSONS[person][NOTIFIER].split('.')[1]}",
+                    self.registry.notify_service(notifier),
                     title=attribute[TITLE],
                     message=attribute[MESSAGE],
                     data=attribute[DATA],
                 )
             self.remove_person_from_briefing(person)
-            self.log(f"Briefing an {person} gesendet.")
+            self.log("Briefing an %s gesendet.", person)
 
     def notify(
         self,
@@ -165,7 +223,7 @@ class NotificationAutomation(AppBase):
         one_target_available = False
 
         if notification.level == self.NotificationLevel.home.value:
-            for target in notification.targets.split(","):
+            for target in notification.targets:
                 if self.target_available(target):
                     one_target_available = True
                     break
@@ -177,16 +235,14 @@ class NotificationAutomation(AppBase):
         else:
             handle = self.run_every(
                 self.send,
-                datetime.now(),
+                self.datetime() + datetime.timedelta(seconds=1),
                 notification.interval,
                 notification=notification,
             )
 
-        def cancel(delete: bool = True) -> None:
-            """Define a method to cancel the notification."""
-            self.cancel_timer(handle)
-            self.remove_item_from_briefing(notification.title)
-
+        cancel = NotificationCancel(
+            LazyApp(self.name, self.get_app), handle, notification.title
+        )
         notification.cancel = cancel
 
         return cancel
@@ -196,43 +252,36 @@ class NotificationAutomation(AppBase):
         notification = kwargs["notification"]
         for target in self.get_targets(notification.targets, notification.level):
             self.call_service(
-                f"notify/{target.split('.')[1]}",
+                self.registry.notify_service(target),
                 title=notification.title,
                 message=notification.message,
                 data=notification.data,
             )
-            target_name = target.split(".")[1].split("_")[0].capitalize()
-            self.log(f"Nachricht '{notification.title}' an {target_name}")
-            self.remove_person_from_briefing(target_name)
+            self.log(
+                "Nachricht '%s' an %s",
+                notification.title,
+                self.registry.name_of_notifier(target),
+            )
+            person = self.registry.person_of_notifier(target)
+            if person is not None:
+                self.remove_person_from_briefing(person)
 
-    def get_targets(self, targets: str, level: str) -> list:
-        """Return list of targets based on given level and targets string."""
-        targets_split = targets.split(",")
+    def get_targets(self, targets: tuple, level: str) -> list:
+        """Return list of targets based on given level and targets."""
+        everyone = "everyone" in targets
         targets_list = []
 
-        if level == self.NotificationLevel.emergency.value:
-            if "everyone" in targets_split:
-                targets_list.append(HOUSE[NOTIFIER])
-                for person, attribute in PERSONS.items():
-                    targets_list.append(attribute[NOTIFIER])
-            else:
-                if "home" in targets_split:
-                    targets_list.append(HOUSE[NOTIFIER])
-                for person, attribute in PERSONS.items():
-                    if person in targets_split:
-                        targets_list.append(attribute[NOTIFIER])
-        else:
-            if "everyone" in targets_split:
-                targets_list.append(HOUSE[NOTIFIER])
-                for person, attribute in PERSONS.items():
-                    if self.target_available(person):
-                        targets_list.append(attribute[NOTIFIER])
-            else:
-                if "home" in targets_split:
-                    targets_list.append(HOUSE[NOTIFIER])
-                for person, attribute in PERSONS.items():
-                    if person in targets_split and self.target_available(person):
-                        targets_list.append(attribute[NOTIFIER])
+        if everyone or "home" in targets:
+            targets_list.append(HOUSE[NOTIFIER])
+        for person in self.registry.persons:
+            notifier = self.registry.notifier_of(person)
+            if notifier is None or not (everyone or person in targets):
+                continue
+            if (
+                level == self.NotificationLevel.emergency.value
+                or self.target_available(person)
+            ):
+                targets_list.append(notifier)
 
         return targets_list
 
@@ -0,0 +1,356 @@
+"""Define an engine switching the lights of all rooms on motion."""
+
+import datetime
+from typing import Union
+
+import voluptuous as vol
+
+import voluptuous_helper as vol_help
+from transitions import TransitionModel
+from appbase import AppBase, APP_SCHEMA
+from constants import (
+    CONF_BRIGHTNESS_LEVEL,
+    CONF_DELAY,
+    CONF_LIGHT_COLOR,
+    CONF_LIGHTS,
+    CONF_PROPERTIES,
+    OFF,
+    ON,
+)
+from motion_light import (
+    BRIGHTNESS_LEVEL_SCHEMA,
+    CONF_DAY_STATE_TIME,
+    CONF_LUX_SENSOR,
+    CONF_LUX_THRESHOLD,
+    CONF_NO_ACTION_ENTITIES,
+    DAY_STATE_TIME_SCHEMA,
+    DAY_STATES,
+    LIGHT_COLOR_SCHEMA,
+    LIGHTS_SCHEMA,
+    ON_STATES,
+    DayStates,
+    build_segments,
+    day_state_at,
+    next_boundary,
+)
+from hot_reload import HotReloadMixin
+from tracing import TracingMixin
+
+
+##############################################################################
+# App to turn on the light of a room when motion is detected there, then turn
+# it off after a delay, for all rooms of the house
+#
+# Works like the MotionLightAutomation of motion_light.py for all rooms in one
+# app. The lights of the room likely entered next are turned on in advance,
+# see transitions.py.
+#
+# args:
+#
+# properties: defaults of all rooms, see motion_light.py
+#   lux_threshold: value above which light will not turn on, default 100 lux
+#   delay: minutes until light turns off when no motion, default 5
+#   day_state_time: morning/day/night, e.g. 05:30:00
+#   brightness_level: brightness level in % for each state of day, default 75%
+#   light_color: light color for each state of day, default white
+#   prewarm_probability: probability of the room being entered next above
+#                        which its lights are turned on in advance, e.g. 0.7,
+#                        default never
+# rooms:
+#   <room>: the room as in the name of its sensors, e.g. schlafzimmer
+#     motion_sensors: motion sensors in the room, comma list
+#     lux_sensor: entity id of lux sensor
+#     no_action_entities: devices which will lead to no action on motion if
+#                         they are on
+#     lights: light entities for each state of day, morning/day/night
+#     enable: input boolean which disables the room when off, defaults to
+#             motion_light_<room>
+#     properties: the properties above which differ for the room
+##############################################################################
+
+CONF_ROOMS = "rooms"
+CONF_MOTION_SENSORS = "motion_sensors"
+CONF_ENABLE = "enable"
+
+# Kinds of deadlines of a room on the timer wheel
+LIGHT_OFF = "light_off"
+DAY_STATE = "day_state"
+
+CONF_PREWARM_PROBABILITY = "prewarm_probability"
+
+# Seconds of transit above which a room isn't pre-warmed, the lights would
+# burn too long in an empty room
+PREWARM_MAX_TRANSIT = 30
+
+# Seconds the lights of a pre-warmed room stay on without motion there
+PREWARM_TIMEOUT = 60
+
+PROPERTIES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_LUX_THRESHOLD): int,
+        vol.Optional(CONF_DELAY): int,
+        vol.Optional(CONF_DAY_STATE_TIME): DAY_STATE_TIME_SCHEMA,
+        vol.Optional(CONF_BRIGHTNESS_LEVEL): BRIGHTNESS_LEVEL_SCHEMA,
+        vol.Optional(CONF_LIGHT_COLOR): LIGHT_COLOR_SCHEMA,
+        vol.Optional(CONF_PREWARM_PROBABILITY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1)
+        ),
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+ROOM_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_MOTION_SENSORS): vol_help.entity_id_list,
+        vol.Optional(CONF_LUX_SENSOR): vol_help.entity_id,
+        vol.Optional(CONF_NO_ACTION_ENTITIES, default=()): vol_help.entity_id_list,
+        vol.Required(CONF_LIGHTS): LIGHTS_SCHEMA,
+        vol.Optional(CONF_ENABLE): str,
+        vol.Optional(CONF_PROPERTIES, default={}): PROPERTIES_SCHEMA,
+    }
+)
+
+
+class Room(vol_help.FrozenConfig):
+    """Define a room with its sensors, lights and properties."""
+
+    __slots__ = (
+        "room",
+        "name",
+        "motion_sensors",
+        "lux_sensor",
+        "lux_threshold",
+        "no_action_entities",
+        "all_lights",
+        "enable_input_boolean",
+        "delay",
+        "day_state_time",
+        "segments",
+        "prewarm_probability",
+    )
+
+
+class OccupancyEngine(TracingMixin, HotReloadMixin, AppBase):
+    """Define an engine for the motion based lights of all rooms."""
+
+    APP_SCHEMA = APP_SCHEMA.extend(
+        {
+            CONF_PROPERTIES: PROPERTIES_SCHEMA,
+            vol.Required(CONF_ROOMS): vol.Schema({str: ROOM_SCHEMA}),
+        }
+    )
+
+    # Changed rooms keep the learned transitions and the deadlines of the lights
+    HOT_RELOAD_KEYS = HotReloadMixin.HOT_RELOAD_KEYS + (CONF_ROOMS,) + tuple(
+        f"{CONF_PROPERTIES}.{key}"
+        for key in (
+            CONF_LUX_THRESHOLD,
+            CONF_DELAY,
+            CONF_DAY_STATE_TIME,
+            CONF_BRIGHTNESS_LEVEL,
+            CONF_LIGHT_COLOR,
+            CONF_PREWARM_PROBABILITY,
+        )
+    )
+
+    # A light turned on before a restart is still turned off at its deadline,
+    # the learned transitions survive it
+    PERSISTED_STATE = ("light_off_deadlines", "transitions")
+
+    def configure(self) -> None:
+        """Configure."""
+        self.rooms = {}
+        self.room_of_sensor = {}
+        self.segments = {}
+        self.motion_listeners = {}
+        self.light_off_deadlines = {}
+        self.transitions = TransitionModel()
+        self.configure_rooms()
+
+    def apply_config(self, config: dict) -> None:
+        """Set the validated configuration of the app and its rooms."""
+        super().apply_config(config)
+        self.room_config = config.get(CONF_ROOMS, {})
+
+    def restore_state(self, parked: Union[dict, None] = None) -> None:
+        """Restore the deadlines of the lights turned on before the restart."""
+        super().restore_state(parked)
+        soon = self.datetime() + datetime.timedelta(seconds=1)
+        for room, deadline in list(self.light_off_deadlines.items()):
+            if room in self.rooms:
+                self.turn_off_at(room, max(deadline, soon))
+            else:
+                self.light_off_deadlines.pop(room)
+
+    def configure_rooms(self) -> None:
+        """Build the rooms and the index of their sensors, listen to the
+           sensors which are new and stop listening to removed ones."""
+        rooms = {
+            room: self.build_room(room, config)
+            for room, config in self.room_config.items()
+        }
+        room_of_sensor = {
+            sensor: room.room
+            for room in rooms.values()
+            for sensor in room.motion_sensors
+        }
+
+        for sensor in set(self.motion_listeners) - set(room_of_sensor):
+            self.cancel_listen_state(self.motion_listeners.pop(sensor))
+        for room in set(self.rooms) - set(rooms):
+            self.timer_wheel.cancel((LIGHT_OFF, room))
+            self.timer_wheel.cancel((DAY_STATE, room))
+            self.light_off_deadlines.pop(room, None)
+            self.segments.pop(room, None)
+
+        self.rooms = rooms
+        self.room_of_sensor = room_of_sensor
+        for room in rooms:
+            self.update_day_state((DAY_STATE, room))
+        for sensor in room_of_sensor:
+            if sensor not in self.motion_listeners:
+                self.motion_listeners[sensor] = self.listen_state(
+                    self.motion, sensor, new=ON, constrain_app_enabled=1
+                )
+
+    def build_room(self, room: str, config: dict) -> Room:
+        """Return a room, the properties of the room override the defaults."""
+        properties = {**self.properties, **config[CONF_PROPERTIES]}
+        if CONF_DAY_STATE_TIME not in properties:
+            raise vol.Invalid(f"Keine {CONF_DAY_STATE_TIME} für {room}")
+        lights = config[CONF_LIGHTS]
+        return Room(
+            room=room,
+            name=self.registry.room_name_of(config[CONF_MOTION_SENSORS][0]),
+            motion_sensors=config[CONF_MOTION_SENSORS],
+            lux_sensor=config.get(CONF_LUX_SENSOR),
+            lux_threshold=float(properties.get(CONF_LUX_THRESHOLD, 100)),
+            no_action_entities=config[CONF_NO_ACTION_ENTITIES],
+            all_lights=tuple(
+                sorted({light for lights in lights.values() for light in lights})
+            ),
+            enable_input_boolean="input_boolean."
+            + config.get(CONF_ENABLE, f"motion_light_{room}"),
+            delay=properties.get(CONF_DELAY, 5) * 60,
+            day_state_time=properties[CONF_DAY_STATE_TIME],
+            segments=build_segments(
+                lights,
+                properties.get(CONF_BRIGHTNESS_LEVEL, DayStates()),
+                properties.get(CONF_LIGHT_COLOR, DayStates()),
+            ),
+            prewarm_probability=properties.get(CONF_PREWARM_PROBABILITY),
+        )
+
+    def update_day_state(self, key: tuple) -> None:
+        """Set the segment of the current state of the day of a room and flip
+           it at the next boundary of its timeline."""
+        room = self.rooms.get(key[1])
+        if room is None:
+            return
+        times = DayStates(
+            **{
+                day_state: self.parse_time(room.day_state_time[day_state])
+                for day_state in DAY_STATES
+            }
+        )
+        now = self.datetime()
+        self.segments[room.room] = room.segments[day_state_at(now.time(), times)]
+        self.timer_wheel.set(key, next_boundary(now, times), self.update_day_state)
+
+    def motion(
+        self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
+    ) -> None:
+        """Take action on motion in the room of the sensor."""
+        room = self.rooms.get(self.room_of_sensor.get(entity))
+        if room is None:
+            return
+        now = self.datetime()
+        self.transitions.observe(room.room, now)
+        if self.get_state(room.enable_input_boolean) == OFF:
+            return
+        self.log("Bewegung im %s erkannt.", room.name)
+        self.prewarm(room, now)
+        if not self.no_action_entities_on(room):
+            if self.lights_on(room):
+                self.log("Licht ist bereits an, Timer neustarten.")
+                self.turn_off_delayed(room)
+            elif self.lux_high(room):
+                self.log("Lichtstärke ist genug hoch, keine Aktion.")
+            else:
+                self.turn_light_on(room)
+                self.turn_off_delayed(room)
+
+    def prewarm(self, origin: Room, now: datetime.datetime) -> None:
+        """Turn the lights of the room likely entered next on in advance, they
+           go off after PREWARM_TIMEOUT unless motion follows there."""
+        prediction = self.transitions.predict(origin.room, now)
+        if prediction is None:
+            return
+        target, probability, transit = prediction
+        room = self.rooms.get(target)
+        if (
+            room is None
+            or room.prewarm_probability is None
+            or probability < room.prewarm_probability
+            or transit > PREWARM_MAX_TRANSIT
+            or self.get_state(room.enable_input_boolean) == OFF
+            or self.no_action_entities_on(room)
+            or self.lights_on(room)
+            or self.lux_high(room)
+        ):
+            return
+        self.turn_light_on(room, prewarm=True)
+        self.turn_off_at(room.room, now + datetime.timedelta(seconds=PREWARM_TIMEOUT))
+
+    def turn_light_on(self, room: Room, prewarm: bool = False) -> None:
+        """Turn the lights of the room on based on state of day."""
+        segment = self.segments[room.room]
+        self.queue_turn_on(
+            segment.lights, brightness=segment.brightness, color_name=segment.color
+        )
+        if prewarm:
+            self.log("Das Licht im %s wurde im Voraus eingeschaltet.", room.name)
+        else:
+            self.log("Das Licht im %s wurde durch Bewegung eingeschaltet.", room.name)
+
+    def turn_light_off(self, key: tuple) -> None:
+        """Turn the lights of a room off if none of the no action entities is
+           on."""
+        self.light_off_deadlines.pop(key[1], None)
+        room = self.rooms.get(key[1])
+        if room is not None and not self.no_action_entities_on(room):
+            self.queue_turn_off(self.lights_on(room))
+            self.log("Das Licht im %s wurde durch den Timer ausgeschaltet.", room.name)
+
+    def turn_off_delayed(self, room: Room) -> None:
+        """Move the deadline to turn the lights of the room off to the delay
+           from now."""
+        self.turn_off_at(
+            room.room, self.datetime() + datetime.timedelta(seconds=room.delay)
+        )
+        self.log(
+            "Ein Timer von %d Minuten wurde im %s eingeschaltet.",
+            round(room.delay / 60),
+            room.name,
+        )
+
+    def turn_off_at(self, room: str, deadline: datetime.datetime) -> None:
+        """Turn the lights of the room off at the deadline."""
+        self.light_off_deadlines[room] = deadline
+        self.timer_wheel.set((LIGHT_OFF, room), deadline, self.turn_light_off)
+
+    def no_action_entities_on(self, room: Room) -> bool:
+        """Return true if one of the no action entities of the room is on."""
+        return any(
+            self.get_state(entity) in ON_STATES for entity in room.no_action_entities
+        )
+
+    def lights_on(self, room: Room) -> list:
+        """Return the lights of the room that are on."""
+        return [entity for entity in room.all_lights if self.get_state(entity) == ON]
+
+    def lux_high(self, room: Room) -> bool:
+        """Return true if lux in the room is above its threshold."""
+        if room.lux_sensor is not None:
+            return float(self.get_state(room.lux_sensor)) > room.lux_threshold
+        return False
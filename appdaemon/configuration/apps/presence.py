@@ -147,7 +147,7 @@ class PresenceAutomation(AppBase):
                 namespace="mqtt",
             )
         self.log(
-            f"{kwargs[PERSON]} war {old_state}, " f"ist jetzt {kwargs[TARGET_STATE]}"
+            "%s war %s, ist jetzt %s", kwargs[PERSON], old_state, kwargs[TARGET_STATE]
         )
 
     def set_presence_house(
@@ -168,7 +168,7 @@ class PresenceAutomation(AppBase):
         old_state = self.house_presence_state
         if not old_state == new_state:
             self.select_option(HOUSE[PRESENCE_STATE], new_state)
-            self.log("Vorher: {}, Jetzt: {}".format(old_state, new_state))
+            self.log("Vorher: %s, Jetzt: %s", old_state, new_state)
 
     def who_in_state(self, *presence_states: Enum) -> list:
         """Return list of person in given state."""
@@ -1,12 +1,11 @@
 """Define automations for reminders."""
-from datetime import datetime
-
 import voluptuous as vol
 
 import voluptuous_helper as vol_help
 from appbase import AppBase, APP_SCHEMA
 from constants import CONF_INTERVAL, CONF_NOTIFICATIONS, CONF_PROPERTIES, CONF_TARGETS
 from house_config import PERSONS
+from state_store import PersistenceMixin
 
 
 DONE = "done"
@@ -25,9 +24,12 @@ MONTHS = "months"
 REPEAT_TYPES = (DAYS, WEEKS, MONTHS)
 
 
-class ReminderAutomation(AppBase):
+class ReminderAutomation(PersistenceMixin, AppBase):
     """Define a feature for recurring or one time reminders."""
 
+    # The repeating reminder can still be cancelled after a restart
+    PERSISTED_STATE = ("handles",)
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_PROPERTIES: vol.Schema(
@@ -58,15 +60,13 @@ class ReminderAutomation(AppBase):
     def configure(self) -> None:
         """Configure."""
         self.reminder_time = self.properties[CONF_REMINDER_TIME]
-        self.reminder_date = datetime.strptime(
-            self.properties[CONF_REMINDER_DATE], "%d.%m.%Y"
-        )
+        self.reminder_date = self.properties[CONF_REMINDER_DATE]
         self.repeat_type = self.properties[CONF_REPEAT][CONF_REPEAT_TYPE]
         self.repeat_freq = self.properties[CONF_REPEAT][CONF_REPEAT_FREQ]
 
         self.run_daily(
             self.check_reminder_date,
-            self.parse_time(self.properties[CONF_REMINDER_TIME]),
+            self.reminder_time,
             constrain_app_enabled=1,
         )
 
@@ -79,7 +79,7 @@ class ReminderAutomation(AppBase):
 
     def check_reminder_date(self, kwargs: dict) -> None:
         """Check if today is a reminder day, if yes send reminder."""
-        days_to_reminder_date = (datetime.today() - self.reminder_date).days
+        days_to_reminder_date = (self.date() - self.reminder_date).days
         divisor = None
         if self.repeat_type == DAYS:
             divisor = self.repeat_freq
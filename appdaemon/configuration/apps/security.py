@@ -125,9 +125,7 @@ class SecurityAutomation(AppBase):
         """Take action when motion sensor is triggered based on alarm state."""
         if self.alarm_state == self.AlarmType.armed_motion:
             self.alarm_state = self.AlarmType.alert
-            self.log(
-                f"Bewegung im " f"{entity.split('.')[1].split('_')[1].capitalize()}!!!"
-            )
+            self.log("Bewegung im %s!!!", self.registry.room_name_of(entity))
 
     def door_opened(
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
@@ -141,7 +139,7 @@ class SecurityAutomation(AppBase):
             self.log(
                 f"{entity.split('.')[1].split('_')[0].capitalize()}"
                 f" im/in der "
-                f"{entity.split('.')[1].split('_')[1].capitalize()}"
+                f"{self.registry.room_name_of(entity)}"
                 f" wurde geöffnet!!!"
             )
 
@@ -331,5 +329,4 @@ class LastMotion(AppBase):
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
     ) -> None:
         """Select the room input select based on the triggered entity."""
-        room_name = entity.split(".")[1].split("_", 1)[-1].capitalize()
-        self.select_option(HOUSE["last_motion"], room_name)
+        self.select_option(HOUSE["last_motion"], self.registry.room_name_of(entity))
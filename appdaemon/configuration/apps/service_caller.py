@@ -0,0 +1,135 @@
+"""Define a caller running service calls on a pool of threads.
+
+A call failing with a transient error is tried again up to RETRIES times.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Union
+
+# Threads running the service calls of all apps
+WORKERS = 4
+
+# Attempts after the first one and seconds to wait before the first of them,
+# doubled for each further attempt
+RETRIES = 2
+RETRY_DELAY = 0.5
+
+
+def is_transient(err: Exception) -> bool:
+    """Return true if the call may succeed when tried again."""
+    if not isinstance(err, OSError):
+        return False
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    return status is None or status >= 500
+
+
+class ServiceCaller:
+    """Define a pool of threads calling services with retries."""
+
+    def __init__(self, workers: int = WORKERS) -> None:
+        """Initialize."""
+        self.workers = workers
+        self.background = True
+        self.submitted = 0
+        self.retried = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(
+        self,
+        call_service: Callable,
+        service: str,
+        data: dict,
+        timeout: Union[float, None] = None,
+        retries: int = RETRIES,
+        on_done: Union[Callable, None] = None,
+        on_error: Union[Callable, None] = None,
+    ) -> Future:
+        """Queue a service call, return the future of its result.
+
+        on_done is called with the future once the call succeeded or finally
+        failed, failures are reported to on_error as well.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self.submitted += 1
+            if self.background and self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="service_caller"
+                )
+
+        if self.background:
+            future = self._executor.submit(
+                self._call, call_service, service, data, deadline, retries
+            )
+        else:
+            future = Future()
+            try:
+                future.set_result(
+                    self._call(call_service, service, data, deadline, retries)
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                future.set_exception(err)
+        future.add_done_callback(
+            lambda done: self._done(done, service, data, on_done, on_error)
+        )
+        return future
+
+    def _call(
+        self,
+        call_service: Callable,
+        service: str,
+        data: dict,
+        deadline: Union[float, None],
+        retries: int,
+    ) -> object:
+        """Call the service, again after a transient error until the retries
+           are used up or the deadline passed."""
+        attempt = 0
+        while True:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Zeitüberschreitung nach {attempt} Versuchen")
+            try:
+                return call_service(service, **data)
+            except Exception as err:  # pylint: disable=broad-except
+                if attempt >= retries or not is_transient(err):
+                    raise
+            delay = RETRY_DELAY * 2 ** attempt
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
+
+    def _done(
+        self,
+        future: Future,
+        service: str,
+        data: dict,
+        on_done: Union[Callable, None],
+        on_error: Union[Callable, None],
+    ) -> None:
+        """Report a failed call and run the completion callback."""
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.failed += 1
+            if on_error is not None:
+                on_error(
+                    f"Service {service} für {data.get('entity_id')} "
+                    f"fehlgeschlagen: {error!r}"
+                )
+        if on_done is not None:
+            try:
+                on_done(future)
+            except Exception as err:  # pylint: disable=broad-except
+                if on_error is not None:
+                    on_error(f"Fehler nach Service {service}: {err!r}")
+
+
+# The caller of all apps
+CALLER = ServiceCaller()
@@ -0,0 +1,121 @@
+"""Define a dispatcher which coalesces service calls made within a short window."""
+
+import json
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Callable, Iterable, Union
+
+import instrumentation
+import tracing
+
+DISPATCH_WINDOW = 0.005
+
+
+class ServiceCallDispatcher:
+    """Define a dispatcher to merge service calls for multiple entities.
+
+    Calls to the same service with identical parameters which are submitted
+    within the dispatch window are merged into one single service call with a
+    list of entity ids. A call for an entity with another call pending flushes
+    the pending calls first, so the calls of an entity keep their order. Each
+    merged call is counted once, for the callback which queued it first.
+    """
+
+    def __init__(
+        self,
+        call_service: Callable,
+        error: Callable,
+        window: float = DISPATCH_WINDOW,
+    ) -> None:
+        """Initialize."""
+        self._call_service = call_service
+        self._error = error
+        self._window = window
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._timer = None
+
+        self.submitted = 0
+        self.dispatched = 0
+
+    def submit(
+        self, service: str, entity_id: Union[str, Iterable[str]], **data: dict
+    ) -> None:
+        """Queue a service call for the given entities."""
+        entity_ids = [entity_id] if isinstance(entity_id, str) else list(entity_id)
+        key = (service, json.dumps(data, sort_keys=True, default=str))
+        trace = tracing.queued(entity_ids)
+        stats = instrumentation.running_callback()[0]
+
+        while True:
+            with self._lock:
+                if not self._conflicts(key, entity_ids):
+                    self._add(key, service, data, entity_ids, trace, stats)
+                    return
+            self.flush()
+
+    def _conflicts(self, key: tuple, entity_ids: list) -> bool:
+        """Return true if one of the entities is pending in another call,
+           called with the lock."""
+        return any(
+            entity in pending[2]
+            for pending_key, pending in self._pending.items()
+            if pending_key != key
+            for entity in entity_ids
+        )
+
+    def _add(
+        self,
+        key: tuple,
+        service: str,
+        data: dict,
+        entity_ids: list,
+        trace: Union[tracing.Trace, None],
+        stats: Union[instrumentation.CallbackStats, None],
+    ) -> None:
+        """Merge the call into the pending calls, called with the lock."""
+        if key not in self._pending:
+            self._pending[key] = (service, data, [], [], stats)
+        pending_entities, traces = self._pending[key][2:4]
+        for entity in entity_ids:
+            if entity not in pending_entities:
+                pending_entities.append(entity)
+        if trace is not None and trace not in traces:
+            traces.append(trace)
+        self.submitted += len(entity_ids)
+
+        if self._timer is None:
+            self._timer = threading.Timer(self._window, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Send all queued service calls."""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        for service, data, entity_ids, traces, stats in pending.values():
+            entity_id = entity_ids[0] if len(entity_ids) == 1 else entity_ids
+            for trace in traces:
+                trace.mark("sent")
+            try:
+                self._call_service(service, entity_id=entity_id, **data)
+            except Exception as err:  # pylint: disable=broad-except
+                self._error(f"Service {service} für {entity_id} fehlgeschlagen: {err}")
+            for trace in traces:
+                trace.mark("returned")
+            if stats is not None:
+                stats.service_called()
+            self.dispatched += 1
+
+    def _flush_in_background(self) -> None:
+        """Send the queued service calls at the end of the window, errors are
+           reported since nobody waits for the timer thread."""
+        try:
+            self.flush()
+        except Exception:  # pylint: disable=broad-except
+            self._error(f"Fehler beim Senden der Services: {traceback.format_exc()}")
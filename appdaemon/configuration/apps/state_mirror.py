@@ -0,0 +1,295 @@
+"""Define an in-process mirror of the Home Assistant state."""
+
+import datetime
+import threading
+import time
+from copy import deepcopy
+from typing import Any, Callable, Iterable, Union
+
+from appdaemon.plugins.hass.hassapi import Hass
+
+import app_graph
+import tracing
+from house_config import HOUSE, MODES, PERSONS
+
+
+##############################################################################
+# App to keep a local copy of every entity the apps are interested in
+#
+# Mirrors the entities of the app configurations, HOUSE, MODES, PERSONS and
+# the enable input booleans, other entities are added on their first read.
+# Publishes its statistics and the latency from motion to light.
+#
+# args:
+# properties:
+#   report_interval: minutes between updates of the statistics sensor,
+#                    default 5
+#   sensor: entity id of the statistics sensor,
+#           default sensor.appdaemon_state_mirror
+#   latency_sensor: entity id of the sensor with the latency from motion to
+#                   light, default sensor.appdaemon_motion_latency
+##############################################################################
+
+
+CONF_REPORT_INTERVAL = "report_interval"
+CONF_SENSOR = "sensor"
+CONF_LATENCY_SENSOR = "latency_sensor"
+
+ATTRIBUTES = "attributes"
+STATE = "state"
+ALL = "all"
+
+NAMESPACE = "hass"
+EXCLUDED_DOMAINS = ("notify",)
+
+# Seconds a written state is expected before the mirrored state counts again
+WRITE_TIMEOUT = 5
+
+# Seconds an entity unknown to Home Assistant is served as unknown without
+# looking it up again, unless an app writes its state
+UNKNOWN_TTL = 60
+
+# Observers of all instances of the mirror, they keep observing a reloaded one
+OBSERVERS = []
+
+
+def entity_ids_in(value: Any) -> Iterable[str]:
+    """Return all entity ids found in a (nested) configuration value."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from entity_ids_in(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            yield from entity_ids_in(item)
+    elif isinstance(value, str):
+        for item in value.split(","):
+            item = item.strip().lower()
+            if is_entity_id(item):
+                yield item
+
+
+def is_entity_id(value: str) -> bool:
+    """Return true if the given string looks like a mirrorable entity id."""
+    if value.count(".") != 1 or " " in value or "/" in value:
+        return False
+    domain, object_id = value.split(".")
+    return bool(domain and object_id) and domain not in EXCLUDED_DOMAINS
+
+
+class StateMirror(Hass):
+    """Define an app which mirrors the state of entities in memory."""
+
+    def initialize(self) -> None:
+        """Initialize."""
+        self.set_namespace(NAMESPACE)
+        self.properties = self.args.get("properties", {})
+
+        self._lock = threading.Lock()
+        self._states = {}
+        self._versions = {}
+        self._handles = {}
+        self._observers = OBSERVERS
+        self._expected = {}
+        self._unknown = {}
+        self.version = 0
+        self.local_reads = 0
+        self.remote_reads = 0
+        self.redundant_writes = 0
+
+        # Load all referenced entities with one single read
+        snapshot = super().get_state(attribute=ALL) or {}
+        self.remote_reads += 1
+        for entity_id in self.referenced_entities():
+            if entity_id in snapshot:
+                self.track(entity_id, snapshot[entity_id])
+
+        self.run_every(
+            self.report,
+            self.datetime() + datetime.timedelta(seconds=10),
+            self.properties.get(CONF_REPORT_INTERVAL, 5) * 60,
+        )
+
+        app_graph.notify_ready(self.name)
+
+    def terminate(self) -> None:
+        """Terminate, the apps look up the new mirror after a reload."""
+        app_graph.stopped(self.name)
+
+    def referenced_entities(self) -> set:
+        """Return the entities referenced in the app and house configuration."""
+        entities = set()
+        for config in (HOUSE, MODES, *PERSONS.values()):
+            entities.update(entity_ids_in(config))
+
+        for name, config in self.app_config.items():
+            if not isinstance(config, dict) or "module" not in config:
+                continue
+            entities.update(entity_ids_in(config.get("entities", {})))
+            entities.update(entity_ids_in(config.get("rooms", {})))
+            enable = config.get("properties", {}).get("enable", name)
+            entities.add(f"input_boolean.{enable}")
+
+        return entities
+
+    def track(self, entity_id: str, state: Union[dict, None] = None) -> bool:
+        """Add the given entity to the mirror, return true if it is mirrored."""
+        if not is_entity_id(entity_id):
+            return False
+        if self.is_unknown(entity_id):
+            return False
+
+        with self._lock:
+            if entity_id in self._handles:
+                return self.is_tracked(entity_id)
+            self._handles[entity_id] = None
+
+        if state is None:
+            state = super().get_state(entity_id, attribute=ALL)
+            self.remote_reads += 1
+            if state is None:
+                # Unknown entity, don't subscribe to avoid warnings in the log
+                # and don't look it up again for a while
+                self._handles.pop(entity_id)
+                self._unknown[entity_id] = time.monotonic() + UNKNOWN_TTL
+                return False
+            self._unknown.pop(entity_id, None)
+
+        self._handles[entity_id] = self.listen_state(
+            self.state_changed, entity_id, attribute=ALL
+        )
+
+        with self._lock:
+            self._versions[entity_id] = 0
+            self._states[entity_id] = state
+
+        return True
+
+    def is_tracked(self, entity_id: str) -> bool:
+        """Return true if the given entity is mirrored."""
+        return entity_id in self._states
+
+    def is_unknown(self, entity_id: str) -> bool:
+        """Return true if the entity was unknown to Home Assistant lately."""
+        return self._unknown.get(entity_id, 0) > time.monotonic()
+
+    def forget_unknown(self, entity_id: str) -> None:
+        """Look the entity up again on the next read, e.g. after a write."""
+        self._unknown.pop(entity_id, None)
+
+    def state_changed(
+        self,
+        entity: Union[str, dict],
+        attribute: str,
+        old: Union[dict, None],
+        new: Union[dict, None],
+        kwargs: dict,
+    ) -> None:
+        """Update the mirrored state of an entity and notify the observers."""
+        with self._lock:
+            self._states[entity] = new
+            self._versions[entity] += 1
+            self.version += 1
+            expected = self._expected.get(entity)
+            if expected is not None and (new or {}).get(STATE) == expected[0]:
+                del self._expected[entity]
+
+        tracing.received(entity, old, new)
+        for observer in self._observers:
+            observer(entity, old, new)
+
+    def add_observer(self, observer: Callable) -> None:
+        """Call the observer with entity, old and new state on each change."""
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable) -> None:
+        """Stop calling the given observer."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def read(self, entity_id: str, attribute: Union[str, None] = None) -> Any:
+        """Return the mirrored state or attribute of an entity."""
+        state = self._states[entity_id]
+        self.local_reads += 1
+        tracing.state_read()
+        if state is None:
+            return None
+        if attribute is None:
+            return state.get(STATE)
+        if attribute == ALL:
+            return deepcopy(state)
+        if attribute in state:
+            return state[attribute]
+        return state.get(ATTRIBUTES, {}).get(attribute)
+
+    def expect(
+        self, entity_id: str, state: Any, attributes: Union[dict, None] = None
+    ) -> bool:
+        """Return false if the entity has or is about to get the state and the
+           attributes, otherwise expect them until the change arrives."""
+        state = str(state)
+        attributes = attributes or {}
+        now = time.monotonic()
+        with self._lock:
+            expected = self._expected.get(entity_id)
+            if expected is not None and expected[2] > now:
+                known_state, known_attributes = expected[0], expected[1]
+            else:
+                current = self._states.get(entity_id) or {}
+                known_state = current.get(STATE)
+                known_attributes = current.get(ATTRIBUTES, {})
+
+            if known_state == state and all(
+                known_attributes.get(key) == value
+                for key, value in attributes.items()
+            ):
+                self.redundant_writes += 1
+                return False
+            self._expected[entity_id] = (
+                state,
+                {**known_attributes, **attributes},
+                now + WRITE_TIMEOUT,
+            )
+        return True
+
+    def entity_version(self, entity_id: str) -> int:
+        """Return the version counter of the given entity."""
+        return self._versions.get(entity_id, 0)
+
+    def report(self, kwargs: dict) -> None:
+        """Publish the read statistics of the mirror and the latency from
+           motion to light."""
+        total = self.local_reads + self.remote_reads
+        self.set_state(
+            self.properties.get(CONF_SENSOR, "sensor.appdaemon_state_mirror"),
+            state=self.local_reads,
+            attributes={
+                "friendly_name": "State Mirror vermiedene Abfragen",
+                "remote_reads": self.remote_reads,
+                "tracked_entities": len(self._states),
+                "version": self.version,
+                "redundant_writes": self.redundant_writes,
+                "hit_rate": round(self.local_reads / total * 100, 1) if total else 0,
+            },
+        )
+
+        latency = tracing.TRACER.report()
+        stages = latency["stages"]
+        self.set_state(
+            self.properties.get(
+                CONF_LATENCY_SENSOR, "sensor.appdaemon_motion_latency"
+            ),
+            state=round(stages["total"][1]),
+            attributes={
+                "friendly_name": "Latenz Bewegung bis Licht",
+                "unit_of_measurement": "ms",
+                "traces": latency["traces"],
+                "unconfirmed": latency["unconfirmed"],
+                "state_reads": round(latency["reads"], 1),
+                **{
+                    f"{stage}_{percentile}": round(value, 1)
+                    for stage, (_, p50, p95) in stages.items()
+                    for percentile, value in (("p50", p50), ("p95", p95))
+                },
+                "slowest": latency["slowest"],
+            },
+        )
@@ -0,0 +1,341 @@
+"""Define a local store for the runtime state of the apps.
+
+The store is a JSON file, values JSON doesn't know are tagged, e.g. datetimes,
+sets and objects of classes registered with @storable.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Union
+
+CONF_STATE_FILE = "state_file"
+
+DEFAULT_PATH = "/conf/app_state.json"
+
+# Seconds between two checkpoints of an app, besides the one on terminate
+CHECKPOINT_INTERVAL = 15 * 60
+
+# State saved longer ago than this is outdated and not restored
+MAX_STATE_AGE = datetime.timedelta(hours=12)
+
+TYPE = "__type__"
+VALUE = "value"
+
+_STORABLE = {}
+
+
+def storable(cls: type) -> type:
+    """Register a class whose objects can be saved in the store.
+
+    The class implements to_store() returning a JSON value and the class
+    method from_store(value, owner) creating the object for the given app.
+    """
+    _STORABLE[cls.__qualname__] = cls
+    return cls
+
+
+def encode(value: Any) -> Any:
+    """Return the value as JSON value, raise TypeError if it is not storable."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(key): encode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {TYPE: "tuple", VALUE: [encode(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {TYPE: "set", VALUE: [encode(item) for item in value]}
+    if isinstance(value, datetime.datetime):
+        return {TYPE: "datetime", VALUE: value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {TYPE: "date", VALUE: value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {TYPE: "time", VALUE: value.isoformat()}
+    if type(value).__qualname__ in _STORABLE:
+        return {TYPE: type(value).__qualname__, VALUE: encode(value.to_store())}
+    raise TypeError(f"{type(value).__name__} kann nicht gespeichert werden")
+
+
+def decode(value: Any, owner: Any = None) -> Any:
+    """Return the value encoded by encode(), objects are created for the owner."""
+    if isinstance(value, list):
+        return [decode(item, owner) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if TYPE not in value:
+        return {key: decode(item, owner) for key, item in value.items()}
+
+    kind, item = value[TYPE], value[VALUE]
+    if kind == "tuple":
+        return tuple(decode(element, owner) for element in item)
+    if kind == "set":
+        return {decode(element, owner) for element in item}
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(item)
+    if kind == "date":
+        return datetime.date.fromisoformat(item)
+    if kind == "time":
+        return datetime.time.fromisoformat(item)
+    return _STORABLE[kind].from_store(decode(item, owner), owner)
+
+
+class StateStore:
+    """Define the saved state of all apps, kept in memory if there is no path."""
+
+    def __init__(self, path: Union[str, None] = DEFAULT_PATH) -> None:
+        """Initialize."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._apps = None
+        self._dirty = False
+
+    def _load(self) -> dict:
+        """Return the saved state of the apps, read from the file once."""
+        if self._apps is None:
+            self._apps = {}
+            if self.path is not None and os.path.exists(self.path):
+                try:
+                    with open(self.path) as state_file:
+                        self._apps = json.load(state_file)
+                except (OSError, ValueError):
+                    self._apps = {}
+        return self._apps
+
+    def get(self, name: str, owner: Any = None) -> Union[dict, None]:
+        """Return the saved state of an app, None if there is none."""
+        with self._lock:
+            state = self._load().get(name)
+        return None if state is None else decode(state, owner)
+
+    def put(self, name: str, state: dict) -> None:
+        """Replace the saved state of an app, raise TypeError if a value is not
+           storable."""
+        encoded = encode(state)
+        with self._lock:
+            apps = self._load()
+            if apps.get(name) != encoded:
+                apps[name] = encoded
+                self._dirty = True
+
+    def save(self) -> bool:
+        """Write the state of all apps if it changed, return false on failure."""
+        if self.path is None:
+            return True
+        with self._lock:
+            if not self._dirty:
+                return True
+            content = json.dumps(self._apps, ensure_ascii=False, sort_keys=True)
+            self._dirty = False
+        try:
+            with self._write_lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                temporary = f"{self.path}.tmp"
+                with open(temporary, "w") as state_file:
+                    state_file.write(content)
+                os.replace(temporary, self.path)
+        except OSError:
+            self._dirty = True
+            return False
+        return True
+
+
+# The stores of the apps by the path of their file
+STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: str = DEFAULT_PATH) -> StateStore:
+    """Return the store saving to the file at the path, one for each path."""
+    with _STORES_LOCK:
+        if path not in STORES:
+            STORES[path] = StateStore(path)
+        return STORES[path]
+
+
+class PersistenceMixin:
+    """Define a mixin saving the attributes in PERSISTED_STATE and the pending
+       timers of the callbacks in PERSISTED_TIMERS to survive restarts."""
+
+    PERSISTED_STATE = ()
+    PERSISTED_TIMERS = ()
+
+    def initialize(self) -> None:
+        """Initialize."""
+        self.persisted_timers = {}
+        self.handle_aliases = {}
+        super().initialize()
+
+    def apply_config(self, config: dict) -> None:
+        """Set the validated configuration and the store of the app."""
+        super().apply_config(config)
+        self.state_store = get_store(
+            self.properties.get(CONF_STATE_FILE, DEFAULT_PATH)
+        )
+
+    def after_configure(self) -> None:
+        """Restore the saved state and save it regularly."""
+        super().after_configure()
+        started = time.perf_counter()
+        self.restore_state()
+        self.run_every(
+            self.checkpoint,
+            self.datetime() + datetime.timedelta(seconds=CHECKPOINT_INTERVAL),
+            CHECKPOINT_INTERVAL,
+        )
+        self.record_startup("restore", started)
+
+    def schedule_once(
+        self,
+        callback: Callable,
+        deadline: datetime.datetime,
+        kwargs: dict,
+        seconds: Union[float, None] = None,
+    ) -> str:
+        """Run a callback once at the deadline, remember the timer."""
+        remembered = dict(kwargs)
+        handle = super().schedule_once(callback, deadline, kwargs, seconds)
+        return self.remember_timer(handle, callback, deadline, None, remembered)
+
+    def run_every(
+        self, callback: Callable, start: datetime.datetime, interval: int, **kwargs
+    ) -> str:
+        """Run a callback in intervals, remember the timer."""
+        handle = super().run_every(callback, start, interval, **kwargs)
+        return self.remember_timer(handle, callback, start, interval, kwargs)
+
+    def cancel_timer(self, handle: str) -> None:
+        """Cancel a timer, also by the handle it had before a restart."""
+        handle = self.handle_aliases.pop(handle, handle)
+        self.persisted_timers.pop(handle, None)
+        super().cancel_timer(handle)
+
+    def remember_timer(
+        self,
+        handle: str,
+        callback: Callable,
+        deadline: datetime.datetime,
+        interval: Union[int, None],
+        kwargs: dict,
+    ) -> str:
+        """Remember a timer of a callback in PERSISTED_TIMERS."""
+        name = getattr(callback, "__name__", None)
+        if name in self.PERSISTED_TIMERS:
+            self.persisted_timers[handle] = (name, deadline, interval, kwargs)
+        return handle
+
+    def checkpoint(self, kwargs: Union[dict, None] = None) -> dict:
+        """Save the persisted attributes and timers, return them."""
+        now = self.datetime()
+        timers = []
+        for handle, timer in list(self.persisted_timers.items()):
+            name, deadline, interval, timer_kwargs = timer
+            if interval:
+                if deadline < now:
+                    runs = -(-(now - deadline).total_seconds() // interval)
+                    deadline += datetime.timedelta(seconds=runs * interval)
+            elif deadline < now:
+                self.persisted_timers.pop(handle, None)
+                continue
+            timers.append(
+                {
+                    "handle": handle,
+                    "callback": name,
+                    "deadline": deadline,
+                    "interval": interval,
+                    "kwargs": timer_kwargs,
+                }
+            )
+
+        for name, deadline_timer in self.deadline_timers.items():
+            deadline = deadline_timer.deadline
+            if name in self.PERSISTED_TIMERS and deadline is not None:
+                timers.append(
+                    {
+                        "handle": None,
+                        "callback": name,
+                        "deadline": deadline,
+                        "interval": None,
+                        "kwargs": {},
+                        "deadline_timer": True,
+                    }
+                )
+
+        state = {
+            attribute: getattr(self, attribute)
+            for attribute in self.PERSISTED_STATE
+            if hasattr(self, attribute)
+        }
+        try:
+            saved = encode({"saved": now, "state": state, "timers": timers})
+        except TypeError as err:
+            self.log("Zustand nicht gespeichert: %s", err, level="WARNING")
+            return {}
+        self.state_store.put(self.name, saved)
+        if not self.state_store.save():
+            self.log("Zustand konnte nicht geschrieben werden", level="WARNING")
+        return saved
+
+    def restore_state(self, parked: Union[dict, None] = None) -> None:
+        """Restore the saved or parked attributes and re-arm the timers with
+           their remaining time, timers due during the restart run right away."""
+        if parked is None:
+            stored = self.state_store.get(self.name, self)
+        else:
+            stored = decode(parked, self) if parked else None
+        now = self.datetime()
+        if stored is None or now - stored["saved"] > MAX_STATE_AGE:
+            return
+
+        for attribute, value in stored["state"].items():
+            if attribute not in self.PERSISTED_STATE:
+                continue
+            current = getattr(self, attribute, None)
+            if isinstance(current, dict) and isinstance(value, dict):
+                current.update(value)
+            else:
+                setattr(self, attribute, value)
+
+        soon = now + datetime.timedelta(seconds=1)
+        aliases = {}
+        for timer in stored["timers"]:
+            deadline = max(timer["deadline"], soon)
+            if timer.get("deadline_timer"):
+                if timer["callback"] in self.deadline_timers:
+                    self.deadline_timers[timer["callback"]].run_at(deadline)
+                continue
+            callback = getattr(self, timer["callback"], None)
+            if callback is None:
+                continue
+            if timer["interval"]:
+                handle = self.run_every(
+                    callback, deadline, timer["interval"], **timer["kwargs"]
+                )
+            else:
+                handle = self.run_at(callback, deadline, **timer["kwargs"])
+            aliases[timer["handle"]] = handle
+
+        # The app keeps using the handles it had before the restart
+        self.handle_aliases.update(aliases)
+        for key, value in list(self.handles.items()):
+            if isinstance(value, str) and value in aliases:
+                self.handles[key] = aliases[value]
+        self.log(
+            "Zustand vom %s wiederhergestellt, %d Timer",
+            stored["saved"],
+            len(stored["timers"]),
+            level="DEBUG",
+        )
+
+    def terminate(self) -> None:
+        """Terminate, the state of a started app is saved."""
+        super().terminate()
+        if self.startup_complete:
+            self.saved_on_terminate(self.checkpoint())
+
+    def saved_on_terminate(self, saved: dict) -> None:
+        """Hand on the state saved on terminate, see HotReloadMixin."""
@@ -62,21 +62,21 @@ class SwitchBase(AppBase):
         """Take action."""
         if action_type == "toggle":
             if self.get_state(action_entity) == "off" and state == "on":
-                self.turn_on(action_entity)
-                self.log(f"{action_entity} wurde eingeschaltet.")
+                self.queue_turn_on(action_entity)
+                self.log("%s wurde eingeschaltet.", action_entity)
             elif self.get_state(action_entity) == "on" and state == "off":
-                self.turn_off(action_entity)
-                self.log(f"{action_entity} wurde ausgeschaltet.")
+                self.queue_turn_off(action_entity)
+                self.log("%s wurde ausgeschaltet.", action_entity)
         elif action_type == "scene":
-            self.turn_on(action_entity)
-            self.log(f"{action_entity} wurde gestartet.")
+            self.queue_turn_on(action_entity)
+            self.log("%s wurde gestartet.", action_entity)
         else:
-            self.call_service(
+            self.call_service_async(
                 f"{action_entity.split('.')[0]}/{state}",
                 entity_id=action_entity,
                 **kwargs,
             )
-            self.log(f"{state} {action_entity} wurde ausgeführt.")
+            self.log("%s %s wurde ausgeführt.", state, action_entity)
 
     def action_on_schedule(self, kwargs: dict) -> None:
         """Take action on specified time."""
@@ -369,15 +369,15 @@ class HueDimmerSwitch(SwitchBase):
                 brightness = self.get_state(action_entity, attribute="brightness") or 0
                 new_brightness = brightness - 25
                 if new_brightness <= 0:
-                    self.turn_off(action_entity)
+                    self.queue_turn_off(action_entity)
                 else:
-                    self.turn_on(action_entity, brightness=new_brightness)
+                    self.queue_turn_on(action_entity, brightness=new_brightness)
             elif action_type == "brighten":
                 brightness = self.get_state(action_entity, attribute="brightness") or 0
                 new_brightness = brightness + 25
                 if new_brightness > 255:
                     new_brightness = 255
-                self.turn_on(action_entity, brightness=new_brightness)
+                self.queue_turn_on(action_entity, brightness=new_brightness)
             else:
                 if delay:
                     self.run_in(
@@ -1,10 +1,12 @@
 """Define automations for system monitoring."""
 
+import datetime
 import os
 from typing import Union
 
 import voluptuous as vol
 
+import instrumentation
 import voluptuous_helper as vol_help
 from appbase import AppBase, APP_SCHEMA
 from constants import (
@@ -16,6 +18,7 @@ from constants import (
     NOT_HOME,
 )
 from house_config import PERSONS
+from lanes import LOW, LaneMixin
 
 
 CONF_TRACKING_DEVICES = "tracking_devices"
@@ -38,6 +41,9 @@ CONF_BATTERY_LOW_THRESHOLD = "battery_low_threshold"
 
 CONF_AVAILABLE = "available"
 
+CONF_REPORT_INTERVAL = "report_interval"
+CONF_SENSOR = "sensor"
+
 
 class NotifyOnDeviceOffline(AppBase):
     """Define an automation to notify on device going offline."""
@@ -180,9 +186,11 @@ class NotifyOnLowBattery(AppBase):
             )
 
 
-class CheckAppDaemonVersionInstalled(AppBase):
+class CheckAppDaemonVersionInstalled(LaneMixin, AppBase):
     """Define a feature to daily update installed version sensor for appdaemon."""
 
+    LANE = LOW
+
     def configure(self) -> None:
         """Configure"""
         self.run_daily(self.set_sensor, self.parse_time("01:00:00"))
@@ -197,9 +205,11 @@ class CheckAppDaemonVersionInstalled(AppBase):
                     self.set_state("sensor.appdaemon_installed", state=version)
 
 
-class NotifyOnNewVersion(AppBase):
+class NotifyOnNewVersion(LaneMixin, AppBase):
     """Define an automation to notify when a new version is available."""
 
+    LANE = LOW
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_ENTITIES: vol.Schema(
@@ -238,3 +248,57 @@ class NotifyOnNewVersion(AppBase):
                 f"für {app} ist verfügbar.",
                 targets=self.notifications["targets"],
             )
+
+
+class CallbackLatencyReport(AppBase):
+    """Define a feature to publish the callback latencies of all apps."""
+
+    APP_SCHEMA = APP_SCHEMA.extend(
+        {
+            CONF_PROPERTIES: vol.Schema(
+                {
+                    vol.Optional(CONF_REPORT_INTERVAL, default=5): int,
+                    vol.Optional(
+                        CONF_SENSOR, default="sensor.appdaemon_callback_latency"
+                    ): vol_help.entity_id,
+                },
+                extra=vol.ALLOW_EXTRA,
+            )
+        }
+    )
+
+    def configure(self) -> None:
+        """Configure."""
+        self.run_every(
+            self.report,
+            self.datetime() + datetime.timedelta(seconds=10),
+            self.properties.get(CONF_REPORT_INTERVAL, 5) * 60,
+        )
+
+    def report(self, kwargs: dict) -> None:
+        """Set the sensor to the app with the most execution time."""
+        apps = {}
+        for app, stats in instrumentation.app_stats().items():
+            queue_wait, execution, rejections, service_calls = stats
+            apps[app] = {
+                "calls": execution.count,
+                "busy_s": round(execution.total, 3),
+                "execution_p99_ms": round(execution.percentile(99) * 1000, 1),
+                "queue_wait_p50_ms": round(queue_wait.percentile(50) * 1000, 1),
+                "queue_wait_p99_ms": round(queue_wait.percentile(99) * 1000, 1),
+                "rejections": rejections,
+                "service_calls": service_calls,
+            }
+        if not apps:
+            return
+
+        busiest = max(apps, key=lambda app: apps[app]["busy_s"])
+        self.set_state(
+            self.properties.get(CONF_SENSOR, "sensor.appdaemon_callback_latency"),
+            state=busiest,
+            attributes={"friendly_name": "Appdaemon meiste Rechenzeit", **apps},
+        )
+        for app, stats in sorted(
+            apps.items(), key=lambda item: item[1]["busy_s"], reverse=True
+        ):
+            self.log(f"{app}: {stats}", level="DEBUG")
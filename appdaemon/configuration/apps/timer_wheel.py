@@ -0,0 +1,136 @@
+"""Define a wheel running the deadlines of many keys from one timer of an app.
+
+Moving a deadline further out only changes it in memory, the timer of the
+scheduler is replaced only when it runs or an earlier deadline is set.
+"""
+
+import datetime
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Dict, Hashable, Union
+
+
+class TimerWheel:
+    """Define the deadlines of many keys driven by one timer of an app."""
+
+    def __init__(self, app: Any) -> None:
+        """Initialize."""
+        self.app = app
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._heap = []
+        self._order = itertools.count()
+        self._handle = None
+        self._armed = None
+        self.armed = 0
+
+    def set(self, key: Hashable, deadline: Any, callback: Callable) -> None:
+        """Call the callback with the key at the deadline, replaces the
+           deadline the key had."""
+        with self._lock:
+            self._entries[key] = (deadline, callback)
+            heapq.heappush(self._heap, (deadline, next(self._order), key))
+            if self._armed is None or deadline < self._armed:
+                self._arm()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Remove the deadline of a key, return false if it had none."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def deadline(self, key: Hashable) -> Any:
+        """Return the deadline of a key, None if it has none."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def deadlines(self) -> Dict[Hashable, Any]:
+        """Return the deadline of each key."""
+        return {key: deadline for key, (deadline, _) in list(self._entries.items())}
+
+    def clear(self) -> None:
+        """Remove all deadlines and the timer."""
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            if self._handle is not None:
+                self.app.cancel_timer(self._handle)
+            self._handle = self._armed = None
+
+    def run_due(self, kwargs: Union[dict, None] = None) -> None:
+        """Call the callbacks of the keys which are due and arm the timer for
+           the next deadline."""
+        now = self.app.datetime()
+        due = []
+        with self._lock:
+            self._handle = self._armed = None
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == deadline:
+                    del self._entries[key]
+                    due.append((key, entry[1]))
+            self._arm()
+
+        error = None
+        for key, callback in due:
+            try:
+                callback(key)
+            except Exception as err:  # pylint: disable=broad-except
+                error = error or err
+        if error is not None:
+            raise error
+
+    def _arm(self) -> None:
+        """Arm the timer for the earliest deadline, called with the lock."""
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == deadline:
+                break
+            heapq.heappop(self._heap)
+        else:
+            return
+
+        deadline = self._heap[0][0]
+        if self._armed is not None and self._armed <= deadline:
+            return
+        if self._handle is not None:
+            self.app.cancel_timer(self._handle)
+        self._handle = self.app.run_at(self.run_due, deadline)
+        self._armed = deadline
+        self.armed += 1
+
+
+class DeadlineTimer:
+    """Define a timer of an app whose deadline moves without touching the
+       scheduler, e.g. an off timer extended on every motion."""
+
+    __slots__ = ("wheel", "callback")
+
+    def __init__(self, wheel: TimerWheel, callback: Callable) -> None:
+        """Initialize."""
+        self.wheel = wheel
+        self.callback = callback
+
+    def run_in(self, seconds: float) -> None:
+        """Run the callback the given seconds from now, instead of at the
+           deadline the timer had."""
+        self.run_at(self.wheel.app.datetime() + datetime.timedelta(seconds=seconds))
+
+    def run_at(self, deadline: datetime.datetime) -> None:
+        """Run the callback at the deadline, instead of at the one it had."""
+        self.wheel.set(self, deadline, self._run)
+
+    def cancel(self) -> bool:
+        """Cancel the timer, return false if it wasn't pending."""
+        return self.wheel.cancel(self)
+
+    @property
+    def deadline(self) -> Union[datetime.datetime, None]:
+        """Return the deadline, None if the timer isn't pending."""
+        return self.wheel.deadline(self)
+
+    def _run(self, key: "DeadlineTimer") -> None:
+        """Run the callback like a timer of the scheduler."""
+        self.callback({})
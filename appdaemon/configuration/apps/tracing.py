@@ -0,0 +1,289 @@
+"""Define traces from a motion to the confirmed state of the light it turned on.
+
+The stages are ha (Home Assistant to the mirror), wait (for a worker), app (the
+callback), dispatch (the dispatcher window), service (the call in Home
+Assistant) and light (the new state of the light arriving at the mirror).
+"""
+
+import datetime
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Union
+
+import instrumentation
+
+STAGES = ("ha", "wait", "app", "dispatch", "service", "light")
+
+# Marks ending the stages after ha, a stage starts at the mark before it
+MARKS = ("received", "callback", "queued", "sent", "returned", "confirmed")
+
+TRACED_DOMAINS = ("binary_sensor",)
+
+# Finished traces kept for the report
+MAX_TRACES = 500
+
+# Seconds a trace waits for the state change of its light
+CONFIRM_TIMEOUT = 10
+
+# Seconds the receivers of a sensor turning on join its trace, unless the
+# mirror saw the sensor turning off before
+JOIN_WINDOW = CONFIRM_TIMEOUT
+
+# Seconds from last_changed to the mirror above which the clocks of HA and
+# AppDaemon are assumed to differ and the ha stage is left out
+MAX_SENSOR_DELAY = 60
+
+_CONTEXT = threading.local()
+
+
+def state_of(value: Any) -> Any:
+    """Return the state of a full state or of a state value."""
+    return value.get("state") if isinstance(value, dict) else value
+
+
+def sensor_delay(state: Any) -> Union[float, None]:
+    """Return the seconds since the change in Home Assistant."""
+    try:
+        changed = datetime.datetime.fromisoformat(state["last_changed"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    delay = time.time() - changed.timestamp()
+    return delay if 0 <= delay <= MAX_SENSOR_DELAY else None
+
+
+class Trace:
+    """Define the marks of one motion on its way to the light."""
+
+    __slots__ = (
+        "trace_id",
+        "entity",
+        "light",
+        "app",
+        "reads",
+        "marks",
+        "stages",
+        "deadline",
+        "expired",
+    )
+
+    def __init__(
+        self, trace_id: int, entity: str, delay: Union[float, None]
+    ) -> None:
+        """Initialize."""
+        self.trace_id = trace_id
+        self.entity = entity
+        self.light = None
+        self.app = None
+        self.reads = 0
+        self.marks = {"received": time.perf_counter()}
+        self.stages = {} if delay is None else {"ha": delay}
+        self.deadline = None
+        self.expired = False
+
+    def mark(self, name: str) -> None:
+        """Record the time of a mark, the first one counts."""
+        self.marks.setdefault(name, time.perf_counter())
+
+    def finish(self) -> None:
+        """Compute the stages from the marks, a missing mark or one after
+           the confirmation shortens its stage to zero."""
+        previous = self.marks["received"]
+        confirmed = self.marks["confirmed"]
+        for stage, name in zip(STAGES[1:], MARKS[1:]):
+            at = min(self.marks.get(name, previous), confirmed)
+            self.stages[stage] = max(at - previous, 0.0)
+            previous = max(previous, at)
+
+    @property
+    def total(self) -> float:
+        """Return the seconds of all stages."""
+        return sum(self.stages.values())
+
+
+class Tracer:
+    """Define the traces waiting for their light and the finished ones."""
+
+    def __init__(self, max_traces: int = MAX_TRACES) -> None:
+        """Initialize."""
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._awaiting = {}
+        self._open = {}
+        self.traces = deque(maxlen=max_traces)
+        self.started = 0
+        self.unconfirmed = 0
+
+    def receive(self, entity: str, old: Any, new: Any) -> Union[Trace, None]:
+        """Return the trace of a sensor turning on, the first receiver of the
+           change starts it, the others join it. The old and new value are
+           full states or state values."""
+        if (
+            not is_traced(entity)
+            or state_of(new) != "on"
+            or state_of(old) == "on"
+        ):
+            return None
+
+        now = time.perf_counter()
+        with self._lock:
+            trace = self._open.get(entity)
+            if trace is None or now - trace.marks["received"] > JOIN_WINDOW:
+                self.started += 1
+                trace = Trace(next(self._ids), entity, sensor_delay(new))
+                self._open[entity] = trace
+            elif "ha" not in trace.stages:
+                delay = sensor_delay(new)
+                if delay is not None:
+                    trace.stages["ha"] = delay
+        return trace
+
+    def close(self, entity: str) -> None:
+        """End the joining of the trace of a sensor which turned off."""
+        with self._lock:
+            self._open.pop(entity, None)
+
+    def expect(self, trace: Trace, entity: str) -> None:
+        """Finish the trace with the next change of the entity."""
+        with self._lock:
+            if trace.deadline is None:
+                trace.deadline = time.perf_counter() + CONFIRM_TIMEOUT
+            self._awaiting[entity] = trace
+
+    def confirm(self, entity: str) -> None:
+        """Finish the trace waiting for a change of the entity, drop the
+           traces waiting too long."""
+        if not self._awaiting:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            trace = self._awaiting.pop(entity, None)
+            if trace is not None and trace.deadline >= now:
+                trace.light = entity
+                trace.marks["confirmed"] = now
+                trace.finish()
+                self.traces.append(trace)
+            for key, waiting in list(self._awaiting.items()):
+                if waiting is trace or waiting.deadline < now:
+                    del self._awaiting[key]
+                    if waiting is not trace and not waiting.expired:
+                        waiting.expired = True
+                        self.unconfirmed += 1
+
+    def report(self) -> Dict[str, Any]:
+        """Return the median and 95th percentile in milliseconds of each
+           stage and of the total over the kept traces."""
+        with self._lock:
+            traces = list(self.traces)
+        histograms = {
+            stage: instrumentation.Histogram() for stage in (*STAGES, "total")
+        }
+        for trace in traces:
+            for stage, seconds in trace.stages.items():
+                histograms[stage].record(seconds)
+            histograms["total"].record(trace.total)
+
+        slowest = max(traces, key=lambda trace: trace.total, default=None)
+        return {
+            "traces": len(traces),
+            "unconfirmed": self.unconfirmed,
+            "reads": sum(trace.reads for trace in traces) / len(traces)
+            if traces
+            else 0,
+            "stages": {
+                stage: (
+                    histogram.count,
+                    histogram.percentile(50) * 1000,
+                    histogram.percentile(95) * 1000,
+                )
+                for stage, histogram in histograms.items()
+            },
+            "slowest": None
+            if slowest is None
+            else f"#{slowest.trace_id} {slowest.entity} -> {slowest.light} "
+            f"({slowest.app}) {slowest.total * 1000:.0f} ms",
+        }
+
+
+# The tracer of all apps
+TRACER = Tracer()
+
+
+def current() -> Union[Trace, None]:
+    """Return the trace carried by the current thread."""
+    return getattr(_CONTEXT, "trace", None)
+
+
+@contextmanager
+def carried(trace: Union[Trace, None]) -> Iterator[Union[Trace, None]]:
+    """Carry the trace on the current thread, e.g. a thread of a lane."""
+    previous = current()
+    _CONTEXT.trace = trace
+    try:
+        yield trace
+    finally:
+        _CONTEXT.trace = previous
+
+
+def is_traced(entity: Any) -> bool:
+    """Return true if a change of the entity can start a trace."""
+    return isinstance(entity, str) and entity.split(".")[0] in TRACED_DOMAINS
+
+
+def received(entity: str, old: Union[dict, None], new: Union[dict, None]) -> None:
+    """Confirm the trace waiting for the change and start or join the trace
+       of a sensor turning on, called by the mirror with the full states."""
+    TRACER.confirm(entity)
+    if is_traced(entity) and state_of(new) != "on":
+        TRACER.close(entity)
+    else:
+        TRACER.receive(entity, old, new)
+
+
+def joining(callback: Callable) -> Callable:
+    """Return the state callback running with the trace of its change."""
+
+    @functools.wraps(callback)
+    def wrapper(entity, attribute, old, new, kwargs):
+        with carried(TRACER.receive(entity, old, new)):
+            return callback(entity, attribute, old, new, kwargs)
+
+    return wrapper
+
+
+def state_read() -> None:
+    """Count a state read for the trace of the current thread."""
+    trace = current()
+    if trace is not None:
+        trace.reads += 1
+
+
+def queued(entity_ids: Iterable[str]) -> Union[Trace, None]:
+    """Mark the trace of the current thread as queued by the running
+       callback, it waits for the change of the entities."""
+    trace = current()
+    if trace is None:
+        return None
+    if "queued" not in trace.marks:
+        stats, started = instrumentation.running_callback()
+        now = time.perf_counter()
+        trace.marks["callback"] = now if started is None else started
+        trace.marks["queued"] = now
+        trace.app = None if stats is None else stats.app
+    for entity in entity_ids:
+        TRACER.expect(trace, entity)
+    return trace
+
+
+class TracingMixin:
+    """Define a mixin running the state callbacks of motion sensors with the
+       trace of their change."""
+
+    def listen_state(self, callback: Callable, entity: str = None, **kwargs) -> str:
+        """Listen to state changes, a sensor turning on continues its trace."""
+        if is_traced(entity):
+            callback = joining(callback)
+        return super().listen_state(callback, entity, **kwargs)
@@ -0,0 +1,126 @@
+"""Define a model of the movements of the persons from room to room.
+
+The transitions are counted for each BUCKET_HOURS of the day and decay with
+each new transition, so the model follows changing habits.
+"""
+
+import datetime
+import threading
+from typing import List, Tuple, Union
+
+import state_store
+
+# Seconds between the motions in two rooms which still count as transition
+MAX_TRANSIT = 120
+
+# Hours of the day sharing one matrix of counts
+BUCKET_HOURS = 3
+BUCKETS = 24 // BUCKET_HOURS
+
+# Factor applied to the counts of a row on each transition from its room
+DECAY = 0.95
+
+# Weighted transitions a row needs before predicting
+MIN_EVIDENCE = 5.0
+
+# Weight of a new transit time in the moving average
+TRANSIT_WEIGHT = 0.2
+
+
+def bucket_of(when: datetime.datetime) -> int:
+    """Return the bucket of the time of the day."""
+    return when.hour // BUCKET_HOURS
+
+
+@state_store.storable
+class TransitionModel:
+    """Define the counts and transit times of the transitions between rooms,
+       the motions of all rooms may be observed from several threads."""
+
+    def __init__(
+        self,
+        rooms: Tuple[str, ...] = (),
+        counts: Union[List[List[List[float]]], None] = None,
+        transit: Union[List[List[float]], None] = None,
+    ) -> None:
+        """Initialize."""
+        self.rooms = list(rooms)
+        self.index = {room: number for number, room in enumerate(self.rooms)}
+        size = len(self.rooms)
+        self.counts = counts or [
+            [[0.0] * size for _ in range(size)] for _ in range(BUCKETS)
+        ]
+        self.transit = transit or [[0.0] * size for _ in range(size)]
+        self.last = None
+        self._lock = threading.Lock()
+
+    def to_store(self) -> dict:
+        """Return a copy of the model to save."""
+        with self._lock:
+            return {
+                "rooms": list(self.rooms),
+                "counts": [[list(row) for row in matrix] for matrix in self.counts],
+                "transit": [list(row) for row in self.transit],
+            }
+
+    @classmethod
+    def from_store(cls, value: dict, owner: object) -> "TransitionModel":
+        """Return the saved model."""
+        return cls(value["rooms"], value["counts"], value["transit"])
+
+    def room_index(self, room: str) -> int:
+        """Return the index of a room, the matrices grow for a new room, called
+           with the lock."""
+        number = self.index.get(room)
+        if number is None:
+            number = self.index[room] = len(self.rooms)
+            self.rooms.append(room)
+            for matrix in (*self.counts, self.transit):
+                for row in matrix:
+                    row.append(0.0)
+                matrix.append([0.0] * len(self.rooms))
+        return number
+
+    def observe(self, room: str, when: datetime.datetime) -> None:
+        """Record a motion, count the transition from the room of the last
+           motion if it followed within MAX_TRANSIT."""
+        with self._lock:
+            last, self.last = self.last, (room, when)
+            if last is None or last[0] == room:
+                return
+            seconds = (when - last[1]).total_seconds()
+            if not 0 <= seconds <= MAX_TRANSIT:
+                return
+
+            origin, target = self.room_index(last[0]), self.room_index(room)
+            row = self.counts[bucket_of(last[1])][origin]
+            for number, count in enumerate(row):
+                row[number] = count * DECAY
+            row[target] += 1.0
+
+            average = self.transit[origin][target]
+            self.transit[origin][target] = (
+                seconds
+                if not average
+                else average + TRANSIT_WEIGHT * (seconds - average)
+            )
+
+    def predict(
+        self, room: str, when: datetime.datetime
+    ) -> Union[Tuple[str, float, float], None]:
+        """Return the most likely next room with its probability and transit
+           seconds, None if the room has too few transitions at this time."""
+        with self._lock:
+            origin = self.index.get(room)
+            if origin is None:
+                return None
+            row = self.counts[bucket_of(when)][origin]
+            total = sum(row)
+            if total < MIN_EVIDENCE:
+                return None
+            target = max(range(len(row)), key=row.__getitem__)
+            return (
+                self.rooms[target],
+                row[target] / total,
+                self.transit[origin][target],
+            )
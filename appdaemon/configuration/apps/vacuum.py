@@ -15,6 +15,7 @@ from constants import (
     CONF_TARGETS,
 )
 from house_config import HOUSE, MODES, PERSONS
+from state_store import PersistenceMixin
 
 
 ##############################################################################
@@ -42,10 +43,12 @@ PRESENCE_STATE = "presence_state"
 CONF_REMINDER_TIME = "reminder_time"
 
 
-class VacuumAutomation(AppBase):
+class VacuumAutomation(PersistenceMixin, AppBase):
     """Define a feature for scheduled cleaning cycle including
        cancellation when someone arrives home."""
 
+    PERSISTED_STATE = ("started_by_app",)
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_ENTITIES: vol.Schema(
@@ -158,9 +161,12 @@ class VacuumAutomation(AppBase):
         return self.get_state(self.vacuum, attribute="status")
 
 
-class NotifyWhenBinFull(AppBase):
+class NotifyWhenBinFull(PersistenceMixin, AppBase):
     """Define a feature to send a notification when the bin is full."""
 
+    # The repeating notification can still be cancelled after a restart
+    PERSISTED_STATE = ("handles",)
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_ENTITIES: vol.Schema(
@@ -225,7 +231,11 @@ class NotifyOnCleaningDay(AppBase):
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_PROPERTIES: vol.Schema(
-                {vol.Optional(CONF_REMINDER_TIME): vol_help.valid_time},
+                {
+                    vol.Optional(
+                        CONF_REMINDER_TIME, default="05:15:00"
+                    ): vol_help.valid_time
+                },
                 extra=vol.ALLOW_EXTRA,
             ),
             CONF_NOTIFICATIONS: vol.Schema(
@@ -239,7 +249,7 @@ class NotifyOnCleaningDay(AppBase):
         """Configure."""
         self.run_daily(
             self.notify_on_cleaning_day,
-            self.parse_time(self.properties[CONF_REMINDER_TIME]),
+            self.properties[CONF_REMINDER_TIME],
             constrain_app_enabled=1,
         )
 
@@ -1,7 +1,8 @@
 """Define methods to validate configuration for voluptuous."""
 
 import datetime
-from typing import Any, Sequence, TypeVar, Union
+from copy import deepcopy
+from typing import Any, Callable, FrozenSet, Sequence, Tuple, TypeVar, Union
 
 import voluptuous as vol
 
@@ -24,26 +25,160 @@ def entity_id(value: Any) -> str:
     raise vol.Invalid(f"Invalide Entity-ID: {value}")
 
 
-def entity_id_list(value: Any) -> str:
-    """Validate if a given object is a list of entity ids."""
-    value = str(value).lower()
-    for item in value.split(","):
+def comma_list(value: Any) -> Tuple[str, ...]:
+    """Validate a comma separated string or a list, return a tuple of items."""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [str(item).strip() for item in value]
+    else:
+        items = [item.strip() for item in str(value).split(",")]
+    return tuple(item for item in items if item)
+
+
+def comma_set(value: Any) -> FrozenSet[str]:
+    """Validate a comma separated string or a list, return a frozenset of items."""
+    return frozenset(comma_list(value))
+
+
+def entity_id_list(value: Any) -> Tuple[str, ...]:
+    """Validate if a given object is a list of entity ids, return a tuple."""
+    entity_ids = tuple(item.lower() for item in comma_list(value))
+    for item in entity_ids:
         if "." not in item:
             raise vol.Invalid(f"Invalide Entity-Liste: {value}")
-    return value
+    return entity_ids
 
 
 def valid_date(value: Any) -> datetime.date:
     """Validate if a given object is a date."""
     try:
-        return datetime.datetime.strptime(value, "%d.%m.%Y")
-    except ValueError:
+        return datetime.datetime.strptime(value, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
         raise vol.Invalid(f"Invalides Datum: {value}")
 
 
-def valid_time(value: Any) -> datetime.datetime:
+def valid_time(value: Any) -> datetime.time:
     """Validate if a given object is a time."""
     try:
-        return datetime.datetime.strptime(value, "%H:%M:%S")
-    except ValueError:
+        return datetime.datetime.strptime(value, "%H:%M:%S").time()
+    except (TypeError, ValueError):
         raise vol.Invalid(f"Invalide Uhrzeit: {value}")
+
+
+def frozen_items(value: dict) -> Tuple[tuple, ...]:
+    """Return the items of a dictionary as tuple of key/value pairs."""
+    return tuple(value.items())
+
+
+class FrozenConfig:
+    """Define an immutable configuration object with the fields in __slots__.
+
+    Fields missing in the configuration are None. The fields can be read
+    like the keys of a dictionary as well, e.g. config["day"].
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **values: Any) -> None:
+        """Initialize."""
+        unknown = set(values) - set(self.__slots__)
+        if unknown:
+            raise vol.Invalid(f"Unbekannte Optionen: {', '.join(sorted(unknown))}")
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevent changes of the configuration."""
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevent changes of the configuration."""
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __getitem__(self, name: str) -> Any:
+        """Return the value of a field."""
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name: str) -> bool:
+        """Return true if the field is configured."""
+        return name in self.__slots__ and getattr(self, name) is not None
+
+    def __eq__(self, other: Any) -> bool:
+        """Return true if the other configuration has the same values."""
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __hash__(self) -> int:
+        """Return the hash of the values."""
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        """Return the representation of the configuration."""
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.__slots__
+        )
+        return f"{type(self).__name__}({values})"
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the value of a field or the default if it isn't configured."""
+        value = getattr(self, name, None) if name in self.__slots__ else None
+        return default if value is None else value
+
+    def values(self) -> tuple:
+        """Return the configured values."""
+        return tuple(
+            getattr(self, name)
+            for name in self.__slots__
+            if getattr(self, name) is not None
+        )
+
+
+def frozen(config_class: type) -> Callable[[dict], FrozenConfig]:
+    """Return a validator which turns a dictionary into the config object."""
+
+    def validator(value: dict) -> FrozenConfig:
+        """Return the config object of the dictionary."""
+        return config_class(**value)
+
+    return validator
+
+
+class FrozenDict(dict):
+    """Define a dictionary of a validated configuration which can't change.
+
+    It is still a dict for AppDaemon and json, a deep copy is a plain
+    dictionary which can be changed.
+    """
+
+    __slots__ = ()
+
+    def _immutable(self, *args: Any, **kwargs: Any) -> None:
+        """Prevent changes of the configuration."""
+        raise TypeError("Die Konfiguration ist unveränderlich")
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+    __ior__ = _immutable
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        """Return a plain dictionary with deep copies of the values."""
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self) -> tuple:
+        """Pickle like a plain dictionary."""
+        return dict, (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Return the value with its dictionaries, lists and sets made immutable."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
@@ -15,6 +15,7 @@ from constants import (
     CONF_TARGETS,
 )
 from house_config import PERSONS
+from state_store import PersistenceMixin
 
 
 WASHER_STATE = "washer_state"
@@ -67,9 +68,12 @@ class WasherAutomation(AppBase):  # pylint: disable=too-few-public-methods
         self.select_option(self.entities[CONF_STATUS], washer_state.value)
 
 
-class NotifyWhenWasherDone(AppBase):
+class NotifyWhenWasherDone(PersistenceMixin, AppBase):
     """Define a feature to send a notification when the washer has finished."""
 
+    # The repeating notification can still be cancelled after a restart
+    PERSISTED_STATE = ("handles",)
+
     APP_SCHEMA = APP_SCHEMA.extend(
         {
             CONF_PROPERTIES: vol.Schema(
@@ -0,0 +1,36 @@
+"""Put the apps and the in-memory AppDaemon of the benchmarks on the path."""
+
+import datetime
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS_DIR = os.path.join(TESTS_DIR, "..", "benchmarks")
+APPS_DIR = os.path.join(TESTS_DIR, "..", "configuration", "apps")
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, APPS_DIR)
+
+import fake_appdaemon  # noqa: E402 pylint: disable=wrong-import-position
+
+fake_appdaemon.install()
+
+# pylint: disable=wrong-import-position
+import clock  # noqa: E402
+import harness  # noqa: E402
+
+# A Friday at noon
+START = datetime.datetime(2020, 5, 1, 12)
+
+
+@pytest.fixture
+def start_apps():
+    """Return a function starting the given apps against the in-memory
+       AppDaemon on a virtual clock, the wall clock is restored afterwards."""
+
+    def start(app_config: dict, states: dict = None) -> harness.Harness:
+        return harness.Harness(START, app_config=app_config, states=states)
+
+    yield start
+    clock.set_clock(clock.WallClock())
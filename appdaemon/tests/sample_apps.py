@@ -0,0 +1,24 @@
+"""Define small apps recording what AppDaemon hands to their callbacks."""
+
+from appbase import AppBase
+from hot_reload import HotReloadMixin
+
+
+class Recorder(AppBase):
+    """Define an app recording the arguments of its callbacks."""
+
+    def configure(self) -> None:
+        """Configure."""
+        self.calls = []
+
+    def record(self, *args) -> None:
+        """Record the arguments of a state, event or timer callback."""
+        self.calls.append(args)
+
+
+class Keeper(HotReloadMixin, Recorder):
+    """Define an app keeping its calls and its recording timer."""
+
+    HOT_RELOAD_KEYS = HotReloadMixin.HOT_RELOAD_KEYS + ("properties.delay",)
+    PERSISTED_STATE = ("calls",)
+    PERSISTED_TIMERS = ("record",)
@@ -0,0 +1,72 @@
+"""Test the apps of the house with their configuration files."""
+
+import datetime
+import importlib
+import os
+
+import pytest
+
+import fake_appdaemon
+import harness
+from conftest import APPS_DIR, START
+
+
+def configured_apps(tmp_path):
+    """Return the configuration of all apps whose class exists, the event
+       recorder writes to a directory of the test."""
+    modules = [name[:-3] for name in os.listdir(APPS_DIR) if name.endswith(".py")]
+    app_config = {
+        name: config
+        for name, config in harness.load_app_config(modules).items()
+        if hasattr(importlib.import_module(config["module"]), config["class"])
+    }
+    for config in app_config.values():
+        if config["module"] == "event_recorder":
+            config.setdefault("properties", {})["path"] = str(tmp_path)
+    return app_config
+
+
+@pytest.fixture
+def house(start_apps, tmp_path, monkeypatch):
+    """Return all apps of the house, the warnings and errors they log are
+       recorded."""
+    problems = []
+    log = fake_appdaemon.Runtime.log
+
+    def record(runtime, name, level, message):
+        """Record warnings and errors."""
+        if level in ("WARNING", "ERROR", "CRITICAL"):
+            problems.append(f"{name}: {message}")
+        log(runtime, name, level, message)
+
+    monkeypatch.setattr(fake_appdaemon.Runtime, "log", record)
+    house = start_apps(configured_apps(tmp_path))
+    house.problems = problems
+    return house
+
+
+def test_all_apps_start(house):
+    """Every configured app is valid and starts without a warning."""
+    assert len(house.runtime.apps) == len(house.app_config)
+    assert house.problems == []
+
+
+def test_apps_leave_their_configuration_unchanged(house):
+    """The callbacks of the apps, run by a change of every entity they listen
+       to and back and by a day of timers, don't change the frozen
+       configuration."""
+    runtime = house.runtime
+    entities = {callback["entity"] for callback in runtime.state_callbacks.values()}
+    for entity in sorted(entity for entity in entities if entity):
+        state = runtime.get_state(entity)
+        for changed in ("off" if state == "on" else "on", state):
+            runtime.set_state(entity, changed)
+            runtime.drain()
+    runtime.advance(START + datetime.timedelta(days=1))
+    runtime.drain()
+
+    assert not [
+        problem
+        for problem in runtime.errors + house.problems
+        if "unveränderlich" in problem
+    ]
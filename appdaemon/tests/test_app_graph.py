@@ -0,0 +1,68 @@
+"""Test the dependency graph starting the apps in order."""
+
+import threading
+
+import app_graph
+from app_graph import AppGraph, LazyApp
+
+APP_CONFIG = {
+    "state_mirror": {"module": "state_mirror"},
+    "presence_app": {"module": "presence"},
+    "notifier": {"module": "notification", "dependencies": ["presence_app"]},
+    "alarm": {"module": "security", "manager": "notifier"},
+    "left": {"module": "a", "dependencies": "right"},
+    "right": {"module": "a", "dependencies": "left"},
+    "lonely": {"module": "a", "dependencies": "gone"},
+    "global_modules": ["house_config"],
+}
+
+
+class App:
+    """Define a running app."""
+
+    def __init__(self, name: str, startup_complete: bool = True) -> None:
+        """Initialize."""
+        self.name = name
+        self.startup_complete = startup_complete
+
+
+def test_levels():
+    """Apps start after their dependencies, the manager and the state mirror,
+       cycles and missing dependencies are reported."""
+    graph = AppGraph(APP_CONFIG)
+    assert graph.levels[0] == {"state_mirror"}
+    assert graph.levels[1] == {"presence_app", "lonely"}
+    assert graph.levels[2] == {"notifier"}
+    assert graph.levels[3] == {"alarm"}
+    assert graph.cyclic == {"left", "right"}
+    assert graph.missing("lonely") == {"gone"}
+    assert "global_modules" not in graph.dependencies
+
+
+def test_start_when_ready():
+    """An app starts once all its dependencies finished their startup."""
+    apps = {"presence_app": App("presence_app", startup_complete=False)}
+    started = threading.Event()
+    app_graph.start_when_ready("notifier", {"presence_app"}, apps.get, started.set)
+    assert not started.wait(0.1)
+    assert app_graph.waiting()["notifier"] == {"presence_app"}
+
+    apps["presence_app"].startup_complete = True
+    app_graph.notify_ready("presence_app")
+    assert started.wait(1)
+    assert "notifier" not in app_graph.waiting()
+
+
+def test_lazy_app_resolves_reloaded_app():
+    """The proxy resolves the app on first use and again after a reload."""
+    apps = {}
+    proxy = LazyApp("presence_app", apps.get)
+    assert app_graph.resolve(proxy) is None
+
+    apps["presence_app"] = App("presence_app")
+    assert proxy.name == "presence_app"
+    assert app_graph.resolve(proxy) is apps["presence_app"]
+
+    apps["presence_app"] = App("reloaded")
+    app_graph.stopped("presence_app")
+    assert proxy.name == "reloaded"
@@ -0,0 +1,89 @@
+"""Test the async AppBase of the AppDaemon 4 apps."""
+
+import asyncio
+import importlib.util
+import os
+import sys
+
+import pytest
+
+import fake_appdaemon
+from conftest import START, TESTS_DIR
+
+AD4_APPS_DIR = os.path.join(TESTS_DIR, "..", "..", "appdaemon_4", "apps")
+sys.path.append(AD4_APPS_DIR)
+
+# The module shares its name with the AppBase of the AppDaemon 3 apps
+SPEC = importlib.util.spec_from_file_location(
+    "appbase_4", os.path.join(AD4_APPS_DIR, "appbase.py")
+)
+appbase_4 = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(appbase_4)
+
+
+class Switcher(appbase_4.AsyncAppBase):
+    """Define an app switching several lights."""
+
+    def configure(self) -> None:
+        """Configure."""
+        self.lights = ("light.kitchen", "light.hall")
+
+
+@pytest.fixture
+def app():
+    """Return the started app with the guest mode on."""
+    runtime = fake_appdaemon.Runtime(START)
+    for entity, state in {
+        "light.kitchen": "off",
+        "light.hall": "on",
+        "input_boolean.switcher": "on",
+        "input_boolean.guest_mode": "on",
+    }.items():
+        runtime.set_state(entity, state)
+    config = {"module": "switcher", "class": "Switcher"}
+    app = Switcher(runtime, "switcher", config, {"switcher": config})
+    runtime.apps["switcher"] = app
+    app.initialize()
+    return app
+
+
+def test_resolve():
+    """A pending result is awaited, a plain one is returned."""
+
+    async def pending():
+        return "on"
+
+    assert asyncio.run(appbase_4.AsyncAppBase.resolve(pending())) == "on"
+    assert asyncio.run(appbase_4.AsyncAppBase.resolve("off")) == "off"
+
+
+def test_fan_out(app):
+    """The states are read and the services called for every entity."""
+    runtime = app.hass.runtime
+    assert asyncio.run(app.get_states(app.lights)) == {
+        "light.kitchen": "off",
+        "light.hall": "on",
+    }
+
+    asyncio.run(app.call_service_for("light/turn_on", app.lights, brightness=50))
+    assert runtime.services["light/turn_on"] == 2
+    assert asyncio.run(app.get_states(app.lights)) == {
+        "light.kitchen": "on",
+        "light.hall": "on",
+    }
+
+    asyncio.run(app.select_options({"input_select.house_presence": "Ferien"}))
+    assert runtime.services["input_select/select_option"] == 1
+
+
+def test_cached_constraints(app):
+    """The constraints read the cached inputs, kept up to date by listeners."""
+    runtime = app.hass.runtime
+    assert app.constrain_enabled(True)
+    assert app.constrain_mode_on("guest_mode")
+
+    runtime.set_state("input_boolean.guest_mode", "off")
+    runtime.set_state("input_boolean.switcher", "off")
+    runtime.drain()
+    assert app.constrain_mode_off("guest_mode")
+    assert not app.constrain_enabled(True)
@@ -0,0 +1,56 @@
+"""Test the timers of the apps on the virtual and the wall clock."""
+
+import datetime
+
+import pytest
+
+import clock
+from conftest import START
+
+RECORDER = {"module": "sample_apps", "class": "Recorder"}
+
+
+@pytest.fixture
+def app(start_apps):
+    """Return a running app."""
+    return start_apps({"recorder": RECORDER}).runtime.apps["recorder"]
+
+
+def test_virtual_clock_runs_timers_in_order(app):
+    """The virtual clock runs the timers in the order of their deadlines and
+       the callbacks see the time they were scheduled for."""
+    seen = []
+    app.run_in(lambda kwargs: seen.append(("b", app.datetime())), 90)
+    app.run_in(lambda kwargs: seen.append(("a", app.datetime())), 30)
+    app.run_every(lambda kwargs: seen.append(("e", app.datetime())), START, 60)
+
+    app.clock.advance(START + datetime.timedelta(seconds=100))
+    assert seen == [
+        ("e", START),
+        ("a", START + datetime.timedelta(seconds=30)),
+        ("e", START + datetime.timedelta(seconds=60)),
+        ("b", START + datetime.timedelta(seconds=90)),
+    ]
+    assert app.datetime() == START + datetime.timedelta(seconds=100)
+
+
+def test_wall_clock_uses_appdaemon_scheduler(app):
+    """On the wall clock the timers go to the scheduler of AppDaemon, a
+       deadline which passed already doesn't start in the past."""
+    app.clock = clock.WallClock()
+    runtime = app.runtime
+    scheduled = {}
+    runtime.insert_schedule = lambda app, start, callback, kwargs, **rest: (
+        scheduled.setdefault(callback.__name__, start)
+    )
+
+    def half(kwargs):
+        """Run after half a second."""
+
+    def due(kwargs):
+        """Run at a deadline which passed already."""
+
+    app.run_in(half, 0.5)
+    app.run_at(due, runtime.now - datetime.timedelta(seconds=1))
+    assert set(scheduled) == {"half", "due"}
+    assert scheduled["due"] >= runtime.now
@@ -0,0 +1,68 @@
+"""Test the compiled constraint plan against the legacy evaluation."""
+
+import datetime
+import itertools
+
+import pytest
+
+from constraint_benchmark import STATES, build_app, legacy_constrain_app_enabled
+from house_config import HOUSE, MODES
+from presence import PresenceAutomation
+
+DISABLED_STATES = (
+    {},
+    {"presence": "noone,vacation"},
+    {"modes": {"guest_mode": "on"}},
+    {"days": "Saturday,Sunday"},
+    {
+        "presence": "noone,vacation",
+        "modes": {"guest_mode": "on", "cleaning_mode": "off"},
+        "days": "Saturday,Sunday",
+    },
+)
+
+# A Friday and a Saturday
+DAYS = (datetime.datetime(2020, 5, 1, 12), datetime.datetime(2020, 5, 2, 12))
+
+
+def all_states():
+    """Yield every combination of the inputs of the constraints."""
+    for presence, guest, cleaning, enabled in itertools.product(
+        PresenceAutomation.HouseState, ("on", "off"), ("on", "off"), ("on", "off")
+    ):
+        yield {
+            HOUSE["presence_state"]: presence.value,
+            MODES["guest_mode"]: guest,
+            MODES["cleaning_mode"]: cleaning,
+            "input_boolean.benchmark_app": enabled,
+        }
+
+
+@pytest.mark.parametrize("disabled_states", DISABLED_STATES)
+@pytest.mark.parametrize("day", DAYS)
+def test_plan_matches_legacy(disabled_states, day):
+    """The compiled plan decides like the legacy evaluation."""
+    for states in all_states():
+        app = build_app(disabled_states, states)
+        app.datetime = lambda day=day: day
+        app.compile_constraints()
+        assert app.constrain_app_enabled("1") == legacy_constrain_app_enabled(
+            app, "1"
+        ), states
+
+
+def test_plan_follows_changed_input():
+    """A changed input updates the cached inputs of the plan."""
+    app = build_app(states=STATES)
+    app.datetime = lambda: DAYS[0]
+    app.compile_constraints()
+    assert app.constrain_app_enabled("1")
+
+    app.constraint_input_changed(
+        HOUSE["presence_state"],
+        "state",
+        STATES[HOUSE["presence_state"]],
+        PresenceAutomation.HouseState.vacation.value,
+        {},
+    )
+    assert not app.constrain_app_enabled("1")
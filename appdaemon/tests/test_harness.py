@@ -0,0 +1,30 @@
+"""Test the benchmark harness running the apps on the in-memory AppDaemon."""
+
+import pytest
+
+import clock
+import harness
+import scenarios
+
+
+@pytest.fixture
+def run_motion():
+    """Return a function running the motion scenario with a seed."""
+    yield lambda seed: harness.run_scenario(scenarios.SCENARIOS["motion"], seed)
+    clock.set_clock(clock.WallClock())
+
+
+def test_scenario_runs_without_errors(run_motion):
+    """The apps handle the motions of the scenario and turn lights on."""
+    result = run_motion(1)
+    assert result["errors"] == []
+    assert result["callbacks"] > 0
+    assert result["timers"] > 0
+    assert result["services"].get("light/turn_on", 0) > 0
+
+
+def test_scenario_is_deterministic(run_motion):
+    """The same seed gives the same numbers."""
+    keys = ("callbacks", "timers", "rejected", "service_calls", "services")
+    first, second = run_motion(1), run_motion(1)
+    assert {key: first[key] for key in keys} == {key: second[key] for key in keys}
@@ -0,0 +1,88 @@
+"""Test the hand-over of the state of an app to its reloaded instance."""
+
+import datetime
+
+import pytest
+
+import hot_reload
+from conftest import START
+
+KEEPER = {
+    "module": "sample_apps",
+    "class": "Keeper",
+    "properties": {"delay": 1, "mode": "a"},
+}
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the running keeper with a call and a pending timer."""
+    house = start_apps({"keeper": KEEPER})
+    app = house.runtime.apps["keeper"]
+    app.calls.append(("before",))
+    app.run_in(app.record, 600, note="timer")
+    return house
+
+
+def reload(house, **properties):
+    """Reload the keeper with changed properties, return the new instance."""
+    config = {**KEEPER, "properties": {**KEEPER["properties"], **properties}}
+    house.reload_app("keeper", config)
+    return house.runtime.apps["keeper"]
+
+
+def run_timers(house):
+    """Run the timers due within the next hour."""
+    house.runtime.advance(START + datetime.timedelta(hours=1))
+    house.runtime.drain()
+
+
+def test_changed_keys():
+    """Nested changes are reported as dotted keys."""
+    old = {"properties": {"delay": 1, "day": {"a": 1}}, "entities": {}}
+    new = {"properties": {"delay": 2, "day": {"a": 1}}, "entities": {"b": 1}}
+    assert hot_reload.changed_keys(old, new) == {"properties.delay", "entities.b"}
+    assert hot_reload.is_hot({"properties.delay"}, ("properties.delay",))
+    assert hot_reload.is_hot({"rooms.bad.delay"}, ("rooms",))
+    assert not hot_reload.is_hot(set(), ("rooms",))
+    assert not hot_reload.is_hot({"entities.b"}, ("properties.delay",))
+
+
+def test_hot_reload_keeps_state_and_timers(house):
+    """A new instance continues with the calls and the timer of the previous
+       one, the previous instance doesn't run anymore."""
+    previous = house.runtime.apps["keeper"]
+    app = reload(house, delay=2)
+    assert app is not previous
+    assert app.properties["delay"] == 2
+    assert app.calls == [("before",)]
+
+    run_timers(house)
+    assert app.calls == [("before",), ({"note": "timer"},)]
+    assert previous.calls == [("before",)]
+
+
+def test_other_change_starts_from_scratch(house):
+    """A change of other than hot reload keys drops the state."""
+    app = reload(house, mode="b")
+    assert app.calls == []
+
+    run_timers(house)
+    assert app.calls == []
+
+
+def test_removed_app_is_dropped(house):
+    """The parked state of an app removed from the configuration is dropped
+       with the next reload of any app."""
+    house.runtime.stop_app("keeper")
+    assert "keeper" in hot_reload._PARKED  # pylint: disable=protected-access
+    del house.app_config["keeper"]
+    assert hot_reload.take("other", {}, (), house.app_config) is None
+    assert "keeper" not in hot_reload._PARKED  # pylint: disable=protected-access
+
+
+def test_app_without_mixin_parks_nothing(start_apps):
+    """Only apps with the HotReloadMixin hand their state over."""
+    house = start_apps({"recorder": {**KEEPER, "class": "Recorder"}})
+    house.runtime.stop_app("recorder")
+    assert "recorder" not in hot_reload._PARKED  # pylint: disable=protected-access
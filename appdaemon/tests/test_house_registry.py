@@ -0,0 +1,59 @@
+"""Test the indexed registry of the house."""
+
+import house_registry
+from house_config import HOUSE, MODES, PERSONS
+from house_registry import HouseRegistry
+
+APP_CONFIG = {
+    "occupancy": {
+        "module": "occupancy",
+        "class": "OccupancyEngine",
+        "rooms": {
+            "bad_klein": {
+                "motion_sensors": "binary_sensor.bewegung_bad_klein",
+                "lux_sensor": "sensor.lux_bad_klein",
+                "lights": {"day": "light.decke_klein"},
+            }
+        },
+    },
+    "window": {
+        "module": "climate",
+        "class": "NotifyOnWindowOpen",
+        "entities": {"window_sensors": "binary_sensor.fenster_buero"},
+    },
+}
+
+
+def test_persons_and_modes():
+    """The person of an entity, the notifiers and the modes are indexed."""
+    registry = HouseRegistry(PERSONS, {**HOUSE, "notifier": "notify.haus"}, MODES)
+    assert registry.person_of("device_tracker.sabrina_phone") == "Sabrina"
+    assert registry.person_of("sensor.unknown") is None
+    assert registry.notifier_of("Dimitri") == "notify.dimitri_handy"
+    assert registry.notifier_of("Sabrina") is None
+    assert registry.person_of_notifier("notify.dimitri_handy") == "Dimitri"
+    assert registry.name_of_notifier("notify.haus") == "Haus"
+    assert registry.notify_service("notify.dimitri_handy") == "notify/dimitri_handy"
+    assert registry.mode_of("input_boolean.guest_mode") == "guest_mode"
+
+
+def test_rooms():
+    """The sensors and lights of the apps are grouped by room, other entities
+       get the room in their object id."""
+    registry = HouseRegistry(PERSONS, HOUSE, MODES, APP_CONFIG)
+    room = registry.room("bad_klein")
+    assert room.name == "Bad_klein"
+    assert room.motion_sensors == ("binary_sensor.bewegung_bad_klein",)
+    assert room.lux_sensors == ("sensor.lux_bad_klein",)
+    assert room.lights == ("light.decke_klein",)
+    assert registry.room("buero").windows == ("binary_sensor.fenster_buero",)
+    assert registry.room_of("light.decke_klein") == "bad_klein"
+    assert registry.room_name_of("binary_sensor.bewegung_kuche") == "Kuche"
+    assert house_registry.display_name("bad_klein") == "Bad klein"
+
+
+def test_registry_is_built_once_per_content():
+    """Apps with the same configuration share the registry."""
+    registry = house_registry.get_registry(APP_CONFIG)
+    assert house_registry.get_registry(dict(APP_CONFIG)) is registry
+    assert house_registry.get_registry({}) is not registry
@@ -0,0 +1,60 @@
+"""Test the statistics recorded for the callbacks of the apps."""
+
+import instrumentation
+from instrumentation import Histogram
+
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "entities": {"light": "light.kitchen"},
+}
+
+
+def test_histogram():
+    """Percentiles are accurate to the width of a bucket."""
+    histogram = Histogram()
+    for millisecond in range(1, 101):
+        histogram.record(millisecond / 1000)
+    assert histogram.count == 100
+    assert abs(histogram.percentile(50) - 0.050) <= 0.050 / 16
+    assert abs(histogram.percentile(99) - 0.099) <= 0.099 / 16
+    assert histogram.percentile(100) == histogram.max == 0.1
+    assert abs(histogram.mean() - 0.0505) < 1e-9
+
+    merged = Histogram()
+    merged.merge(histogram)
+    merged.merge(histogram)
+    assert merged.count == 200
+    assert merged.percentile(50) == histogram.percentile(50)
+
+
+def test_callback_stats(start_apps):
+    """A callback records its executions, the calls rejected by the enable
+       input boolean and the service calls it made."""
+    house = start_apps(
+        {"instrumented": RECORDER},
+        {"light.kitchen": "off", "input_boolean.instrumented": "on"},
+    )
+    runtime = house.runtime
+    app = runtime.apps["instrumented"]
+
+    def switch(entity, attribute, old, new, kwargs):
+        """Record the change and switch the light of the hall."""
+        app.record(entity, new)
+        app.call_service("light/turn_on", entity_id="light.hall")
+
+    app.listen_state(switch, "light.kitchen", constrain_app_enabled=1)
+    runtime.set_state("light.kitchen", "on")
+    runtime.drain()
+    runtime.set_state("input_boolean.instrumented", "off")
+    runtime.drain()
+    runtime.set_state("light.kitchen", "off")
+    runtime.drain()
+
+    stats = instrumentation.CALLBACK_STATS[("instrumented", "switch")]
+    assert app.calls == [("light.kitchen", "on")]
+    assert stats.execution.count == 1
+    assert stats.queue_wait.count == 1
+    assert stats.rejections == 1
+    assert stats.service_calls == 1
+    assert instrumentation.app_stats()["instrumented"][2:] == (1, 1)
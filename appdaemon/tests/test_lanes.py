@@ -0,0 +1,62 @@
+"""Test the priority lanes of the callbacks."""
+
+import threading
+
+import pytest
+
+import lanes
+
+
+@pytest.fixture
+def lane():
+    """Return a lane with one thread and a backlog of one callback."""
+    return lanes.Lane("test", 1, max_backlog=1)
+
+
+def test_high_and_normal_run_on_caller():
+    """Only the low lane leaves the AppDaemon worker."""
+
+    def callback():
+        """Do nothing."""
+
+    assert lanes.route(callback, lanes.HIGH, print) is callback
+    assert lanes.route(callback, lanes.NORMAL, print) is callback
+    assert lanes.route(callback, lanes.LOW, print) is not callback
+
+
+def test_full_backlog_runs_on_caller(lane):
+    """A low callback runs on the thread of the lane, once the backlog is
+       full further ones run on the caller instead of being dropped."""
+    started, release = threading.Event(), threading.Event()
+    threads = []
+
+    def blocking():
+        """Keep the thread of the lane busy."""
+        threads.append(threading.current_thread())
+        started.set()
+        release.wait(5)
+
+    lane.submit(blocking, (), {}, print)
+    assert started.wait(5)
+    lane.submit(blocking, (), {}, print)
+    lane.submit(lambda: threads.append(threading.current_thread()), (), {}, print)
+    release.set()
+    assert threads[0] is not threading.current_thread()
+    assert threads[1] is threading.current_thread()
+    assert lane.overflowed == 1
+
+
+def test_errors_are_reported(lane):
+    """The error of a callback on the thread of the lane is reported."""
+    traces = []
+    failed = threading.Event()
+
+    def report(trace):
+        """Record the trace of the error."""
+        traces.append(trace)
+        failed.set()
+
+    lane.submit(lambda: 1 / 0, (), {}, report)
+    assert failed.wait(5)
+    assert "ZeroDivisionError" in traces[0]
+    assert lane.failed == 1
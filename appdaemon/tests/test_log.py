@@ -0,0 +1,33 @@
+"""Test the logging of the apps."""
+
+import pytest
+
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "properties": {"log_level": "WARNING"},
+}
+
+
+@pytest.fixture
+def app(start_apps):
+    """Return an app logging warnings and errors, its lines are recorded."""
+    app = start_apps({"recorder": RECORDER}).runtime.apps["recorder"]
+    app.lines = []
+    app.runtime.log = lambda name, level, message: app.lines.append(
+        (level, message)
+    )
+    return app
+
+
+def test_enabled_levels_are_logged_right_away(app):
+    """Every message of an enabled level is formatted and logged before log
+       returns, the others aren't formatted."""
+    formatted = []
+    app.log(lambda: formatted.append("debug"), level="DEBUG")
+    app.log("Bewegung im %s erkannt.", "Bad")
+    for _ in range(3):
+        app.log("Tür im %s offen.", "Flur", level="WARNING")
+
+    assert not formatted
+    assert app.lines == [("WARNING", "Tür im Flur offen.")] * 3
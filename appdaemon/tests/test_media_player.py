@@ -0,0 +1,56 @@
+"""Test the sequences of service calls of the media player."""
+
+import pytest
+
+MEDIA_PLAYER = {"module": "media_player", "class": "MediaPlayerAutomation"}
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the apps with the media player recording its service calls."""
+    house = start_apps({"media_player": MEDIA_PLAYER})
+    runtime = house.runtime
+    runtime.called = []
+    call_service = runtime.call_service
+
+    def record(service, **data):
+        """Record the service call, fail those of the failing services."""
+        runtime.called.append(service)
+        if service in runtime.failing:
+            raise ValueError(service)
+        return call_service(service, **data)
+
+    runtime.failing = set()
+    runtime.call_service = record
+    return house
+
+
+def test_play_media_in_order(house):
+    """Each step of playing a playlist starts after the previous one."""
+    app = house.runtime.apps["media_player"]
+    app.play_media(
+        "media_player.wohnzimmer", "spotify:1", "Wohnzimmer", volume=20, shuffle=1
+    )
+    assert house.runtime.called == [
+        "media_player/select_source",
+        "media_player/volume_set",
+        "media_player/play_media",
+        "media_player/shuffle_set",
+        "media_player/media_next_track",
+    ]
+
+
+def test_failed_step_stops_sequence(house):
+    """The source isn't turned off if pausing the media player failed."""
+    runtime = house.runtime
+    runtime.failing.add("media_player/media_pause")
+    runtime.apps["media_player"].stop(
+        "media_player.wohnzimmer", source_entity="switch.verstaerker"
+    )
+    assert runtime.called == ["media_player/media_pause"]
+
+    runtime.failing.clear()
+    runtime.apps["media_player"].stop(
+        "media_player.wohnzimmer", source_entity="switch.verstaerker"
+    )
+    assert runtime.called[1:] == ["media_player/media_pause", "homeassistant/turn_off"]
@@ -0,0 +1,112 @@
+"""Test the occupancy engine switching the lights of all rooms."""
+
+import datetime
+
+import pytest
+
+from conftest import START
+
+DAY_STATE_TIME = {"morning": "05:30:00", "day": "11:30:00", "night": "22:00:00"}
+ENGINE = {
+    "module": "occupancy",
+    "class": "OccupancyEngine",
+    "properties": {"delay": 5, "day_state_time": DAY_STATE_TIME},
+    "rooms": {
+        "kuche": {
+            "motion_sensors": "binary_sensor.bewegung_kuche",
+            "lights": dict.fromkeys(DAY_STATE_TIME, "light.kuche"),
+        },
+        "buero": {
+            "motion_sensors": "binary_sensor.bewegung_buero",
+            "lux_sensor": "sensor.lux_buero",
+            "lights": dict.fromkeys(DAY_STATE_TIME, "light.buero"),
+            "properties": {"prewarm_probability": 0.7},
+        },
+    },
+}
+STATES = {
+    "binary_sensor.bewegung_kuche": "off",
+    "binary_sensor.bewegung_buero": "off",
+    "sensor.lux_buero": "20",
+    "light.kuche": "off",
+    "light.buero": "off",
+    "input_boolean.motion_light_kuche": "on",
+    "input_boolean.motion_light_buero": "on",
+}
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the engine serving the kitchen and the office."""
+    return start_apps({"occupancy": ENGINE}, STATES)
+
+
+def motion(runtime, sensor: str, seconds: float = 0) -> None:
+    """Trigger the motion sensor after the given seconds."""
+    runtime.advance(runtime.now + datetime.timedelta(seconds=seconds))
+    runtime.set_state(sensor, "on")
+    runtime.drain()
+    runtime.set_state(sensor, "off")
+    runtime.drain()
+
+
+def test_motion_switches_the_lights_of_its_room(house):
+    """A motion turns on the lights of its room only, they go off after the
+       delay."""
+    runtime = house.runtime
+    motion(runtime, "binary_sensor.bewegung_kuche")
+    assert runtime.get_state("light.kuche") == "on"
+    assert runtime.get_state("light.buero") == "off"
+
+    runtime.advance(START + datetime.timedelta(minutes=5, seconds=1))
+    assert runtime.get_state("light.kuche") == "off"
+    assert runtime.errors == []
+
+
+def test_disabled_and_bright_rooms_stay_dark(house):
+    """A disabled room and a room above its lux threshold are left alone."""
+    runtime = house.runtime
+    runtime.set_state("input_boolean.motion_light_kuche", "off")
+    runtime.set_state("sensor.lux_buero", "500")
+    motion(runtime, "binary_sensor.bewegung_kuche")
+    motion(runtime, "binary_sensor.bewegung_buero")
+    assert runtime.get_state("light.kuche") == "off"
+    assert runtime.get_state("light.buero") == "off"
+    assert runtime.errors == []
+
+
+def test_motion_moves_the_deadline(house):
+    """A motion while the light is on moves the deadline to the delay from
+       that motion."""
+    runtime = house.runtime
+    engine = runtime.apps["occupancy"]
+    motion(runtime, "binary_sensor.bewegung_kuche")
+    motion(runtime, "binary_sensor.bewegung_kuche", 4 * 60)
+    deadline = START + datetime.timedelta(minutes=9)
+    assert engine.timer_wheel.deadline(("light_off", "kuche")) == deadline
+    assert engine.light_off_deadlines == {"kuche": deadline}
+
+    runtime.advance(START + datetime.timedelta(minutes=5, seconds=1))
+    assert runtime.get_state("light.kuche") == "on"
+    runtime.advance(deadline + datetime.timedelta(seconds=1))
+    assert runtime.get_state("light.kuche") == "off"
+    assert engine.light_off_deadlines == {}
+
+
+def test_likely_next_room_is_prewarmed(house):
+    """After the usual walks from the kitchen to the office the lights of the
+       office go on with the motion in the kitchen, without motion there they
+       go off after the timeout."""
+    runtime = house.runtime
+    for _ in range(6):
+        motion(runtime, "binary_sensor.bewegung_kuche")
+        motion(runtime, "binary_sensor.bewegung_buero", 10)
+        runtime.advance(runtime.now + datetime.timedelta(minutes=6))
+    assert runtime.get_state("light.buero") == "off"
+
+    motion(runtime, "binary_sensor.bewegung_kuche")
+    assert runtime.get_state("light.buero") == "on"
+    runtime.advance(runtime.now + datetime.timedelta(seconds=61))
+    assert runtime.get_state("light.buero") == "off"
+    assert runtime.get_state("light.kuche") == "on"
+    assert runtime.errors == []
@@ -0,0 +1,67 @@
+"""Test the event log and its replay against the apps."""
+
+import datetime
+
+import replay
+from conftest import START
+from event_log import STATE_CHANGED, EventLogWriter, read_records
+
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "entities": {"sensor": "binary_sensor.bewegung_kuche"},
+}
+
+
+def write_log(path: str) -> None:
+    """Write a motion, its end and an event to the log at the path."""
+    start = START.timestamp()
+    with open(path, "wb") as log_file:
+        writer = EventLogWriter(log_file, start)
+        on = {"state": "on", "attributes": {"friendly_name": "Küche"}}
+        off = {"state": "off", "attributes": {"friendly_name": "Küche"}}
+        writer.state_changed(start + 1.5, "binary_sensor.bewegung_kuche", on)
+        writer.state_changed(start + 40, "binary_sensor.bewegung_kuche", off)
+        writer.event(start + 60, "deconz_event", {"id": "switch", "event": 1002})
+        writer.close()
+
+
+def test_log_round_trip(tmp_path):
+    """The records come back in order, unchanged attributes are repeated and
+       a truncated last record is skipped."""
+    path = tmp_path / "events.adel"
+    write_log(path)
+    data = path.read_bytes()
+
+    records = list(read_records(data))
+    assert [(record.offset, record.kind) for record in records] == [
+        (1500, STATE_CHANGED),
+        (40000, STATE_CHANGED),
+        (60000, "deconz_event"),
+    ]
+    assert records[1].state == "off"
+    assert records[1].data == {"friendly_name": "Küche"}
+    assert records[2].data == {"id": "switch", "event": 1002}
+    assert len(list(read_records(data[:-3]))) == 2
+
+
+def test_replay(tmp_path, start_apps):
+    """The replayed state changes and events reach the apps."""
+    path = tmp_path / "events.adel"
+    write_log(path)
+    start, steps = replay.load_steps(path)
+    assert start == START
+    assert steps[0] == (
+        1.5, "state", "binary_sensor.bewegung_kuche", "on", {"friendly_name": "Küche"}
+    )
+
+    house = start_apps({"recorder": RECORDER}, {"binary_sensor.bewegung_kuche": "off"})
+    app = house.runtime.apps["recorder"]
+    app.listen_state(app.record, "binary_sensor.bewegung_kuche")
+    app.listen_event(app.record, "deconz_event")
+    result = house.run(steps, 120)
+
+    assert result["errors"] == []
+    assert [call[3] for call in app.calls[:2]] == ["on", "off"]
+    assert app.calls[2][:2] == ("deconz_event", {"id": "switch", "event": 1002})
+    assert house.runtime.now == START + datetime.timedelta(seconds=120)
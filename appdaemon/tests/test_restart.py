@@ -0,0 +1,68 @@
+"""Test the runtime state of the apps surviving a restart of AppDaemon."""
+
+import datetime
+
+import pytest
+
+import harness
+from conftest import START
+
+REMINDER = {
+    "module": "reminder",
+    "class": "ReminderAutomation",
+    "dependencies": ["notification_app"],
+    "properties": {
+        "title": "Pflanzen",
+        "message": "Pflanzen giessen",
+        "reminder_date": "01.05.2020",
+        "reminder_time": "08:00:00",
+        "repeat": {"type": "days", "frequency": 1},
+    },
+    "notifications": {"targets": "Dimitri", "interval": 60},
+}
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """Return the configuration of the house with a reminder, the apps save
+       their state to a file of the test."""
+    app_config = harness.load_app_config()
+    app_config["reminder"] = REMINDER
+    path = str(tmp_path / "app_state.json")
+    for config in app_config.values():
+        config.setdefault("properties", {})["state_file"] = path
+    return app_config
+
+
+def reminders_sent(house):
+    """Return the number of reminders sent by the notification app."""
+    return sum(
+        count
+        for service, count in house.runtime.services.items()
+        if service.startswith("notify/")
+    )
+
+
+def test_notification_is_cancelled_after_restart(start_apps, app_config):
+    """A repeating notification sent before a restart is cancelled by the
+       handle the app saved, through the timer of the restarted notification
+       app."""
+    house = start_apps(app_config)
+    house.runtime.apps["reminder"].send_reminder()
+    house.runtime.advance(START + datetime.timedelta(minutes=1))
+    house.runtime.drain()
+    assert reminders_sent(house) == 1
+    house.stop_apps()
+
+    # The restarted apps read their state from the file
+    house = start_apps(app_config)
+    reminder = house.runtime.apps["reminder"]
+    assert "reminder" in reminder.handles
+
+    house.runtime.fire_event("html5_notification.clicked", {"action": "done"})
+    house.runtime.drain()
+    assert "reminder" not in reminder.handles
+
+    house.runtime.advance(START + datetime.timedelta(hours=3))
+    house.runtime.drain()
+    assert reminders_sent(house) == 0
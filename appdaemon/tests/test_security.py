@@ -0,0 +1,37 @@
+"""Test setting the state of the security system."""
+
+import pytest
+
+import harness
+from house_config import HOUSE
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the apps of the house."""
+    return start_apps(harness.load_app_config())
+
+
+def test_alarm_state_is_set_before_returning(house):
+    """The input select and the alarm panel are set in order by the setter
+       itself, an unchanged input select isn't selected again."""
+    runtime = house.runtime
+    security = runtime.apps["security_app"]
+    called = []
+    call_service = runtime.call_service
+    runtime.call_service = lambda service, **data: (
+        called.append(service),
+        call_service(service, **data),
+    )
+
+    security.alarm_state = security.AlarmType.armed_motion
+    assert called == [
+        "input_select/select_option",
+        "alarm_control_panel/alarm_arm_away",
+    ]
+
+    runtime.drain()
+    assert security.alarm_state == security.AlarmType.armed_motion
+    called.clear()
+    security.alarm_state = security.AlarmType.armed_motion
+    assert called == ["alarm_control_panel/alarm_arm_away"]
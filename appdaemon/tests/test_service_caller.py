@@ -0,0 +1,72 @@
+"""Test the retries and the futures of the service caller."""
+
+import pytest
+
+import service_caller
+from service_caller import ServiceCaller
+
+
+@pytest.fixture
+def caller(monkeypatch):
+    """Return a caller running the calls on the calling thread without delay
+       between the attempts."""
+    monkeypatch.setattr(service_caller, "RETRY_DELAY", 0)
+    caller = ServiceCaller()
+    caller.background = False
+    return caller
+
+
+def failing(errors: list):
+    """Return a service raising the given errors, then returning its data."""
+
+    def call_service(service: str, **data: dict) -> dict:
+        if errors:
+            raise errors.pop(0)
+        return data
+
+    return call_service
+
+
+def test_transient_error_is_retried(caller):
+    """A call failing with a transient error succeeds on the next attempt."""
+    done = []
+    future = caller.submit(
+        failing([ConnectionError()]),
+        "light/turn_on",
+        {"entity_id": "light.kitchen"},
+        on_done=done.append,
+    )
+    assert future.result() == {"entity_id": "light.kitchen"}
+    assert done == [future]
+    assert (caller.submitted, caller.retried, caller.failed) == (1, 1, 0)
+
+
+def test_failure_is_reported(caller):
+    """Other errors and the last transient one fail the future and are
+       reported."""
+    errors = []
+    future = caller.submit(
+        failing([ValueError("kaputt")]),
+        "light/turn_on",
+        {"entity_id": "light.kitchen"},
+        on_error=errors.append,
+    )
+    assert isinstance(future.exception(), ValueError)
+
+    future = caller.submit(
+        failing([ConnectionError()] * 3),
+        "light/turn_on",
+        {"entity_id": "light.hall"},
+        on_error=errors.append,
+    )
+    assert isinstance(future.exception(), ConnectionError)
+    assert caller.failed == 2
+    assert caller.retried == 2
+    assert errors[0].startswith("Service light/turn_on für light.kitchen")
+
+
+def test_background_call():
+    """A call on the pool returns a future resolved by a worker."""
+    caller = ServiceCaller(workers=1)
+    future = caller.submit(failing([]), "switch/turn_on", {"entity_id": "switch.a"})
+    assert future.result(timeout=5) == {"entity_id": "switch.a"}
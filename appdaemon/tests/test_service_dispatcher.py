@@ -0,0 +1,99 @@
+"""Test the merging and the order of the service call dispatcher."""
+
+import threading
+
+import instrumentation
+from service_dispatcher import ServiceCallDispatcher
+
+
+def dispatcher():
+    """Return a dispatcher recording its calls, flushed by the tests only."""
+    calls, errors = [], []
+
+    def call_service(service, **data):
+        calls.append((service, data))
+
+    return ServiceCallDispatcher(call_service, errors.append, window=60), calls, errors
+
+
+def test_merges_calls_with_same_data():
+    """Calls to the same service with the same data become one call."""
+    service_dispatcher, calls, _ = dispatcher()
+    service_dispatcher.submit("light/turn_on", "light.a", brightness=100)
+    service_dispatcher.submit("light/turn_on", ["light.b", "light.a"], brightness=100)
+    service_dispatcher.submit("light/turn_on", "light.c", brightness=50)
+    service_dispatcher.flush()
+
+    assert calls == [
+        ("light/turn_on", {"entity_id": ["light.a", "light.b"], "brightness": 100}),
+        ("light/turn_on", {"entity_id": "light.c", "brightness": 50}),
+    ]
+    assert service_dispatcher.submitted == 4
+    assert service_dispatcher.dispatched == 2
+
+
+def test_keeps_order_of_an_entity():
+    """A call for an entity pending in another call flushes that call first."""
+    service_dispatcher, calls, _ = dispatcher()
+    service_dispatcher.submit("light/turn_on", "light.a")
+    service_dispatcher.submit("light/turn_on", "light.b")
+    service_dispatcher.submit("light/turn_off", "light.a")
+    service_dispatcher.submit("light/turn_on", "light.a")
+    service_dispatcher.flush()
+
+    assert calls == [
+        ("light/turn_on", {"entity_id": ["light.a", "light.b"]}),
+        ("light/turn_off", {"entity_id": "light.a"}),
+        ("light/turn_on", {"entity_id": "light.a"}),
+    ]
+
+
+def test_reports_failed_call():
+    """A failing call is reported and the other calls are still sent."""
+    calls, errors = [], []
+
+    def call_service(service, **data):
+        if service == "light/turn_off":
+            raise RuntimeError("offline")
+        calls.append(service)
+
+    service_dispatcher = ServiceCallDispatcher(call_service, errors.append, window=60)
+    service_dispatcher.submit("light/turn_off", "light.a")
+    service_dispatcher.submit("light/turn_on", "light.b")
+    service_dispatcher.flush()
+
+    assert calls == ["light/turn_on"]
+    assert len(errors) == 1 and "offline" in errors[0]
+
+
+def test_counts_merged_call_once():
+    """A merged call is counted once for the callback which queued it."""
+    service_dispatcher, calls, _ = dispatcher()
+    stats = instrumentation.CallbackStats("app", "motion")
+
+    def motion():
+        service_dispatcher.submit("light/turn_on", "light.a")
+        service_dispatcher.submit("light/turn_on", "light.b")
+
+    instrumentation.instrument(stats, motion)()
+    assert stats.service_calls == 0
+    service_dispatcher.flush()
+    assert len(calls) == 1
+    assert stats.service_calls == 1
+
+
+def test_reports_error_of_timer_flush():
+    """An error escaping the flush at the end of the window is reported
+       instead of being lost with the timer thread."""
+    errors, reported = [], threading.Event()
+
+    def report(error):
+        errors.append(error)
+        if len(errors) == 1:
+            raise RuntimeError("log unavailable")
+        reported.set()
+
+    service_dispatcher = ServiceCallDispatcher(None, report, window=0.001)
+    service_dispatcher.submit("light/turn_on", "light.a")
+    assert reported.wait(5)
+    assert "log unavailable" in errors[1]
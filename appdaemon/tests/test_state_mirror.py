@@ -0,0 +1,68 @@
+"""Test the state mirror serving the reads of the apps."""
+
+import pytest
+
+MIRROR = {"module": "state_mirror", "class": "StateMirror"}
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "entities": {"light": "light.kitchen"},
+}
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the mirror and an app using it."""
+    return start_apps(
+        {"state_mirror": MIRROR, "recorder": RECORDER}, {"light.kitchen": "off"}
+    )
+
+
+def test_listeners_stay_in_appdaemon(house):
+    """A listener of a mirrored entity is registered in AppDaemon and its
+       callback gets the keyword arguments AppDaemon passes."""
+    runtime = house.runtime
+    app = runtime.apps["recorder"]
+    handle = app.listen_state(app.record, "light.kitchen", new="on", note="x")
+    assert runtime.state_callbacks[handle]["entity"] == "light.kitchen"
+
+    runtime.set_state("light.kitchen", "on")
+    runtime.drain()
+    assert app.calls == [("light.kitchen", None, "off", "on", {"note": "x"})]
+
+    app.cancel_listen_state(handle)
+    assert handle not in runtime.state_callbacks
+
+
+def test_reads_are_served_by_the_mirror(house):
+    """State reads of a mirrored entity don't ask AppDaemon."""
+    runtime = house.runtime
+    app, mirror = runtime.apps["recorder"], runtime.apps["state_mirror"]
+    remote_reads = mirror.remote_reads
+
+    runtime.set_state("light.kitchen", "on", {"brightness": 100})
+    runtime.drain()
+    assert app.get_state("light.kitchen") == "on"
+    assert app.get_state("light.kitchen", attribute="brightness") == 100
+    assert mirror.remote_reads == remote_reads
+    assert mirror.local_reads >= 2
+
+
+def test_unknown_entity_is_read_once(house):
+    """An entity unknown to Home Assistant is asked for once per UNKNOWN_TTL,
+       a write of the app looks it up again."""
+    runtime = house.runtime
+    app, mirror = runtime.apps["recorder"], runtime.apps["state_mirror"]
+    remote_reads = mirror.remote_reads
+
+    assert app.get_state("sensor.unknown") is None
+    assert app.get_state("sensor.unknown") is None
+    assert mirror.remote_reads == remote_reads + 1
+    assert all(
+        callback["entity"] != "sensor.unknown"
+        for callback in runtime.state_callbacks.values()
+    )
+
+    app.set_state("sensor.unknown", state="42")
+    assert app.get_state("sensor.unknown") == "42"
+    assert mirror.is_tracked("sensor.unknown")
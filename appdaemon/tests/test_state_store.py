@@ -0,0 +1,63 @@
+"""Test that values saved in the state store are restored unchanged."""
+
+import datetime
+import json
+
+import pytest
+
+import state_store
+from transitions import TransitionModel
+
+
+def round_trip(value, owner=None):
+    """Return the value after saving it as JSON and loading it again."""
+    return state_store.decode(
+        json.loads(json.dumps(state_store.encode(value))), owner
+    )
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        None,
+        True,
+        3,
+        2.5,
+        "Wohnzimmer",
+        [1, "a", None],
+        {"a": [1, 2], "b": {"c": "d"}},
+        (1, "a"),
+        {"light.a", "light.b"},
+        frozenset(("x",)),
+        datetime.datetime(2020, 5, 1, 12, 30, 15),
+        datetime.datetime(2020, 5, 1, 12, tzinfo=datetime.timezone.utc),
+        datetime.date(2020, 5, 1),
+        datetime.time(23, 59, 1),
+        {"timers": [("off", datetime.datetime(2020, 5, 1, 12))]},
+    ),
+)
+def test_round_trip(value):
+    """The decoded value equals the encoded one."""
+    restored = round_trip(value)
+    assert restored == value
+    assert type(restored) is (set if isinstance(value, frozenset) else type(value))
+
+
+def test_round_trip_storable():
+    """An object of a @storable class is restored with its state."""
+    model = TransitionModel(("kitchen", "bathroom"))
+    start = datetime.datetime(2020, 5, 1, 12)
+    for seconds, room in ((0, "kitchen"), (10, "bathroom"), (20, "kitchen")):
+        model.observe(room, start + datetime.timedelta(seconds=seconds))
+
+    restored = round_trip({"model": model})["model"]
+    assert isinstance(restored, TransitionModel)
+    assert restored.rooms == model.rooms
+    assert restored.counts == model.counts
+    assert restored.transit == model.transit
+
+
+def test_unknown_type():
+    """A value JSON doesn't know and which isn't storable is rejected."""
+    with pytest.raises(TypeError):
+        state_store.encode(object())
@@ -0,0 +1,91 @@
+"""Test the timeline of the states of the day of the motion lights."""
+
+import datetime
+
+from conftest import START
+from motion_light import DayStates, build_segments, day_state_at, next_boundary
+
+TIMES = DayStates(
+    morning=datetime.time(5, 30), day=datetime.time(11, 30), night=datetime.time(22)
+)
+APP = {
+    "module": "motion_light",
+    "class": "MotionLightAutomation",
+    "entities": {
+        "motion_sensor": "binary_sensor.bewegung_kuche",
+        "lights": {
+            "morning": "light.kuche",
+            "day": "light.kuche",
+            "night": "light.kuche_nacht",
+        },
+    },
+    "properties": {
+        "day_state_time": {
+            "morning": "05:30:00",
+            "day": "11:30:00",
+            "night": "22:00:00",
+        },
+        "brightness_level": {"night": 20},
+        "light_color": {"night": "orange"},
+    },
+}
+
+
+def test_day_state_at():
+    """A state of the day starts at its time, the night lasts past midnight."""
+    assert day_state_at(datetime.time(5, 30), TIMES) == "morning"
+    assert day_state_at(datetime.time(11, 29, 59), TIMES) == "morning"
+    assert day_state_at(datetime.time(12), TIMES) == "day"
+    assert day_state_at(datetime.time(22), TIMES) == "night"
+    assert day_state_at(datetime.time(3), TIMES) == "night"
+
+
+def test_next_boundary():
+    """The next boundary is the next start of a state, the morning after the
+       night is on the next day."""
+    assert next_boundary(START, TIMES) == START.replace(hour=22)
+    assert next_boundary(START.replace(hour=23), TIMES) == datetime.datetime(
+        2020, 5, 2, 5, 30
+    )
+    assert next_boundary(START.replace(hour=11, minute=30), TIMES) == START.replace(
+        hour=22
+    )
+
+
+def test_build_segments():
+    """The segments default to 75% brightness and white."""
+    segments = build_segments(
+        DayStates(morning=("light.a",), day=("light.b",), night=("light.c",)),
+        DayStates(night=20),
+        DayStates(night="orange"),
+    )
+    assert segments.day.lights == ("light.b",)
+    assert segments.day.brightness == 255 / 100 * 75
+    assert segments.day.color == "white"
+    assert segments.night.brightness == 255 / 100 * 20
+    assert segments.night.color == "orange"
+
+
+def test_segment_flips_at_boundary(start_apps):
+    """The app flips its segment at the start of the night and a motion turns
+       on the lights of the night."""
+    house = start_apps(
+        {"motion_light_kitchen": APP},
+        {
+            "binary_sensor.bewegung_kuche": "off",
+            "light.kuche": "off",
+            "light.kuche_nacht": "off",
+        },
+    )
+    runtime = house.runtime
+    app = runtime.apps["motion_light_kitchen"]
+    assert app.day_state == "day"
+
+    runtime.advance(START.replace(hour=22, minute=1))
+    assert app.day_state == "night"
+
+    runtime.set_state("binary_sensor.bewegung_kuche", "on")
+    runtime.drain()
+    assert runtime.get_state("light.kuche_nacht") == "on"
+    assert runtime.get_state("light.kuche") == "off"
+    assert house.runtime.errors == []
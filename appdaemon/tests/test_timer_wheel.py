@@ -0,0 +1,114 @@
+"""Test the deadlines of the timer wheel and the deadline timer."""
+
+import datetime
+
+from timer_wheel import DeadlineTimer, TimerWheel
+
+START = datetime.datetime(2020, 5, 1, 12)
+
+
+class Scheduler:
+    """Define the scheduler of an app with a clock set by the tests."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.now = START
+        self.timers = {}
+        self.handles = 0
+
+    def datetime(self) -> datetime.datetime:
+        """Return the time of the clock."""
+        return self.now
+
+    def run_at(self, callback, deadline):
+        """Schedule a timer, return its handle."""
+        self.handles += 1
+        self.timers[self.handles] = (deadline, callback)
+        return self.handles
+
+    def cancel_timer(self, handle) -> None:
+        """Cancel a timer."""
+        del self.timers[handle]
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward and run the timers due."""
+        self.now += datetime.timedelta(seconds=seconds)
+        for handle, (deadline, callback) in sorted(
+            self.timers.items(), key=lambda item: item[1][0]
+        ):
+            if deadline <= self.now and handle in self.timers:
+                del self.timers[handle]
+                callback({})
+
+
+def deadline_timer():
+    """Return a scheduler, its wheel, a deadline timer and the times it ran."""
+    app = Scheduler()
+    wheel = TimerWheel(app)
+    runs = []
+    timer = DeadlineTimer(wheel, lambda kwargs: runs.append(app.now))
+    return app, wheel, timer, runs
+
+
+def test_moving_out_keeps_the_timer():
+    """Moving the deadline further out doesn't touch the scheduler."""
+    app, wheel, timer, runs = deadline_timer()
+    timer.run_in(60)
+    for _ in range(3):
+        app.advance(10)
+        timer.run_in(60)
+    assert wheel.armed == 1
+    assert timer.deadline == START + datetime.timedelta(seconds=90)
+
+    app.advance(30)
+    assert runs == []
+    assert wheel.armed == 2
+
+    app.advance(30)
+    assert runs == [START + datetime.timedelta(seconds=90)]
+    assert timer.deadline is None
+    assert app.timers == {}
+
+
+def test_moving_in_rearms_the_timer():
+    """An earlier deadline replaces the armed timer."""
+    app, wheel, timer, runs = deadline_timer()
+    timer.run_in(60)
+    timer.run_at(START + datetime.timedelta(seconds=5))
+    assert wheel.armed == 2
+    assert len(app.timers) == 1
+
+    app.advance(5)
+    assert runs == [START + datetime.timedelta(seconds=5)]
+    app.advance(60)
+    assert len(runs) == 1
+
+
+def test_cancel():
+    """A cancelled timer doesn't run and reports whether it was pending."""
+    app, _, timer, runs = deadline_timer()
+    timer.run_in(60)
+    assert timer.cancel()
+    assert not timer.cancel()
+    app.advance(120)
+    assert runs == []
+
+
+def test_many_timers_share_one():
+    """The timers of one wheel run in the order of their deadlines."""
+    app = Scheduler()
+    wheel = TimerWheel(app)
+    runs = []
+    timers = {
+        name: DeadlineTimer(wheel, lambda kwargs, name=name: runs.append(name))
+        for name in ("a", "b", "c")
+    }
+    timers["a"].run_in(30)
+    timers["b"].run_in(10)
+    timers["c"].run_in(20)
+    assert len(app.timers) == 1
+
+    app.advance(25)
+    assert runs == ["b", "c"]
+    app.advance(5)
+    assert runs == ["b", "c", "a"]
@@ -0,0 +1,39 @@
+"""Test the traces from a motion to the confirmed light."""
+
+import tracing
+from test_occupancy import ENGINE, STATES, motion
+
+MIRROR = {"module": "state_mirror", "class": "StateMirror"}
+
+
+def test_receivers_join_the_trace():
+    """The receivers of a sensor turning on share one trace until it turns
+       off, other changes start no trace."""
+    tracer = tracing.Tracer()
+    trace = tracer.receive("binary_sensor.bewegung_kuche", "off", "on")
+    assert tracer.receive("binary_sensor.bewegung_kuche", "off", "on") is trace
+    assert tracer.receive("binary_sensor.bewegung_kuche", "on", "on") is None
+    assert tracer.receive("light.kuche", "off", "on") is None
+
+    tracer.close("binary_sensor.bewegung_kuche")
+    assert tracer.receive("binary_sensor.bewegung_kuche", "off", "on") is not trace
+    assert tracer.started == 2
+
+
+def test_motion_is_traced_to_the_light(start_apps):
+    """A motion turning a light on finishes its trace with the new state of the
+       light, the report has a value for each stage after ha."""
+    house = start_apps({"state_mirror": MIRROR, "occupancy": ENGINE}, STATES)
+    motion(house.runtime, "binary_sensor.bewegung_kuche")
+    assert house.runtime.get_state("light.kuche") == "on"
+
+    report = tracing.TRACER.report()
+    assert report["traces"] == 1
+    assert report["unconfirmed"] == 0
+    assert [stage for stage, values in report["stages"].items() if values[0]] == [
+        *tracing.STAGES[1:],
+        "total",
+    ]
+    assert report["slowest"].startswith(
+        "#1 binary_sensor.bewegung_kuche -> light.kuche (occupancy)"
+    )
@@ -0,0 +1,63 @@
+"""Test the model of the movements from room to room."""
+
+import datetime
+import threading
+
+from conftest import START
+from transitions import MAX_TRANSIT, TransitionModel
+
+
+def walk(model, rooms, start=START, step=10):
+    """Observe a motion in each of the rooms, step seconds apart."""
+    for number, room in enumerate(rooms):
+        model.observe(room, start + datetime.timedelta(seconds=number * step))
+
+
+def test_predicts_the_usual_next_room():
+    """The room usually entered next is predicted with its transit time."""
+    model = TransitionModel()
+    for day in range(8):
+        walk(model, ("flur", "kueche"), START + datetime.timedelta(days=day))
+    walk(model, ("flur", "bad"), START + datetime.timedelta(days=9))
+
+    room, probability, transit = model.predict("flur", START)
+    assert room == "kueche"
+    assert 0.5 < probability < 1
+    assert transit == 10
+
+
+def test_ignores_slow_and_unknown_transitions():
+    """A motion after MAX_TRANSIT isn't a transition, too few transitions
+       predict nothing."""
+    model = TransitionModel()
+    walk(model, ("flur", "kueche"), step=MAX_TRANSIT + 1)
+    assert model.predict("flur", START) is None
+    assert model.predict("keller", START) is None
+
+
+def test_observes_from_several_threads():
+    """Motions observed by several threads keep the matrices consistent."""
+    model = TransitionModel()
+
+    def observe(offset):
+        """Walk through rooms of its own and shared ones."""
+        for number in range(200):
+            model.observe(
+                f"raum_{(offset + number) % 12}",
+                START + datetime.timedelta(seconds=number),
+            )
+
+    threads = [threading.Thread(target=observe, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    size = len(model.rooms)
+    assert size == 12
+    assert all(
+        len(row) == size
+        for matrix in (*model.counts, model.transit)
+        for row in matrix
+    )
+    assert all(len(matrix) == size for matrix in model.counts)
@@ -0,0 +1,44 @@
+"""Test the cached validation of the app arguments and the startup timings."""
+
+import voluptuous as vol
+
+import appbase
+
+SCHEMA = vol.Schema({vol.Required("delay"): vol.Coerce(int)})
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "entities": {"light": "light.kitchen"},
+}
+
+
+def test_validation_is_cached():
+    """Equal arguments share the frozen result, an invalid result is cached
+       with its error."""
+    config, error = appbase.validate_args(SCHEMA, {"delay": "5"})
+    assert error is None
+    assert config["delay"] == 5
+    assert appbase.validate_args(SCHEMA, {"delay": "5"})[0] is config
+
+    assert appbase.validate_args(SCHEMA, {})[0] is None
+    assert "delay" in appbase.validate_args(SCHEMA, {})[1]
+
+
+def test_cache_is_bounded(monkeypatch):
+    """The oldest results are dropped above the size of the cache."""
+    monkeypatch.setattr(appbase, "VALIDATION_CACHE", {})
+    monkeypatch.setattr(appbase, "MAX_VALIDATION_CACHE", 2)
+    for delay in range(3):
+        appbase.validate_args(SCHEMA, {"delay": delay})
+    assert len(appbase.VALIDATION_CACHE) == 2
+    assert (id(SCHEMA), appbase.args_hash({"delay": 0})) not in (
+        appbase.VALIDATION_CACHE
+    )
+
+
+def test_startup_timings(start_apps):
+    """The time of each startup phase of an app is recorded by its name."""
+    start_apps({"timed_recorder": RECORDER}, {"light.kitchen": "off"})
+    timings = appbase.STARTUP_TIMINGS["timed_recorder"]
+    assert list(timings) == ["validation", "dependencies", "constraints", "configure"]
+    assert all(duration >= 0 for duration in timings.values())
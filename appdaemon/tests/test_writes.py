@@ -0,0 +1,75 @@
+"""Test that writes of a state an entity already has are dropped."""
+
+import pytest
+
+MIRROR = {"module": "state_mirror", "class": "StateMirror"}
+RECORDER = {
+    "module": "sample_apps",
+    "class": "Recorder",
+    "entities": {
+        "light": "light.kitchen",
+        "room": "input_select.last_motion",
+        "sensor": "sensor.report",
+    },
+}
+
+
+@pytest.fixture
+def house(start_apps):
+    """Return the mirror and an app writing through it."""
+    return start_apps(
+        {"state_mirror": MIRROR, "recorder": RECORDER},
+        {
+            "light.kitchen": "off",
+            "input_select.last_motion": "Kuche",
+            "sensor.report": "1",
+        },
+    )
+
+
+def test_select_option(house):
+    """Selecting the selected option or one about to be selected is dropped."""
+    runtime = house.runtime
+    app = runtime.apps["recorder"]
+    app.select_option("input_select.last_motion", "Kuche")
+    assert runtime.services.get("input_select/select_option", 0) == 0
+
+    app.select_option("input_select.last_motion", "Bad")
+    app.select_option("input_select.last_motion", "Bad")
+    assert runtime.services["input_select/select_option"] == 1
+
+    app.select_option("input_select.last_motion", "Kuche")
+    assert runtime.services["input_select/select_option"] == 2
+    runtime.drain()
+    assert runtime.get_state("input_select.last_motion") == "Kuche"
+    assert runtime.apps["state_mirror"].redundant_writes == 2
+
+
+def test_switch(house):
+    """Switching a light into its state is dropped unless there is data."""
+    runtime = house.runtime
+    app = runtime.apps["recorder"]
+    app.turn_off("light.kitchen")
+    assert runtime.services.get("homeassistant/turn_off", 0) == 0
+
+    app.turn_on("light.kitchen")
+    runtime.drain()
+    app.turn_on("light.kitchen")
+    app.turn_on("light.kitchen", brightness_pct=50)
+    assert runtime.services["homeassistant/turn_on"] == 2
+
+
+def test_set_state(house):
+    """Setting the same state and attributes is dropped, new attributes are
+       written."""
+    runtime = house.runtime
+    app = runtime.apps["recorder"]
+    changed = runtime.get_state("sensor.report", "all")["last_updated"]
+
+    runtime.advance(runtime.now.replace(minute=5))
+    app.set_state("sensor.report", state="1")
+    assert runtime.get_state("sensor.report", "all")["last_updated"] == changed
+    assert runtime.apps["state_mirror"].redundant_writes == 1
+
+    app.set_state("sensor.report", state="1", attributes={"unit": "ms"})
+    assert runtime.get_state("sensor.report", "unit") == "ms"
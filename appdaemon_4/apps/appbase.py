@@ -32,15 +32,29 @@
 #     from the app 'presence_app.py' with self.presence_app.'method/variable'
 # Creates a reference to the manager app if defined
 # the app can then be used like self.manager.'method/variable'
+# Registers the constraints constrain_enabled, constrain_sleeping,
+# constrain_presence, constrain_mode_on, constrain_mode_off and constrain_days
+#   - e.g. constrain_enabled=True, constrain_mode_off="guest_mode",
+#     constrain_presence="someone,everyone", constrain_days="Saturday,Sunday"
+#   - the states the constraints depend on, including the mode input booleans
+#     in MODES of house.py, are read and listened to in initialize, checking a
+#     constraint only reads the cache and never calls Home Assistant
+# AsyncAppBase adds awaitable get_state, call_service, select_option and
+# mqtt_publish methods for apps with coroutine callbacks
+#   - the callbacks run on the event loop and don't block a worker thread
+#   - get_states, call_service_for and select_options fan out to several
+#     entities concurrently
 ##############################################################################
 
 """Define a generic object which  all apps/automations inherit from."""
-from datetime import datetime as dt
-from typing import Union, Optional
+import asyncio
+import inspect
+from datetime import time
+from typing import Any, Dict, Iterable, Union, Optional
 import adbase as ad
 import voluptuous as vol
 
-from house import HOUSE
+from house import HOUSE, MODES
 from helpers import voluptuous_helper as vol_help
 
 
@@ -54,6 +68,17 @@ APP_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
+CONSTRAINTS = (
+    "constrain_enabled",
+    "constrain_sleeping",
+    "constrain_presence",
+    "constrain_mode_on",
+    "constrain_mode_off",
+    "constrain_days",
+)
+
+WEEKDAY = "weekday"
+
 
 class AppBase(ad.ADBase):
     """Define a base automation object."""
@@ -87,61 +112,91 @@ class AppBase(ad.ADBase):
         if self.args.get('manager'):
             self.manager = getattr(self, self.args['manager'])
 
-        # Register custom constraints
-        self.register_constraint("constrain_enabled")
-        self.register_constraint("constrain_sleeping")
-        self.register_constraint("constrain_presence")
-        self.register_constraint("constrain_mode_on")
-        self.register_constraint("constrain_mode_off")
-        self.register_constraint("constrain_days")
-
-        # Run the app configuration if specified
-        if hasattr(self, "configure"):
-            self.configure()
-
         # Define the input boolean to enable/disable app
         if "enable_input_boolean" in self.args:
             self.enable_input_boolean = self.args['enable_input_boolean']
         else:
             self.enable_input_boolean = f"input_boolean.{self.name}"
 
-        @property
-        def enabled(self) -> bool:
-            """Return whether app is enabled."""
-            if not self.hass.entity_exists(self.enable_input_boolean):
-                return True
-            return self.hass.get_state(self.enable_input_boolean) == "on"
-
-        def constrain_enabled(self, value: bool) -> bool:
-            """Execute only if app is enabled."""
-            if value:
-                return self.enabled
-            return False
+        # Cache the inputs of the constraints and register the constraints
+        self.constraint_inputs = {}
+        self.presence_constraints = {}
+        for entity in (
+            self.enable_input_boolean,
+            HOUSE["sleep_boolean"],
+            HOUSE["presence_state"],
+            *MODES.values(),
+        ):
+            self.track_constraint_input(entity)
+        self.constraint_inputs[WEEKDAY] = self.adbase.datetime().strftime("%A")
+        self.adbase.run_daily(self.weekday_changed, time(0, 0, 0))
+
+        for constraint in CONSTRAINTS:
+            self.register_constraint(constraint)
 
-        def constrain_sleeping(self, value: bool) -> bool:
-            """Execute only if app is enabled."""
-            return value and self.hass.get_state(HOUSE["sleep_boolean"]) == "on"
-
-        # def constrain_presence(self, house_states: Union[list, str]) -> bool:
-        #     """Execute only if house is in specified states."""
-        #     if not value:
-        #         return True
+        # Run the app configuration if specified
+        if hasattr(self, "configure"):
+            self.configure()
 
-        #     return getattr(self.presence_app, "house_in_state")(
-        #         [self.presence_app.HouseState[s].value for s in house_states.split(",")]
-        #     )
+    def track_constraint_input(self, entity: str) -> None:
+        """Add an entity to the cached constraint inputs, only in initialize."""
+        if entity in self.constraint_inputs:
+            return
+        if self.hass.entity_exists(entity):
+            self.constraint_inputs[entity] = self.hass.get_state(entity)
+            self.hass.listen_state(self.constraint_input_changed, entity)
+        else:
+            self.constraint_inputs[entity] = None
+
+    def constraint_input_changed(
+        self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
+    ) -> None:
+        """Update the cached state of a constraint input."""
+        self.constraint_inputs[entity] = new
+
+    def weekday_changed(self, kwargs: dict) -> None:
+        """Update the cached weekday."""
+        self.constraint_inputs[WEEKDAY] = self.adbase.datetime().strftime("%A")
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether app is enabled, true if there is no input boolean."""
+        return self.constraint_inputs.get(self.enable_input_boolean) != "off"
+
+    def constrain_enabled(self, value: bool) -> bool:
+        """Execute only if app is enabled."""
+        if value:
+            return self.enabled
+        return False
+
+    def constrain_sleeping(self, value: bool) -> bool:
+        """Execute only if the house is sleeping."""
+        return value and self.constraint_inputs.get(HOUSE["sleep_boolean"]) == "on"
+
+    def constrain_presence(self, house_states: str) -> bool:
+        """Execute only if house is in specified states, e.g. 'someone,everyone'."""
+        states = self.presence_constraints.get(house_states)
+        if states is None:
+            presence_app = getattr(self, "presence_app", None)
+            states = self.presence_constraints[house_states] = frozenset(
+                presence_app.HouseStates[state].value
+                if presence_app is not None
+                else state
+                for state in house_states.split(",")
+            )
+        return self.constraint_inputs.get(HOUSE["presence_state"]) in states
 
-        def constrain_mode_on(self, mode: str) -> bool:
-            """Execute only if mode is on."""
-            return self.hass.get_state(f"input_boolean.{mode}") == "on"
+    def constrain_mode_on(self, mode: str) -> bool:
+        """Execute only if mode is on, the mode must be in MODES."""
+        return self.constraint_inputs.get(MODES.get(mode)) == "on"
 
-        def constrain_mode_off(self, mode: str) -> bool:
-            """Execute only if mode is off."""
-            return self.hass.get_state(f"input_boolean.{mode}") == "off"
+    def constrain_mode_off(self, mode: str) -> bool:
+        """Execute only if mode is off, the mode must be in MODES."""
+        return self.constraint_inputs.get(MODES.get(mode)) == "off"
 
-        def constrain_days(self, mode: str) -> bool:
-            """Execute only if today is in specified days."""
-            return dt.today().strftime("%A") in mode.split(",")
+    def constrain_days(self, days: str) -> bool:
+        """Execute only if today is in specified days."""
+        return self.constraint_inputs[WEEKDAY] in days.split(",")
 
     # def constrain_app_enabled(self, value: str) -> bool:
     #     """Define enable constraint for automation object. Returns True if app
@@ -194,4 +249,69 @@ class AppBase(ad.ADBase):
     #     if operator == "below" and float(value) >= float(state):
     #         return False
 
-    #     return True
\ No newline at end of file
+    #     return True
+
+
+class AsyncAppBase(AppBase):
+    """Define a base automation object with awaitable API methods.
+
+    Callbacks of subclasses are coroutines which AppDaemon runs on its event
+    loop instead of the worker threads, so waiting for Home Assistant or the
+    MQTT broker doesn't block a thread.
+    """
+
+    @staticmethod
+    async def resolve(result: Any) -> Any:
+        """Return the result of an API call, awaiting it if it is pending."""
+        if inspect.isawaitable(result):
+            return await result
+        return result
+
+    async def get_state(self, entity_id: str = None, **kwargs: Any) -> Any:
+        """Return the state of an entity."""
+        return await self.resolve(self.hass.get_state(entity_id, **kwargs))
+
+    async def get_states(self, entity_ids: Iterable[str], **kwargs: Any) -> dict:
+        """Return the states of several entities, read concurrently."""
+        entity_ids = list(entity_ids)
+        states = await asyncio.gather(
+            *(self.get_state(entity_id, **kwargs) for entity_id in entity_ids)
+        )
+        return dict(zip(entity_ids, states))
+
+    async def call_service(self, service: str, **kwargs: Any) -> Any:
+        """Call a service of Home Assistant."""
+        return await self.resolve(self.hass.call_service(service, **kwargs))
+
+    async def call_service_for(
+        self, service: str, entity_ids: Iterable[str], **kwargs: Any
+    ) -> list:
+        """Call a service for each entity, the calls run concurrently."""
+        return await asyncio.gather(
+            *(
+                self.call_service(service, entity_id=entity_id, **kwargs)
+                for entity_id in entity_ids
+            )
+        )
+
+    async def select_option(self, entity_id: str, option: str, **kwargs: Any) -> Any:
+        """Select an option of an input select."""
+        return await self.resolve(
+            self.hass.select_option(entity_id, option, **kwargs)
+        )
+
+    async def select_options(self, options: Dict[str, str]) -> list:
+        """Select the options of several input selects concurrently."""
+        return await asyncio.gather(
+            *(
+                self.select_option(entity_id, option)
+                for entity_id, option in options.items()
+            )
+        )
+
+    async def mqtt_publish(
+        self, topic: str, payload: Any = None, **kwargs: Any
+    ) -> Any:
+        """Publish a message to the MQTT broker."""
+        return await self.resolve(self.mqtt.mqtt_publish(topic, payload, **kwargs))
+
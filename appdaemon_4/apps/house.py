@@ -5,4 +5,11 @@ HOUSE = {
     "presence_state": "input_select.house_presence",
     "last_motion": "input_select.last_motion",
     "sleep_boolean": "input_boolean.sleep_mode",
-}
\ No newline at end of file
+}
+
+MODES = {
+    "cleaning_mode": "input_boolean.cleaning_mode",
+    "guest_mode": "input_boolean.guest_mode",
+    "sleep_mode": "input_boolean.sleep_mode",
+    "dimitri_chill_mode": "input_boolean.dimitri_chill_mode",
+}
@@ -1,15 +1,16 @@
 """Define automations for presence."""
+import asyncio
 from enum import Enum
-from typing import Union
+from typing import Iterable, Union
 import voluptuous as vol
 
-from appbase import AppBase
+from appbase import AsyncAppBase
 from house import HOUSE
 from persons import PERSONS
 from helpers import voluptuous_helper as vol_help
 
 
-class PresenceAutomation(AppBase):
+class PresenceAutomation(AsyncAppBase):
     """Define a base feature for presence automations."""
 
     class PresenceStates(Enum):
@@ -103,12 +104,11 @@ class PresenceAutomation(AppBase):
 
         self.set_house_input_select()
 
-    def set_presence_person(
+    async def set_presence_person(
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
     ) -> None:
         """Set the presence input select for the person and the house."""
-        self.adbase.log("test")
-        old_state = self.hass.get_state(kwargs["input_select"])
+        old_state = await self.get_state(kwargs["input_select"])
         target_state = kwargs["target_state"]
 
         # just left to just arrived --> home
@@ -118,7 +118,8 @@ class PresenceAutomation(AppBase):
         ):
             target_state = self.PresenceStates.home.value
 
-        # update person device tracker via mqtt
+        # update person device tracker via mqtt and set person input_select
+        updates = [self.select_option(kwargs["input_select"], target_state)]
         if "keys_topic" in PERSONS[kwargs["person"]]:
             if target_state in [
                 self.PresenceStates.home.value,
@@ -127,38 +128,58 @@ class PresenceAutomation(AppBase):
                 payload = "home"
             else:
                 payload = "not_home"
-            self.mqtt.mqtt_publish(
-                PERSONS[kwargs["person"]]["keys_topic"], payload,
+            updates.append(
+                self.mqtt_publish(PERSONS[kwargs["person"]]["keys_topic"], payload)
             )
-
-        # set person input_select
-        self.hass.select_option(kwargs["input_select"], target_state)
+        await asyncio.gather(*updates)
         self.adbase.log(f"{kwargs['person']} war {old_state}, ist jetzt {target_state}")
 
-    def set_presence_house(
+    async def set_presence_house(
         self, entity: Union[str, dict], attribute: str, old: str, new: str, kwargs: dict
     ) -> None:
-        self.set_house_input_select()
+        """Set the presence input select of the house."""
+        states = await self.get_states(
+            [self.house_state]
+            + [attribute["presence_state"] for attribute in PERSONS.values()]
+        )
+        old_state = states.pop(self.house_state)
+        target_state = self.house_state_of(states.values())
+        if not old_state == target_state.value:
+            await self.select_option(self.house_state, target_state.value)
+            self.adbase.log(f"Vorher: {old_state}, Jetzt: {target_state.value}")
 
     def set_house_input_select(self) -> None:
+        """Set the presence input select of the house, blocking variant."""
         old_state = self.hass.get_state(self.house_state)
         target_state = self.house_presence_state
-        if not old_state == target_state:
+        if not old_state == target_state.value:
             self.hass.select_option(self.house_state, target_state.value)
             self.adbase.log(f"Vorher: {old_state}, Jetzt: {target_state.value}")
 
-    @property
-    def house_presence_state(self) -> "HouseState":
-        """Return the presence state of the house."""
-        if self.everyone_home:
+    def house_state_of(self, presence_states: Iterable[str]) -> "HouseStates":
+        """Return the presence state of the house for the states of the persons."""
+        presence_states = list(presence_states)
+        home = [self.PresenceStates.home.value, self.PresenceStates.just_arrived.value]
+        if all(state in home for state in presence_states):
             return self.HouseStates.everyone
-        elif self.everyone_extended_away:
+        elif all(
+            state == self.PresenceStates.extended_away.value
+            for state in presence_states
+        ):
             return self.HouseStates.vacation
-        elif self.noone_home:
+        elif not any(state in home for state in presence_states):
             return self.HouseStates.noone
         else:
             return self.HouseStates.someone
 
+    @property
+    def house_presence_state(self) -> "HouseState":
+        """Return the presence state of the house."""
+        return self.house_state_of(
+            self.hass.get_state(attribute["presence_state"])
+            for attribute in PERSONS.values()
+        )
+
     def house_in_state(self, house_states: Union[list, str]) -> bool:
         """Return True if house is in specified states."""
         return self.hass.get_state(self.house_state) in house_states.split(",")